@@ -1,40 +1,245 @@
+import atexit
+import os
+import threading
+import time
+
 import yaml
 
+# Expected type of the known parameters, values read from the file are converted to it
+TYPES = {
+    "game.name": str,
+    "game.version": str,
+    "game.max_fps": int,
+    "game.display.width": int,
+    "game.display.height": int,
+    "game.display.dirty_rects": bool,
+    "game.text_cache_mb": int,
+    "game.background_cache_mb": int,
+    "game.audio_offset_ms": int,
+    "options.display_width_options": list,
+    "options.display_height_options": list,
+    "options.max_fps_options": list,
+}
+
+
+def flatten(parameters, prefix=""):
+    """Return {dotted key: value} of the leaves of a nested parameters dict."""
+    values = {}
+    for key, value in parameters.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        else:
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def coerce(key, value):
+    """Convert a value to the type of its key, raising ValueError if it cannot be. Typed keys cannot be empty."""
+    expected = TYPES.get(key)
+    if expected is None or isinstance(value, expected):
+        return value
+    if value is None or expected is bool or expected is list:
+        raise ValueError(f"'{key}' must be of type {expected.__name__}, got {value!r}.")
+    try:
+        return expected(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' must be of type {expected.__name__}, got {value!r}.") from None
+
 
 class GameConfig:
+    """
+    Parameters of config.yml, resolved once into a dict of dotted keys.
+
+    set_parameter only updates memory and wakes a writer thread, which saves the file WRITE_DELAY seconds after the
+    last change, so a burst of changes is written once. The file is replaced atomically, and pending changes are
+    flushed at exit. Once watch was called, the same thread checks the file for external edits. update, called by
+    the main loop, applies them. Subscribers are notified of every change, local or external, on the main thread.
+    """
+    WRITE_DELAY = 0.5
+    WATCH_INTERVAL = 1.0
+
     def __init__(self, config_file):
         self.config_file = config_file
-        self.parameters = {}
+        self.parameters = {}  # Nested parameters, as saved
+        self.values = {}  # Dotted key -> value
+        self.subscribers = []  # (keys, callback)
+        self.file_stamp = None  # (mtime_ns, size) of the file as last read or written
+
+        self.lock = threading.Lock()  # Guards parameters, dirty_keys, write_time and external_parameters
+        self.write_lock = threading.Lock()  # One writer of the file at a time
+        self.wake = threading.Event()
+        self.dirty_keys = set()  # Keys changed in memory and not written yet
+        self.write_time = None  # perf_counter time the pending changes are due to be written at
+        self.external_parameters = None  # Content of the file after an external edit, applied by update
+        self.watching = False
+        self.thread = None
         self.load_config()
+        atexit.register(self.flush)
 
+    # [READ]
     def load_config(self):
         """Load the configuration from a YAML file."""
         with open(self.config_file, 'r') as file:
-            self.parameters = yaml.safe_load(file)
+            parameters = yaml.safe_load(file) or {}
+        if not isinstance(parameters, dict):
+            raise ValueError(f"'{self.config_file}' must contain a mapping of parameters, got {parameters!r}.")
+        self.file_stamp = self._stat_file()
+        self.parameters = parameters
+        self.values = {}
+        for key, value in flatten(parameters).items():
+            try:
+                self.values[key] = coerce(key, value)
+            except ValueError as e:
+                print(f"Ignoring a config parameter: {e}")
 
     def get_parameter(self, key):
         """Get a specific parameter value."""
-        keys = key.split('.')
-        value = self.parameters
-        for k in keys:
-            value = value.get(k)
+        value = self.values.get(key)
+        if value is None and key not in self.values:
+            # A section rather than a parameter
+            value = self.parameters
+            for k in key.split('.'):
+                value = value.get(k) if isinstance(value, dict) else None
+            if not isinstance(value, dict):
+                value = None  # A parameter ignored because its value was malformed
         return value
 
+    def get_options(self, key):
+        """Get possible options for a specific parameter."""
+        return self.get_parameter(f"options.{key}")
+
+    # [WRITE]
     def set_parameter(self, key, value):
-        """Set a specific parameter value and save to file."""
+        """Set a specific parameter value, notify its subscribers and schedule the save of the file."""
+        value = coerce(key, value)
+        if self.values.get(key) == value and key in self.values:
+            return
         keys = key.split('.')
-        param = self.parameters
-        for k in keys[:-1]:
-            param = param.setdefault(k, {})
-        param[keys[-1]] = value
-        self.save_config()
+        with self.lock:
+            param = self.parameters
+            for k in keys[:-1]:
+                param = param.setdefault(k, {})
+            param[keys[-1]] = value
+            self.values[key] = value
+            self.dirty_keys.add(key)
+            self.write_time = time.perf_counter() + self.WRITE_DELAY
+        self._start_thread()
+        self.wake.set()
+        self._notify({key: value})
 
     def save_config(self):
-        """Save the current parameters to the YAML file without anchors."""
-        with open(self.config_file, 'w') as file:
-            # Use the default Dumper to avoid anchors and maintain a flat structure
-            yaml.dump(self.parameters, file, default_flow_style=False)
+        """Save the current parameters to the YAML file without anchors, through a temporary file."""
+        with self.write_lock:
+            with self.lock:
+                # Use the default Dumper to avoid anchors and maintain a flat structure
+                data = yaml.dump(self.parameters, default_flow_style=False)
+                self.dirty_keys.clear()
+                self.write_time = None
+            temp_path = f"{self.config_file}.{os.getpid()}.tmp"
+            try:
+                with open(temp_path, 'w') as file:
+                    file.write(data)
+                os.replace(temp_path, self.config_file)
+                self.file_stamp = self._stat_file()  # Our own write is not an external edit
+            except OSError as e:
+                print(f"Could not save the config: {e}")
 
-    def get_options(self, key):
-        """Get possible options for a specific parameter."""
-        return self.get_parameter(f"options.{key}")
+    def flush(self):
+        """Write the pending changes now, at exit or before another process reads the file."""
+        if self.write_time is not None:
+            self.save_config()
+
+    # [WATCH]
+    def watch(self):
+        """Check the file for external edits from now on, they are applied by update."""
+        self.watching = True
+        self._start_thread()
+        self.wake.set()  # The thread may be waiting for a distant write, without checking the file
+
+    def update(self):
+        """Apply the last external edit of the file, if any, and notify the subscribers of the changed values."""
+        if self.external_parameters is None:
+            return
+        with self.lock:
+            parameters, self.external_parameters = self.external_parameters, None
+            # Changes not written yet are newer than the file
+            for key in self.dirty_keys:
+                param = parameters
+                keys = key.split('.')
+                for k in keys[:-1]:
+                    param = param.setdefault(k, {})
+                param[keys[-1]] = self.values[key]
+            self.parameters = parameters
+
+        changes = {}
+        for key, value in flatten(parameters).items():
+            try:
+                value = coerce(key, value)
+            except ValueError as e:
+                print(f"Ignoring a config parameter: {e}")
+                continue
+            if key not in self.values or self.values[key] != value:
+                self.values[key] = changes[key] = value
+        if changes:
+            self._notify(changes)
+
+    def subscribe(self, keys, callback):
+        """Call callback({key: value}) with the changed values of keys, a dotted key or a tuple of them."""
+        self.subscribers.append(((keys,) if isinstance(keys, str) else tuple(keys), callback))
+
+    def _notify(self, changes):
+        for keys, callback in self.subscribers:
+            changed = {key: changes[key] for key in keys if key in changes}
+            if changed:
+                callback(changed)
+
+    # [THREAD]
+    def _stat_file(self):
+        try:
+            file_stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def _start_thread(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="config", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            timeout = self.WATCH_INTERVAL if self.watching else None
+            write_time = self.write_time
+            if write_time is not None:
+                timeout = max(0.0, write_time - time.perf_counter())
+                if self.watching:
+                    timeout = min(timeout, self.WATCH_INTERVAL)
+            self.wake.wait(timeout)
+            self.wake.clear()
+
+            write_time = self.write_time
+            if write_time is not None and time.perf_counter() >= write_time:
+                self.save_config()
+            if self.watching:
+                self._check_file()
+
+    def _check_file(self):
+        with self.write_lock:
+            file_stamp = self._stat_file()
+            if file_stamp is None or file_stamp == self.file_stamp:
+                return
+            try:
+                with open(self.config_file, 'r') as file:
+                    parameters = yaml.safe_load(file)
+            except (OSError, yaml.YAMLError) as e:
+                self.file_stamp = file_stamp
+                print(f"Could not reload the config: {e}")
+                return
+            if not parameters:
+                return  # Truncated by an editor that has not written the new content yet, checked again next time
+            self.file_stamp = file_stamp
+            if not isinstance(parameters, dict):
+                print(f"Could not reload the config: expected a mapping of parameters, got {parameters!r}.")
+                return
+        with self.lock:
+            self.external_parameters = parameters
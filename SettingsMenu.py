@@ -1,5 +1,12 @@
 import pygame
 
+from src.ui.assets import assets
+from src.ui.background import background_service
+from src.ui.dirty import dirty_rects
+from src.ui.overlay import overlay_cache
+from src.ui.pacing import ANIMATION, frame_pacer
+from src.ui.text_cache import render_text
+
 
 class SettingsMenu:
     def __init__(self, app):
@@ -23,6 +30,7 @@ class SettingsMenu:
             ("Max FPS", self.max_fps_options),
             ("Back", None)  # None indicates a back button
         ]
+        self.parameter_keys = ['game.display.width', 'game.display.height', 'game.max_fps']
 
         # Set the current value indices based on active settings
         self.value_indices = [
@@ -36,27 +44,22 @@ class SettingsMenu:
         self.button_height = 40  # Height of each button
         self.button_color = (100, 100, 100, 127)  # Default button color
         self.hover_color = (200, 200, 200, 127)  # Color when hovering over button
+        self.labels = None  # Rendered button texts, None when they must be rebuilt
+        # Values edited in config.yml while the game runs move the selection too
+        app.config.subscribe(tuple(self.parameter_keys), self.select_values)
 
     def update_parameter(self, index):
-        param_name, values = self.menu_items[index]
-        current_value = values[self.value_indices[index]]
-
-        # Update the App parameters based on the selected index
-        if param_name == "Display Width":
-            self.app.DISPLAY_WIDTH = current_value
-            self.app.config.set_parameter('game.display.width', current_value)  # Save to config
-            self.app.display = pygame.display.set_mode((self.app.DISPLAY_WIDTH, self.app.DISPLAY_HEIGHT),
-                                                       pygame.DOUBLEBUF)
-            self.update_menu_position()
-        elif param_name == "Display Height":
-            self.app.DISPLAY_HEIGHT = current_value
-            self.app.config.set_parameter('game.display.height', current_value)  # Save to config
-            self.app.display = pygame.display.set_mode((self.app.DISPLAY_WIDTH, self.app.DISPLAY_HEIGHT),
-                                                       pygame.DOUBLEBUF)
-            self.update_menu_position()
-        elif param_name == "Max FPS":
-            self.app.MAX_FPS = current_value
-            self.app.config.set_parameter('game.max_fps', current_value)  # Save to config
+        _, values = self.menu_items[index]
+        # The App applies it through its config subscriptions, the file is saved later on the config thread
+        self.app.config.set_parameter(self.parameter_keys[index], values[self.value_indices[index]])
+        self.labels = None
+
+    def select_values(self, changes):
+        for key, value in changes.items():
+            index = self.parameter_keys.index(key)
+            if value in self.menu_items[index][1]:
+                self.value_indices[index] = self.menu_items[index][1].index(value)
+        self.labels = None
 
     def _smooth_scroll(self, current, target, dt, velocity_factor=8):
         if current != target:
@@ -72,45 +75,52 @@ class SettingsMenu:
         self.scroll_index = 0
         self.target_position_x = self.app.DISPLAY_WIDTH - self.width if self.is_open else self.app.DISPLAY_WIDTH
 
-    def draw(self, display):
+    def update(self, dt):
+        if self.current_position != self.target_position_x:
+            frame_pacer.request(ANIMATION)
         # Update current position using smooth scroll
-        dt = self.app.clock.get_time() / 1000.0  # Time since last frame in seconds
         self.current_position = self._smooth_scroll(self.current_position, self.target_position_x, dt)
 
         # Update the rectangle's right position
         self.rect.x = self.current_position
 
+        if self.is_open or self.current_position < self.app.DISPLAY_WIDTH:
+            dirty_rects.track(self, self.rect, (self.scroll_index, tuple(self.value_indices)))
+
+    def _get_labels(self):
+        """Return the rendered button texts, rebuilt only after a value or the selection changed."""
+        if self.labels is None:
+            self.labels = []
+            for i, (text, value_list) in enumerate(self.menu_items):
+                # Display the button text and its current value if applicable
+                display_text = f"{text}: {value_list[self.value_indices[i]]}" if value_list else text
+                self.labels.append(render_text(self.app.font24, display_text, True, (0, 0, 0)))  # Black text
+        return self.labels
+
+    def draw(self, display):
         # Only draw if the menu is open or currently moving
         if self.is_open or self.current_position < self.app.DISPLAY_WIDTH:
-            # Draw menu background with SRCALPHA
-            menu_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-            menu_surface.fill((50, 50, 50, 127))  # Semi-transparent grey
-            display.blit(menu_surface, self.rect.topleft)
+            # Draw menu background, the semi-transparent surfaces are built once by the overlay cache
+            display.blit(overlay_cache.panel(self.width, self.height, (50, 50, 50, 127)), self.rect.topleft)
 
             # Draw buttons
-            for i, (text, value_list) in enumerate(self.menu_items):
+            button_plate = overlay_cache.panel(self.width - 20, self.button_height, self.button_color)
+            hover_plate = overlay_cache.panel(self.width - 20, self.button_height, self.hover_color)
+            for i, label in enumerate(self._get_labels()):
                 button_rect = pygame.Rect(self.rect.x + 10, self.rect.y + 10 + i * (self.button_height + 5),
                                           self.width - 20, self.button_height)
 
                 # Change color if hovered or selected
-                button_color = self.hover_color if i == self.scroll_index else self.button_color
-                button_surface = pygame.Surface((button_rect.width, button_rect.height), pygame.SRCALPHA)
-                button_surface.fill(button_color)
-                display.blit(button_surface, button_rect.topleft)
-
-                # Display the button text and its current value if applicable
-                display_text = f"{text}: {self.menu_items[i][1][self.value_indices[i]]}" if value_list else text
-                label = self.app.font24.render(display_text, True, (0, 0, 0))  # Black text
-                label_rect = label.get_rect(center=button_rect.center)
-                display.blit(label, label_rect)  # Draw the button text
+                display.blit(hover_plate if i == self.scroll_index else button_plate, button_rect.topleft)
+                display.blit(label, label.get_rect(center=button_rect.center))  # Draw the button text
 
             # Draw the single step indicator at the bottom of the menu
             if self.menu_items[self.scroll_index][1]:  # Only draw if the selected item has values
                 indicator_y = self.rect.y + 10 + len(self.menu_items) * (
                         self.button_height + 5) + 40  # Position below buttons
-                indicator_radius = 4
-                selected_radius = 6
                 step_spacing = 16  # Fixed spacing between points
+                point = overlay_cache.dot(4, (50, 50, 50))
+                selected_point = overlay_cache.dot(6, (0, 255, 0))
 
                 # Calculate the total width of the indicator area based on number of points
                 total_width = (len(self.menu_items[self.scroll_index][1]) - 1) * step_spacing
@@ -119,12 +129,11 @@ class SettingsMenu:
 
                 # Draw each point in the indicator
                 for j in range(len(self.menu_items[self.scroll_index][1])):
-                    point_color = (0, 255, 0) if j == self.value_indices[self.scroll_index] else (50, 50, 50)
-                    radius = selected_radius if j == self.value_indices[self.scroll_index] else indicator_radius
+                    dot = selected_point if j == self.value_indices[self.scroll_index] else point
 
                     # Calculate the position of each point
                     adjusted_position_x = indicator_x_start + j * step_spacing
-                    pygame.draw.circle(display, point_color, (adjusted_position_x, indicator_y), radius)
+                    display.blit(dot, dot.get_rect(center=(adjusted_position_x, indicator_y)))
 
     def handle_event(self, event):
         if self.is_open:
@@ -154,6 +163,12 @@ class SettingsMenu:
         # Recalculate the menu position based on the new display width
         self.target_position_x = self.app.DISPLAY_WIDTH - self.width
         self.height = self.app.DISPLAY_HEIGHT
+        self.rect.height = self.height
+        # Surfaces baked for the previous display are not needed anymore
+        overlay_cache.clear()
+        assets.reload()
+        background_service.set_target_size((self.app.DISPLAY_WIDTH, self.app.DISPLAY_HEIGHT))
+        dirty_rects.invalidate()
 
     def is_active(self):
         return self.is_open  # Return the active state of the menu
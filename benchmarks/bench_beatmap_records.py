@@ -0,0 +1,81 @@
+"""
+Compare the memory and time cost of holding every difficulty in memory, between the eager BeatMap layout
+(one instance __dict__ with seven resolved fields) and the lazy __slots__ records returned by BeatmapLoader.
+
+Run from the repository root:
+    python -m benchmarks.bench_beatmap_records [difficulty_count]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.beatmap_manager.BeatMapLoader import BeatmapLoader
+
+
+class EagerBeatMap:
+    """The BeatMap layout before the lazy records, kept here as the baseline."""
+
+    def __init__(self, beatmap_name, difficulty_name, song_path, bg_path, preview_time, creator, artist):
+        self.beatmap_name = beatmap_name
+        self.difficulty_name = difficulty_name
+        self.song_path = song_path
+        self.bg_path = bg_path
+        self.preview_time = preview_time
+        self.creator = creator
+        self.artist = artist
+
+
+def fill_catalog(catalog, difficulty_count, difficulties_per_set=8):
+    with catalog.transaction():
+        for index in range(difficulty_count):
+            beatmap_id = f"{index // difficulties_per_set:06d}"
+            if index % difficulties_per_set == 0:
+                catalog.upsert_set(beatmap_id, f"Song {beatmap_id}", f"{beatmap_id} - Song {beatmap_id}", 0, 0)
+                catalog.update_set_song(beatmap_id, "audio", "mp3", "12.500", f"Artist {index % 997}")
+            catalog.upsert_difficulty(beatmap_id, f"Difficulty {index % difficulties_per_set}", "bg", "jpg",
+                                      "12.500", f"Creator {index % 131}", 0, 0)
+
+
+def load_eager(loader, parent_folder):
+    beatmaps = []
+    for row in loader.catalog.iter_difficulties():
+        (beatmap_id, beatmap_name, folder_name, song_name, song_ext, preview_time, artist,
+         difficulty_name, bg_name, bg_ext, creator) = row
+        folder_path = os.path.join(parent_folder, folder_name)
+        beatmaps.append(EagerBeatMap(beatmap_name, difficulty_name, os.path.join(folder_path, f"{song_name}.{song_ext}"),
+                                     os.path.join(folder_path, f"{bg_name}.{bg_ext}"), float(preview_time), creator,
+                                     artist))
+    return beatmaps
+
+
+def load_lazy(loader, parent_folder):
+    return loader.create_beatmap_instances(parent_folder)
+
+
+def measure(name, load, loader, parent_folder):
+    tracemalloc.start()
+    start = time.perf_counter()
+    beatmaps = load(loader, parent_folder)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>6}: {len(beatmaps)} beatmaps in {elapsed * 1000:8.1f} ms, "
+          f"{current / 1024 / 1024:7.2f} MiB held, {peak / 1024 / 1024:7.2f} MiB peak")
+    return beatmaps
+
+
+def main():
+    difficulty_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as folder:
+        loader = BeatmapLoader(os.path.join(folder, "catalog.db"), legacy_database_path=None)
+        fill_catalog(loader.catalog, difficulty_count)
+
+        measure("eager", load_eager, loader, "beatmaps")
+        measure("lazy", load_lazy, loader, "beatmaps")
+        loader.catalog.close()
+
+
+if __name__ == '__main__':
+    main()
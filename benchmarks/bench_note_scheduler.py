@@ -0,0 +1,75 @@
+"""
+Compare the per-frame cost of finding the notes to update and draw, between walking the whole chart and the
+NoteScheduler window, on synthetic charts of a million objects.
+
+Run from the repository root:
+    python -m benchmarks.bench_note_scheduler [object_count]
+"""
+import random
+import sys
+import time
+from array import array
+
+from src.beatmap_manager.HitObjects import HitObjects
+from src.game.NoteScheduler import NoteScheduler
+
+APPROACH_TIME = 1.0
+MISS_WINDOW = 0.2
+FRAME_TIME = 1 / 240
+
+
+def make_chart(object_count, notes_per_second, hold_ratio=0.05, seed=0):
+    """Sorted chart with random gaps, in 4 lanes, a few objects being holds of up to 2 seconds."""
+    generator = random.Random(seed)
+    times, time_ = array('d'), 0.0
+    for _ in range(object_count):
+        time_ += generator.expovariate(notes_per_second)
+        times.append(time_)
+    lanes = array('h', (generator.randrange(4) for _ in range(object_count)))
+    types = array('B', [1]) * object_count
+    durations = array('f', (generator.uniform(0.1, 2.0) if generator.random() < hold_ratio else 0.0
+                            for _ in range(object_count)))
+    return HitObjects(times, lanes, types, durations)
+
+
+def walk_all(hit_objects, now):
+    """The naive frame: test every object of the chart against the window."""
+    start, end = now - MISS_WINDOW, now + APPROACH_TIME
+    times, durations = hit_objects.times, hit_objects.durations
+    return sum(1 for index in range(len(times)) if times[index] <= end and times[index] + durations[index] >= start)
+
+
+def walk_window(scheduler, now):
+    scheduler.update(now)
+    return sum(1 for index in scheduler.visible() if not scheduler.is_over(index))
+
+
+def measure(name, frame, frame_times):
+    costs = []
+    visible = 0
+    for now in frame_times:
+        start = time.perf_counter()
+        visible = max(visible, frame(now))
+        costs.append(time.perf_counter() - start)
+    costs.sort()
+    print(f"{name:>10}: {len(costs)} frames, median {costs[len(costs) // 2] * 1e6:10.1f} us, "
+          f"max {costs[-1] * 1e6:10.1f} us, up to {visible} notes in the window")
+
+
+def main():
+    object_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for notes_per_second in (20, 200):
+        hit_objects = make_chart(object_count, notes_per_second)
+        duration = hit_objects.times[-1]
+        print(f"{object_count} objects, {notes_per_second} notes/s, {duration / 60:.1f} min chart")
+
+        # The naive walk is only measured on a few frames spread over the chart, it is far too slow to play
+        measure("walk all", lambda now: walk_all(hit_objects, now), [duration * i / 8 for i in range(8)])
+
+        scheduler = NoteScheduler(hit_objects, APPROACH_TIME, MISS_WINDOW)
+        frame_times = [duration / 2 + i * FRAME_TIME for i in range(2400)]  # Ten seconds of frames at 240 FPS
+        measure("scheduler", lambda now: walk_window(scheduler, now), frame_times)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Count the surfaces allocated and the time spent per frame by SettingsMenu while it slides open and stays open.
+
+Run from the repository root:
+    python -m benchmarks.bench_settings_menu [frame_count]
+"""
+import os
+import sys
+import time
+import types
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from SettingsMenu import SettingsMenu
+
+
+class CountingSurface(pygame.Surface):
+    created = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingSurface.created += 1
+
+
+def make_app(display):
+    options = {"display_width_options": [800, 1280, 1920, 2560], "display_height_options": [600, 720, 1080, 1440],
+               "max_fps_options": [30, 60, 120, 240]}
+    app = types.SimpleNamespace(DISPLAY_WIDTH=1280, DISPLAY_HEIGHT=720, MAX_FPS=240, display=display,
+                                clock=pygame.time.Clock(), font24=pygame.font.Font('assets/fonts/Mouldy.ttf', 24))
+    app.config = types.SimpleNamespace(get_options=options.get, set_parameter=lambda key, value: None,
+                                       subscribe=lambda keys, callback: None)
+    return app
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    pygame.init()
+    display = pygame.display.set_mode((1280, 720))
+    app = make_app(display)
+    menu = SettingsMenu(app)
+    menu.toggle(True)
+
+    pygame.Surface = CountingSurface
+    frame_times = []
+    for _ in range(frame_count):
+        app.clock.tick()
+        start = time.perf_counter()
+        if hasattr(menu, "update"):
+            menu.update(1 / 240)
+        menu.draw(display)
+        frame_times.append(time.perf_counter() - start)
+
+    frame_times.sort()
+    print(f"{frame_count} frames: {CountingSurface.created / frame_count:.2f} surfaces allocated per frame, "
+          f"median {frame_times[len(frame_times) // 2] * 1000:.3f} ms, "
+          f"p99 {frame_times[int(len(frame_times) * 0.99)] * 1000:.3f} ms")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+"""
+Headless benchmark suite: loader, beatmap explorer, main menu and settings menu, on a synthetic beatmaps tree.
+
+Every case reports per-frame (or per-run) percentiles, then runs again under tracemalloc to report the bytes allocated
+and the pygame surfaces created per frame. Results are saved as JSON, and a previous result file can be given to flag
+the cases that got slower.
+
+Run from the repository root:
+    python -m benchmarks.suite [--sets 500] [--difficulties 4] [--objects 200] [--frames 300] [--repeat 5]
+                               [--cases loader,explorer_search,...] [--output results.json]
+                               [--compare baseline.json] [--threshold 1.2]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from SettingsMenu import SettingsMenu
+from benchmarks.bench_settings_menu import CountingSurface
+from src.beatmap_manager.BeatMapExplorer import BeatMapExplorer
+from src.beatmap_manager.BeatMapLoader import BeatmapLoader
+from src.scene.MainScene import MainScreen
+
+FONT_PATH = 'assets/fonts/Mouldy.ttf'
+WORDS = ("star", "night", "flap", "bridge", "pump", "felis", "granat", "usagi", "neon", "drive", "blue", "echo",
+         "storm", "heart", "pixel", "rain")
+DIFFICULTIES = ("Easy", "Normal", "Hard", "Insane", "Expert", "Extra", "Another", "Beyond")
+
+
+# [SYNTHETIC DATA]
+def song_name(generator):
+    return " ".join(generator.choice(WORDS).capitalize() for _ in range(generator.randint(1, 3)))
+
+
+def generate_tree(parent_folder, set_count, difficulties_per_set, objects_per_difficulty, seed=0):
+    """Write set_count "<id> - <name>" folders of difficulty files, in the format the loader reads."""
+    generator = random.Random(seed)
+    os.makedirs(parent_folder, exist_ok=True)
+    for set_index in range(set_count):
+        beatmap_id = f"{set_index:06d}"
+        name = song_name(generator)
+        artist = f"{generator.choice(WORDS).capitalize()} {set_index % 97}"
+        folder_path = os.path.join(parent_folder, f"{beatmap_id} - {name}")
+        os.makedirs(folder_path, exist_ok=True)
+        for difficulty in DIFFICULTIES[:difficulties_per_set]:
+            lines = ["[METADATA]", f"CREATOR: mapper{generator.randrange(200)}", f"ARTIST: {artist}",
+                     "SONG_NAME: audio", "SONG_EXTENSION: mp3", "BG_NAME: bg", "BG_EXTENSION: jpg",
+                     f"PREVIEW_TIME: {generator.uniform(0, 60):.3f}", "", "[OBJECTS]"]
+            time_ = 1.0
+            for _ in range(objects_per_difficulty):
+                time_ += generator.choice((0.125, 0.25, 0.5))
+                lines.append(f"{time_:.3f},{generator.randrange(4)},1")
+            with open(os.path.join(folder_path, f"{difficulty}.txt"), 'w') as txt_file:
+                txt_file.write("\n".join(lines) + "\n")
+
+
+def generate_database_json(path, parent_folder):
+    """Write the legacy database.json describing a generated tree, as older versions of the game did."""
+    database = {}
+    for folder_name in sorted(os.listdir(parent_folder)):
+        beatmap_id, beatmap_name = folder_name.split(" - ", 1)
+        difficulties = {}
+        for file_name in sorted(os.listdir(os.path.join(parent_folder, folder_name))):
+            difficulties[file_name[:-4]] = {"bg_name": "bg", "bg_ext": "jpg", "preview_time": "0.000",
+                                            "creator": "mapper"}
+        database[beatmap_id] = {"beatmap_name": beatmap_name, "song_name": "audio", "song_ext": "mp3",
+                                "preview_time": "0.000", "artist": "Artist", "difficulties": difficulties}
+    with open(path, 'w') as json_file:
+        json.dump(database, json_file)
+
+
+def make_app(display, loader, beatmaps):
+    """The part of App the measured components use, without the music, cursor and scene switching."""
+    options = {"display_width_options": [800, 1280, 1920, 2560], "display_height_options": [600, 720, 1080, 1440],
+               "max_fps_options": [30, 60, 120, 240]}
+    app = types.SimpleNamespace(DISPLAY_WIDTH=display.get_width(), DISPLAY_HEIGHT=display.get_height(), MAX_FPS=240,
+                                display=display, clock=pygame.time.Clock(), beatmap_loader=loader, beatmaps=beatmaps,
+                                beatmap_selected=beatmaps[0], switch_scene=lambda scene: None, quit=lambda: None)
+    for size in (16, 24, 32, 48, 64, 80, 96):
+        setattr(app, f"font{size}", pygame.font.Font(FONT_PATH, size))
+    app.config = types.SimpleNamespace(get_options=options.get, set_parameter=lambda key, value: None,
+                                       subscribe=lambda keys, callback: None)
+    app.music_player = types.SimpleNamespace(request_preview=lambda path, start_time=0.0: None)
+    app.settings_menu = SettingsMenu(app)
+    return app
+
+
+# [MEASUREMENT]
+def summarize(samples):
+    """Percentiles of a list of durations in seconds, in milliseconds."""
+    ordered = sorted(samples)
+
+    def percentile(ratio):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))] * 1000
+
+    return {"count": len(ordered), "mean_ms": sum(ordered) / len(ordered) * 1000, "p50_ms": percentile(0.5),
+            "p90_ms": percentile(0.9), "p99_ms": percentile(0.99), "max_ms": ordered[-1] * 1000}
+
+
+def measure_frames(frame, frame_count, allocation_frames=100):
+    """
+    Time frame(i) for frame_count frames, then run allocation_frames more under tracemalloc, counting the bytes
+    allocated (peak above the starting point) and the pygame surfaces created per frame.
+    """
+    samples = []
+    for index in range(frame_count):
+        start = time.perf_counter()
+        frame(index)
+        samples.append(time.perf_counter() - start)
+    result = summarize(samples)
+
+    original_surface = pygame.Surface
+    pygame.Surface = CountingSurface
+    CountingSurface.created = 0
+    tracemalloc.start()
+    allocated = 0
+    try:
+        for index in range(frame_count, frame_count + allocation_frames):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            frame(index)
+            allocated += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+        pygame.Surface = original_surface
+    result["alloc_bytes_per_frame"] = allocated / allocation_frames
+    result["surfaces_per_frame"] = CountingSurface.created / allocation_frames
+    return result
+
+
+def measure_runs(run, repeat):
+    """Time repeat calls of run(), then measure the peak allocations of one more call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    result = summarize(samples)
+
+    tracemalloc.start()
+    run()
+    result["alloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+# [CASES]
+def bench_loader(context):
+    """Cold import from database.json, cold scan into an empty catalog, and warm incremental scan."""
+    folder, tree = context.folder, context.tree
+    results = {}
+
+    def cold(json_path):
+        database_path = os.path.join(folder, "cold.db")
+        if os.path.exists(database_path):
+            os.remove(database_path)
+        with contextlib.redirect_stdout(io.StringIO()):  # The loader reports every beatmap it adds
+            loader = BeatmapLoader(database_path, json_path)
+            loader.load_beatmaps(tree)
+        loader.catalog.close()
+
+    results["loader_cold_json"] = measure_runs(lambda: cold(context.json_path), context.repeat)
+    results["loader_cold"] = measure_runs(lambda: cold(None), context.repeat)
+    results["loader_warm"] = measure_runs(lambda: context.loader.load_beatmaps(tree), context.repeat)
+    return results
+
+
+def bench_explorer_search(context):
+    """One frame per keystroke, typing queries and erasing them."""
+    explorer = BeatMapExplorer(context.app, lambda beatmap: None)
+    generator = random.Random(1)
+    queries = [" ".join(generator.sample(WORDS, 2)) for _ in range(8)] + ["artist=neon hard", "creator=mapper1"]
+    keystrokes = []
+    for query in queries:
+        keystrokes += list(query) + [None] * len(query)  # None is a backspace
+
+    def frame(index):
+        key = keystrokes[index % len(keystrokes)]
+        if key is None:
+            explorer._handle_search_backspace()
+        else:
+            explorer._add_search_char(key)
+        explorer.update(1 / 240)
+        explorer.draw(context.display)
+
+    return {"explorer_search": measure_frames(frame, context.frames)}
+
+
+def bench_explorer_scroll(context):
+    """Frames of a carousel moving down every few frames and sometimes jumping at random."""
+    explorer = BeatMapExplorer(context.app, lambda beatmap: None)
+    explorer.select_first_beatmap()
+
+    def frame(index):
+        if index % 4 == 0:
+            explorer.next_beatmap()
+        if index % 97 == 0:
+            explorer.select_random_beatmap()
+        explorer.update(1 / 240)
+        explorer.draw(context.display)
+
+    return {"explorer_scroll": measure_frames(frame, context.frames)}
+
+
+def bench_main_menu(context):
+    """MainScreen (its InteractiveButtonMenu) frames."""
+    main_screen = MainScreen(context.app)
+
+    def frame(index):
+        main_screen.update(1 / 240)
+        context.display.fill((0, 0, 0))
+        main_screen.draw(context.display)
+
+    return {"main_menu": measure_frames(frame, context.frames)}
+
+
+def bench_settings_menu(context):
+    """SettingsMenu frames while it slides open and stays open."""
+    menu = SettingsMenu(context.app)
+    menu.toggle(True)
+
+    def frame(index):
+        menu.update(1 / 240)
+        menu.draw(context.display)
+
+    return {"settings_menu": measure_frames(frame, context.frames)}
+
+
+CASES = {
+    "loader": bench_loader,
+    "explorer_search": bench_explorer_search,
+    "explorer_scroll": bench_explorer_scroll,
+    "main_menu": bench_main_menu,
+    "settings_menu": bench_settings_menu,
+}
+
+
+def compare(results, baseline_path, threshold):
+    """Print the cases whose p50 or p99 grew by more than threshold times. Returns the number of regressions."""
+    with open(baseline_path, 'r') as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    regressions = 0
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            before, after = baseline[name][key], result[key]
+            if before > 0 and after / before > threshold:
+                regressions += 1
+                print(f"REGRESSION {name} {key}: {before:.3f} -> {after:.3f} ms ({after / before:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the headless benchmark suite.")
+    parser.add_argument("--sets", type=int, default=500)
+    parser.add_argument("--difficulties", type=int, default=4, help="difficulties per set, at most 8")
+    parser.add_argument("--objects", type=int, default=200, help="hit objects per difficulty")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5, help="runs of the loader cases")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma separated cases to run")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous result file to compare with")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    arguments = parser.parse_args()
+
+    pygame.init()
+    display = pygame.display.set_mode((1280, 720))
+    folder = tempfile.mkdtemp(prefix="rythmosphere-bench-")
+    try:
+        tree = os.path.join(folder, "beatmaps")
+        start = time.perf_counter()
+        generate_tree(tree, arguments.sets, min(arguments.difficulties, len(DIFFICULTIES)), arguments.objects)
+        json_path = os.path.join(folder, "database.json")
+        generate_database_json(json_path, tree)
+        print(f"Generated {arguments.sets} sets in {time.perf_counter() - start:.2f} s.")
+
+        loader = BeatmapLoader(os.path.join(folder, "database.db"), None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            beatmaps = loader.load_beatmaps(tree)
+        context = types.SimpleNamespace(folder=folder, tree=tree, json_path=json_path, loader=loader,
+                                        display=display, app=make_app(display, loader, beatmaps),
+                                        frames=arguments.frames, repeat=arguments.repeat)
+
+        results = {}
+        for case in arguments.cases.split(","):
+            results.update(CASES[case.strip()](context))
+        loader.catalog.close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+        pygame.quit()
+
+    for name, result in results.items():
+        allocations = (f"{result['alloc_bytes_per_frame'] / 1024:8.1f} KiB/frame, "
+                       f"{result['surfaces_per_frame']:5.2f} surfaces/frame" if "alloc_bytes_per_frame" in result
+                       else f"{result['alloc_peak_bytes'] / 1024 / 1024:8.2f} MiB peak")
+        print(f"{name:>18}: p50 {result['p50_ms']:9.3f} ms, p99 {result['p99_ms']:9.3f} ms, "
+              f"max {result['max_ms']:9.3f} ms, {allocations}")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "parameters": vars(arguments),
+        "results": results,
+    }
+    with open(arguments.output, 'w') as output_file:
+        json.dump(report, output_file, indent=4)
+    print(f"Saved to '{arguments.output}'.")
+
+    if arguments.compare and compare(results, arguments.compare, arguments.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
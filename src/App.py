@@ -1,6 +1,9 @@
-import pygame
+import time
+from concurrent.futures import ThreadPoolExecutor
 from random import choice
 
+import pygame
+
 from GameConfig import GameConfig
 from SettingsMenu import SettingsMenu
 from src.beatmap_manager.BeatMapLoader import BeatmapLoader
@@ -8,13 +11,29 @@ from src.beatmap_manager.MusicPlayer import MusicPlayer
 from src.scene.BeatMapEditorScene import BeatMapEditorScreen
 from src.scene.BeatMapSelectionScene import BeatMapSelectionScreen
 from src.scene.GameScene import GameScene
+from src.scene.LoadingScene import LoadingScreen
 from src.scene.MainScene import MainScreen
+from src.scene.Scene import SceneUnavailable
+from src.ui.assets import assets
+from src.ui.background import background_service
 from src.ui.cursor import Cursor
+from src.ui.dirty import dirty_rects
 from src.ui.label import Label
+from src.ui.pacing import ANIMATION, frame_pacer
+from src.ui.profiler import DISPLAY, DRAW, EVENTS, MUSIC, SCENE_DRAW, SCENE_UPDATE, UPDATE, profiler
+from src.ui.text_cache import text_cache
 
 
 class App:
+    # Scenes are built the first time they are switched to
+    SCENES = {"loading": LoadingScreen, "main": MainScreen, "selection": BeatMapSelectionScreen,
+              "editor": BeatMapEditorScreen, "game": GameScene}
+
     def __init__(self):
+        # Startup phases, in seconds since the start, printed once the library is ready
+        self.startup_start = time.perf_counter()
+        self.startup_phases = []
+
         # Load configuration
         self.config = GameConfig('config.yml')  # Path to your YAML config file
 
@@ -22,40 +41,62 @@ class App:
         self.DISPLAY_WIDTH = self.config.get_parameter('game.display.width')
         self.DISPLAY_HEIGHT = self.config.get_parameter('game.display.height')
         self.MAX_FPS = self.config.get_parameter('game.max_fps')
+        # Opt-in: only redraw and present the regions that changed on scenes supporting it
+        dirty_rects.enabled = bool(self.config.get_parameter('game.display.dirty_rects'))
         self.CAPTION = f"{self.config.get_parameter('game.name')} - {self.config.get_parameter('game.version')}"
+        text_cache_mb = self.config.get_parameter('game.text_cache_mb')
+        if text_cache_mb is not None:  # Else the default budget of the cache
+            text_cache.set_budget(text_cache_mb * 1024 * 1024)
+        background_cache_mb = self.config.get_parameter('game.background_cache_mb')
+        if background_cache_mb is not None:
+            background_service.max_bytes = background_cache_mb * 1024 * 1024
+        background_service.set_target_size((self.DISPLAY_WIDTH, self.DISPLAY_HEIGHT))
 
         self.settings_menu = SettingsMenu(self)
+        self.mark_startup("config")
 
         # Pygame setup
         self.running = True
         self.display = pygame.display.set_mode((self.DISPLAY_WIDTH, self.DISPLAY_HEIGHT), pygame.DOUBLEBUF)
         pygame.display.set_caption(self.CAPTION)
         self.clock = pygame.time.Clock()
+        self.mark_startup("display")
+
+        # Fonts, the file is read once for every size
+        self.font96 = assets.font('assets/fonts/Mouldy.ttf', 96).value
+        self.font80 = assets.font('assets/fonts/Mouldy.ttf', 80).value
+        self.font64 = assets.font('assets/fonts/Mouldy.ttf', 64).value
+        self.font48 = assets.font('assets/fonts/Mouldy.ttf', 48).value
+        self.font32 = assets.font('assets/fonts/Mouldy.ttf', 32).value
+        self.font24 = assets.font('assets/fonts/Mouldy.ttf', 24).value
+        self.font16 = assets.font('assets/fonts/Mouldy.ttf', 16).value
+        self.mark_startup("fonts")
 
-        # Fonts
-        self.font96 = pygame.font.Font('assets/fonts/Mouldy.ttf', 96)
-        self.font80 = pygame.font.Font('assets/fonts/Mouldy.ttf', 80)
-        self.font64 = pygame.font.Font('assets/fonts/Mouldy.ttf', 64)
-        self.font48 = pygame.font.Font('assets/fonts/Mouldy.ttf', 48)
-        self.font32 = pygame.font.Font('assets/fonts/Mouldy.ttf', 32)
-        self.font24 = pygame.font.Font('assets/fonts/Mouldy.ttf', 24)
-        self.font16 = pygame.font.Font('assets/fonts/Mouldy.ttf', 16)
-
-        # Beatmaps
-        self.beatmap_loader = BeatmapLoader()
-        self.beatmaps = self.beatmap_loader.load_beatmaps("beatmaps/")
-        self.beatmap_selected = choice(self.beatmaps)
         self.music_player = MusicPlayer(self)
-        self.music_player.load_music()
-        self.music_player.play()
+        self.music_player.audio_offset = (self.config.get_parameter('game.audio_offset_ms') or 0) / 1000
+        self.mark_startup("audio")
 
-        # Scenes
-        self.main_scene = MainScreen(self)
-        self.beatmap_selection_scene = BeatMapSelectionScreen(self)
-        self.beatmap_editor_scene = BeatMapEditorScreen(self)
-        self.game_scene = GameScene(self)
+        # Parameters applied as soon as they change, in the settings menu or in config.yml
+        self.config.subscribe(('game.display.width', 'game.display.height'), self.apply_display_size)
+        self.config.subscribe('game.max_fps', self.apply_max_fps)
+        self.config.subscribe('game.display.dirty_rects', self.apply_dirty_rects)
+        self.config.subscribe('game.audio_offset_ms', self.apply_audio_offset)
+        self.config.watch()
 
-        self.current_scene = MainScreen(self)
+        # Beatmaps, scanned on a worker thread while the loading screen is shown
+        self.beatmap_loader = None
+        self.beatmaps = []
+        self.beatmap_selected = None
+        self.import_progress = (0, 0)  # (done, total) difficulty files parsed, written by the worker
+        self.startup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="startup")
+        self.library_future = self.startup_executor.submit(self.load_library, "beatmaps/")
+        self.loading_error = None  # Exception of the library worker, shown by the loading screen
+
+        # Scenes
+        self.scenes = {}
+        self.current_scene = self.get_scene("loading")
+        self.next_scene = "main"  # Scene shown once the library is ready
+        self.first_frame_drawn = False
 
         # Labels
         info_color = (127, 127, 127)
@@ -68,55 +109,174 @@ class App:
         pygame.mouse.set_visible(False)
         self.menu_cursor = Cursor("assets/textures/menu-cursor.png", scale=0.1, offset_x=-4, offset_y=-2)
 
+    def apply_display_size(self, changes):
+        self.DISPLAY_WIDTH = self.config.get_parameter('game.display.width')
+        self.DISPLAY_HEIGHT = self.config.get_parameter('game.display.height')
+        self.display = pygame.display.set_mode((self.DISPLAY_WIDTH, self.DISPLAY_HEIGHT), pygame.DOUBLEBUF)
+        self.settings_menu.update_menu_position()
+
+    def apply_max_fps(self, changes):
+        self.MAX_FPS = changes['game.max_fps']
+
+    def apply_dirty_rects(self, changes):
+        dirty_rects.enabled = bool(changes['game.display.dirty_rects'])
+        dirty_rects.invalidate()
+
+    def apply_audio_offset(self, changes):
+        self.music_player.audio_offset = changes['game.audio_offset_ms'] / 1000
+
+    def mark_startup(self, phase):
+        self.startup_phases.append((phase, time.perf_counter() - self.startup_start))
+
+    def load_library(self, parent_folder):
+        """
+        Worker side of the startup: open the catalog, synchronise it with the beatmaps folder and list the beatmaps.
+        The main thread does not touch the loader before this returned.
+        """
+        beatmap_loader = BeatmapLoader()
+        beatmaps = beatmap_loader.load_beatmaps(parent_folder, progress_callback=self.set_import_progress)
+        return beatmap_loader, beatmaps
+
+    def set_import_progress(self, done, total):
+        self.import_progress = (done, total)
+
+    def finish_loading(self):
+        """Take the scanned library, start the menu music and leave the loading screen."""
+        try:
+            self.beatmap_loader, self.beatmaps = self.library_future.result()
+        except Exception as e:
+            # The scenes need the library, so the app stays on the loading screen, which shows the error
+            self.loading_error = e
+            self.startup_executor.shutdown(wait=False)
+            print(f"Could not load the beatmaps: {e!r}")
+            return
+        self.library_future = None
+        self.startup_executor.shutdown(wait=False)
+        self.mark_startup("library")
+
+        self.beatmap_selected = choice(self.beatmaps) if self.beatmaps else None
+        if self.beatmap_selected is not None:
+            # Read and started on the music worker, the fade in begins once it plays
+            self.music_player.request_preview(self.beatmap_selected.song_path)
+        self.switch_scene(self.next_scene)
+        self.mark_startup(f"{self.next_scene} scene")
+        print("Startup: " + ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.startup_phases))
+
+    def get_scene(self, name):
+        scene = self.scenes.get(name)
+        if scene is None:
+            if name not in self.SCENES:
+                raise ValueError(f"Scene {name} does not exist.")
+            scene = self.scenes[name] = self.SCENES[name](self)
+        return scene
+
     def run(self):
         while self.running:
-            # Global update
-            self.clock.tick(self.MAX_FPS)
-            dt = self.clock.get_time() / 1000.0
+            profiler.begin_frame(self.current_scene.name)
+            # Global update, after waiting as long as nothing needs to be drawn
+            dt = frame_pacer.tick(self.clock, self.MAX_FPS)
+            profiler.begin(UPDATE)
             self.update(dt)
+            profiler.end(UPDATE)
 
             # Global render
-            self.display.fill((0, 0, 0))
-            self.draw(self.display)
-            pygame.display.update()
+            dirty = dirty_rects.collect(self.display.get_rect()) if dirty_rects.enabled else None
+            if dirty is None or not self.current_scene.supports_dirty_rects:
+                profiler.begin(DRAW)
+                self.display.fill((0, 0, 0))
+                self.draw(self.display)
+                profiler.end(DRAW)
+                profiler.begin(DISPLAY)
+                pygame.display.update()
+                profiler.end(DISPLAY)
+            elif dirty:
+                self.draw_regions(self.display, dirty)
+            if not self.first_frame_drawn:
+                self.first_frame_drawn = True
+                self.mark_startup("first frame")
 
             # Global events
-            for event in pygame.event.get():
+            profiler.begin(EVENTS)
+            events = frame_pacer.take_events() + pygame.event.get()
+            if events:
+                frame_pacer.request(ANIMATION)  # Show the reaction to an input without waiting
+            for event in events:
                 self.handle_event(event)
+            profiler.end(EVENTS)
+            profiler.end_frame()
+        for scene in self.scenes.values():
+            scene.close()
+        self.config.flush()
+
+    def draw_regions(self, display, rects):
+        """Redraw the given regions of the display, and present only them."""
+        profiler.begin(DRAW)
+        # Each clip is filled before drawing, so translucent widgets do not blend twice
+        for clip in dirty_rects.passes(rects):
+            display.set_clip(clip)
+            display.fill((0, 0, 0))
+            self.draw(display)
+        display.set_clip(None)
+        profiler.end(DRAW)
+        profiler.begin(DISPLAY)
+        pygame.display.update(rects)
+        profiler.end(DISPLAY)
 
     def draw(self, display):
+        profiler.begin(SCENE_DRAW)
         self.current_scene.draw(display)
+        profiler.end(SCENE_DRAW)
         for label in self.labels:
             label.draw(display)
 
         self.settings_menu.draw(display)
+        profiler.draw(display, self.font16)
         self.menu_cursor.draw(display)
 
     def update(self, dt):
+        self.config.update()
+        # The loading screen is presented at least once, so the first frame never waits for the library
+        if (self.library_future is not None and self.loading_error is None and self.first_frame_drawn
+                and self.library_future.done()):
+            self.finish_loading()
+        profiler.begin(MUSIC)
         self.music_player.update(dt)
+        profiler.end(MUSIC)
+        background_service.update()
         mouse_x, mouse_y = pygame.mouse.get_pos()
 
+        profiler.begin(SCENE_UPDATE)
         self.current_scene.update(dt)
+        profiler.end(SCENE_UPDATE)
+        profiler.track()
+        self.settings_menu.update(dt)
         self.scene_label.update(f"Scene: {self.current_scene.name}")
-        self.fps_label.update(f"FPS: {int(min(self.clock.get_fps(), self.MAX_FPS))}/{self.MAX_FPS}")
+        self.fps_label.update(f"FPS: {int(min(self.clock.get_fps(), self.MAX_FPS))}/{self.MAX_FPS} "
+                              f"({frame_pacer.describe()})")
         self.beatmap_label.update(
             f"Beatmap: {self.beatmap_selected.beatmap_name}" if self.beatmap_selected else "Beatmap: No")
 
-        self.menu_cursor.update(mouse_x, mouse_y)
         if pygame.mouse.get_focused():
             self.menu_cursor.set_show(True)
         else:
             self.menu_cursor.set_show(False)
+        self.menu_cursor.update(mouse_x, mouse_y)
 
     def handle_event(self, event):
         if event.type == pygame.QUIT:
             self.quit()
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED):
+            dirty_rects.invalidate()
 
         # Check for the key combination (LCTRL + o) to toggle settings menu
         if event.type == pygame.KEYDOWN:
             keys = pygame.key.get_pressed()
             if event.key == pygame.K_o and keys[pygame.K_LCTRL]:
                 self.settings_menu.toggle()
+            elif event.key == pygame.K_p and keys[pygame.K_LCTRL]:
+                profiler.toggle()
+            elif event.key == pygame.K_t and keys[pygame.K_LCTRL]:
+                print(f"Frame trace saved to '{profiler.dump_trace()}'.")
             elif event.key == pygame.K_ESCAPE:
                 self.settings_menu.toggle(False)
 
@@ -131,15 +291,17 @@ class App:
         self.running = False
 
     def switch_scene(self, scene: str):
-        match scene:
-            case self.main_scene.name:
-                self.current_scene = self.main_scene
-            case self.beatmap_selection_scene.name:
-                self.current_scene = self.beatmap_selection_scene
-            case self.beatmap_editor_scene.name:
-                self.current_scene = self.beatmap_editor_scene
-            case self.game_scene.name:
-                self.current_scene = self.game_scene
-            case _:
+        if self.library_future is not None and scene != "loading":
+            # The scenes need the library, the switch happens once it is loaded
+            if scene not in self.SCENES:
                 raise ValueError(f"Scene {scene} does not exist.")
-        self.current_scene.reset()
+            self.next_scene = scene
+            return
+        self.current_scene = self.get_scene(scene)
+        dirty_rects.invalidate()
+        try:
+            self.current_scene.reset()
+        except SceneUnavailable as e:
+            print(e)
+            self.current_scene = self.get_scene("selection")
+            self.current_scene.reset()
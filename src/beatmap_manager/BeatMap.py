@@ -1,16 +1,62 @@
 class BeatMap:
-    def __init__(self, beatmap_name, difficulty_name, song_path, bg_path, preview_time, creator, artist):
+    """
+    Catalog key of a difficulty.
+    Only the key is stored, the paths and metadata are read from the catalog the first time one of them is accessed.
+    """
+    __slots__ = ("loader", "beatmap_id", "difficulty_name", "_record")
 
-        # [NAME]
-        self.beatmap_name: str = beatmap_name
+    def __init__(self, loader, beatmap_id, difficulty_name):
+
+        # [KEY]
+        self.loader = loader
+        self.beatmap_id: str = beatmap_id
         self.difficulty_name: str = difficulty_name
 
-        # [FILES]
-        self.song_path: str = song_path
-        self.bg_path: str = bg_path
-        self.preview_time: float = preview_time
+        # (beatmap_name, song_path, bg_path, preview_time, creator, artist, txt_path), resolved on demand
+        self._record = None
+
+    def _resolve(self):
+        if self._record is None:
+            self._record = self.loader.resolve_beatmap(self.beatmap_id, self.difficulty_name)
+        return self._record
+
+    # [NAME]
+    @property
+    def beatmap_name(self) -> str:
+        return self._resolve()[0]
+
+    # [FILES]
+    @property
+    def song_path(self) -> str:
+        return self._resolve()[1]
+
+    @property
+    def bg_path(self) -> str:
+        return self._resolve()[2]
+
+    @property
+    def txt_path(self) -> str:
+        return self._resolve()[6]
+
+    @property
+    def preview_time(self) -> float:
+        return self._resolve()[3]
+
+    # [METADATA]
+    @property
+    def creator(self) -> str:
+        return self._resolve()[4]
+
+    @property
+    def artist(self) -> str:
+        return self._resolve()[5]
+
+    def __eq__(self, other):
+        return (isinstance(other, BeatMap) and self.beatmap_id == other.beatmap_id
+                and self.difficulty_name == other.difficulty_name)
 
-        # [METADATA]
-        self.creator: float = creator
-        self.artist: float = artist
+    def __hash__(self):
+        return hash((self.beatmap_id, self.difficulty_name))
 
+    def __repr__(self):
+        return f"BeatMap({self.beatmap_id!r}, {self.difficulty_name!r})"
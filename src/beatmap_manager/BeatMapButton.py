@@ -1,35 +1,54 @@
+from src.beatmap_manager.ThumbnailCache import THUMBNAIL_SIZE
 from src.ui.button import GraphicButton
+from src.ui.text_cache import render_text
 
 
 class BeatMapButton(GraphicButton):
+    """Carousel card, recycled by the explorer for whichever beatmap is shown at its slot."""
+
     def __init__(self, x, y, width, height, beatmap, font):
         super().__init__(x, y, width, height, color=(127, 64, 160), border_radius=16)
-        self.beatmap = beatmap
+        self.beatmap = None
+        self.position = None  # Position of the bound beatmap in the search result
         self.font = font
         self.offset_x = 0
-        self.scroll_x = 80
-        self.target_offset_x = 0
         self.color = (127, 64, 160)
-        self.initialize_text()
+        self.beatmap_text = self.difficulty_text = self.creator_text = None
+        self.thumbnail = None  # Set by the explorer once loaded, the space stays reserved until then
+        self.bind(beatmap, None)
+
+    def bind(self, beatmap, position):
+        """Show another beatmap on this card, its texts are rendered again on the next draw."""
+        if beatmap is not self.beatmap:
+            self.beatmap = beatmap
+            self.beatmap_text = None
+            self.thumbnail = None
+        self.position = position
 
     def initialize_text(self):
-        self.beatmap_text = self.font.render(self.beatmap.beatmap_name, True, (255, 255, 255))
-        self.difficulty_text = self.font.render(self.beatmap.difficulty_name, True, (255, 255, 255))
-        self.creator_text = self.font.render(self.beatmap.creator, True, (255, 255, 255))
+        self.beatmap_text = render_text(self.font, self.beatmap.beatmap_name, True, (255, 255, 255))
+        self.difficulty_text = render_text(self.font, self.beatmap.difficulty_name, True, (255, 255, 255))
+        self.creator_text = render_text(self.font, self.beatmap.creator, True, (255, 255, 255))
+
+    def get_draw_state(self):
+        return super().get_draw_state() + (self.beatmap, self.thumbnail)
 
     def select(self):
-        self.target_offset_x = self.scroll_x
         self.color = (80, 54, 140)
 
     def unselect(self):
-        self.target_offset_x = 0
         self.color = (127, 64, 160)
 
     def draw(self, display):
         super().draw(display)
+        if self.thumbnail is not None:
+            display.blit(self.thumbnail, (self.x - self.width / 2 + 6, self.y - THUMBNAIL_SIZE[1] / 2))
         self._draw_texts(display)
 
     def _draw_texts(self, display):
-        display.blit(self.beatmap_text, (self.x - self.width / 2 + 4, self.y - self.height / 2 + 6))
-        display.blit(self.difficulty_text, (self.x - self.width / 2 + 4, self.y - self.height / 2 + 30))
-        display.blit(self.creator_text, (self.x - self.width / 2 + 4, self.y - self.height / 2 + 54))
\ No newline at end of file
+        if self.beatmap_text is None:
+            self.initialize_text()
+        text_x = self.x - self.width / 2 + THUMBNAIL_SIZE[0] + 14
+        display.blit(self.beatmap_text, (text_x, self.y - self.height / 2 + 6))
+        display.blit(self.difficulty_text, (text_x, self.y - self.height / 2 + 30))
+        display.blit(self.creator_text, (text_x, self.y - self.height / 2 + 54))
@@ -0,0 +1,187 @@
+import json
+import os
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS beatmap_sets (
+    beatmap_id TEXT PRIMARY KEY,
+    beatmap_name TEXT NOT NULL,
+    folder_name TEXT,
+    song_name TEXT,
+    song_ext TEXT,
+    preview_time TEXT,
+    artist TEXT,
+    folder_mtime INTEGER,
+    folder_size INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS difficulties (
+    beatmap_id TEXT NOT NULL REFERENCES beatmap_sets (beatmap_id) ON DELETE CASCADE,
+    difficulty_name TEXT NOT NULL,
+    bg_name TEXT,
+    bg_ext TEXT,
+    preview_time TEXT,
+    creator TEXT,
+    file_mtime INTEGER,
+    file_size INTEGER,
+    PRIMARY KEY (beatmap_id, difficulty_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_beatmap_sets_name ON beatmap_sets (beatmap_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_beatmap_sets_artist ON beatmap_sets (artist COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_difficulties_name ON difficulties (difficulty_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_difficulties_creator ON difficulties (creator COLLATE NOCASE);
+"""
+
+DIFFICULTY_COLUMNS = """
+    s.beatmap_id, s.beatmap_name, s.folder_name, s.song_name, s.song_ext, s.preview_time, s.artist,
+    d.difficulty_name, d.bg_name, d.bg_ext, d.creator
+"""
+
+
+class BeatmapCatalog:
+    """SQLite storage for the beatmap sets and their difficulties."""
+
+    def __init__(self, database_path="database.db", legacy_database_path="database.json"):
+        self.database_path = database_path
+        is_new = not os.path.exists(database_path)
+
+        # The catalog is opened and scanned on the startup worker, then read from the main thread: it is handed over,
+        # never used from two threads at the same time
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+        if is_new and legacy_database_path and os.path.exists(legacy_database_path):
+            self.migrate_from_json(legacy_database_path)
+
+    def migrate_from_json(self, json_path):
+        """
+        Import the content of the old database.json once.
+        Fingerprints are left empty, so the next scan re-reads the difficulty files and fills them.
+        """
+        with open(json_path, 'r') as db_file:
+            database = json.load(db_file)
+
+        print(f"Migrating {len(database)} beatmaps from '{json_path}' to '{self.database_path}'.")
+        with self.transaction():
+            for beatmap_id, beatmap_info in database.items():
+                self.upsert_set(beatmap_id, beatmap_info.get("beatmap_name", "unknown"), None, None, None)
+                if "song_name" in beatmap_info:
+                    self.update_set_song(beatmap_id, beatmap_info["song_name"], beatmap_info.get("song_ext", "mp3"),
+                                         beatmap_info.get("preview_time", "0.000"),
+                                         beatmap_info.get("artist", "Unknown Artist"))
+                for difficulty_name, details in beatmap_info.get("difficulties", {}).items():
+                    self.upsert_difficulty(beatmap_id, difficulty_name, details.get("bg_name", "background"),
+                                           details.get("bg_ext", "jpg"), details.get("preview_time", "0.000"),
+                                           details.get("creator", "Unknown Creator"), None, None)
+
+    def transaction(self):
+        """Context manager committing the enclosed writes at once, or rolling them back on error."""
+        return self.connection
+
+    def get_sets(self):
+        """Return {beatmap_id: (beatmap_name, folder_name, folder_fingerprint, has_song)} for every set."""
+        rows = self.connection.execute(
+            "SELECT beatmap_id, beatmap_name, folder_name, folder_mtime, folder_size, song_name IS NOT NULL "
+            "FROM beatmap_sets")
+        return {row[0]: (row[1], row[2], [row[3], row[4]], bool(row[5])) for row in rows}
+
+    def get_difficulty_fingerprints(self):
+        """Return {beatmap_id: {difficulty_name: fingerprint}} for every difficulty."""
+        fingerprints = {}
+        rows = self.connection.execute("SELECT beatmap_id, difficulty_name, file_mtime, file_size FROM difficulties")
+        for beatmap_id, difficulty_name, file_mtime, file_size in rows:
+            fingerprints.setdefault(beatmap_id, {})[difficulty_name] = [file_mtime, file_size]
+        return fingerprints
+
+    def upsert_set(self, beatmap_id, beatmap_name, folder_name, folder_mtime, folder_size):
+        self.connection.execute(
+            "INSERT INTO beatmap_sets (beatmap_id, beatmap_name, folder_name, folder_mtime, folder_size) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (beatmap_id) DO UPDATE SET beatmap_name = excluded.beatmap_name, "
+            "folder_name = excluded.folder_name, folder_mtime = excluded.folder_mtime, "
+            "folder_size = excluded.folder_size",
+            (beatmap_id, beatmap_name, folder_name, folder_mtime, folder_size))
+
+    def update_set_song(self, beatmap_id, song_name, song_ext, preview_time, artist):
+        self.connection.execute(
+            "UPDATE beatmap_sets SET song_name = ?, song_ext = ?, preview_time = ?, artist = ? WHERE beatmap_id = ?",
+            (song_name, song_ext, preview_time, artist, beatmap_id))
+
+    def upsert_difficulty(self, beatmap_id, difficulty_name, bg_name, bg_ext, preview_time, creator, file_mtime,
+                          file_size):
+        self.connection.execute(
+            "INSERT INTO difficulties (beatmap_id, difficulty_name, bg_name, bg_ext, preview_time, creator, "
+            "file_mtime, file_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (beatmap_id, difficulty_name) DO UPDATE SET bg_name = excluded.bg_name, "
+            "bg_ext = excluded.bg_ext, preview_time = excluded.preview_time, creator = excluded.creator, "
+            "file_mtime = excluded.file_mtime, file_size = excluded.file_size",
+            (beatmap_id, difficulty_name, bg_name, bg_ext, preview_time, creator, file_mtime, file_size))
+
+    def delete_set(self, beatmap_id):
+        self.connection.execute("DELETE FROM beatmap_sets WHERE beatmap_id = ?", (beatmap_id,))
+
+    def delete_difficulty(self, beatmap_id, difficulty_name):
+        self.connection.execute("DELETE FROM difficulties WHERE beatmap_id = ? AND difficulty_name = ?",
+                                (beatmap_id, difficulty_name))
+
+    def invalidate_difficulty(self, beatmap_id, difficulty_name):
+        """Forget the fingerprints of a difficulty and of its set, so the next scan reads them again."""
+        with self.transaction():
+            self.connection.execute(
+                "UPDATE difficulties SET file_mtime = NULL, file_size = NULL "
+                "WHERE beatmap_id = ? AND difficulty_name = ?", (beatmap_id, difficulty_name))
+            self.connection.execute(
+                "UPDATE beatmap_sets SET folder_mtime = NULL, folder_size = NULL WHERE beatmap_id = ?", (beatmap_id,))
+
+    def iter_difficulties(self):
+        """Yield one row per difficulty, sets in ID order and difficulties in insertion order."""
+        return self.connection.execute(
+            f"SELECT {DIFFICULTY_COLUMNS} FROM difficulties d JOIN beatmap_sets s USING (beatmap_id) "
+            "ORDER BY s.beatmap_id, d.rowid")
+
+    def iter_keys(self):
+        """Yield the (beatmap_id, difficulty_name) key of every difficulty, in the iter_difficulties order."""
+        return self.connection.execute(
+            "SELECT d.beatmap_id, d.difficulty_name FROM difficulties d JOIN beatmap_sets s USING (beatmap_id) "
+            "ORDER BY s.beatmap_id, d.rowid")
+
+    def iter_search_fields(self):
+        """Yield (beatmap_name, difficulty_name, artist, creator) for every difficulty, in the iter_keys order."""
+        return self.connection.execute(
+            "SELECT s.beatmap_name, d.difficulty_name, s.artist, d.creator "
+            "FROM difficulties d JOIN beatmap_sets s USING (beatmap_id) ORDER BY s.beatmap_id, d.rowid")
+
+    def get_difficulty(self, beatmap_id, difficulty_name):
+        """Return the row of one difficulty, with the iter_difficulties layout, or None."""
+        return self.connection.execute(
+            f"SELECT {DIFFICULTY_COLUMNS} FROM difficulties d JOIN beatmap_sets s USING (beatmap_id) "
+            "WHERE d.beatmap_id = ? AND d.difficulty_name = ?", (beatmap_id, difficulty_name)).fetchone()
+
+    def search(self, beatmap_name=None, artist=None, creator=None, difficulty_name=None, limit=None):
+        """
+        Return the difficulties whose fields contain the given values, ignoring case.
+        Rows have the same layout as iter_difficulties.
+        """
+        conditions, parameters = [], []
+        for column, value in (("s.beatmap_name", beatmap_name), ("s.artist", artist), ("d.creator", creator),
+                              ("d.difficulty_name", difficulty_name)):
+            if value:
+                conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+                parameters.append("%" + value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+        query = f"SELECT {DIFFICULTY_COLUMNS} FROM difficulties d JOIN beatmap_sets s USING (beatmap_id)"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY s.beatmap_id, d.rowid"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return self.connection.execute(query, parameters).fetchall()
+
+    def count_difficulties(self):
+        return self.connection.execute("SELECT COUNT(*) FROM difficulties").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
@@ -1,72 +1,115 @@
 import math
 import random
+from bisect import bisect_left
 
 import pygame
 
 from src.beatmap_manager.BeatMapButton import BeatMapButton
+from src.beatmap_manager.BeatMapSearchIndex import BeatMapSearchIndex
+from src.beatmap_manager.ThumbnailCache import ThumbnailCache
+from src.ui.background import background_service
 from src.ui.input import SearchInput
+from src.ui.pacing import ANIMATION, frame_pacer
 
 
 class BeatMapExplorer:
+    """
+    Virtualized beatmap carousel.
+    Only the cards inside the window exist, they are recycled from a small pool and bound to the positions of the
+    search result that are visible, so the per-frame cost depends on the window height and not on the library size.
+    """
+
     def __init__(self, app, beatmap_clic_action):
         self.app = app
-        self.beatmap_buttons = []
-        self.beatmap_buttons_in_search = []
+        self.beatmaps = self.app.beatmaps
+        self.search_result = range(len(self.beatmaps))  # Library indices of the beatmaps matching the search
+        self.button_pool = []
+        self.visible_buttons = []
         self.beatmap_clic_action = beatmap_clic_action
         self.scroll, self.scroll_speed, self.target_scroll, self.scroll_velocity = 0, 96, 0, 0
-        self.beatmap_button_selected = None
+        self.selected_index = None  # Library index of the selected beatmap
+        self.selection_offsets = {}  # Library index -> horizontal offset, for the cards sliding in or out
+        self.selected_offset_x = 80
         self.button_width, self.button_height, self.button_margin = 400, 80, 4
         self.special_characters = "!@#$%^&*()-_=+[{]}\\|;:'\",<.>/?~ "
-        self._initialize_beatmap_buttons()
+        self.thumbnail_cache = ThumbnailCache()
+        self.search_index = BeatMapSearchIndex(self.app.beatmap_loader.get_search_fields())
         self.search_input = SearchInput(self.app.font32, "assets/textures/icons/search.png", self.app.DISPLAY_WIDTH * 0.7, 48)
 
-    def _initialize_beatmap_buttons(self):
-        for beatmap in self.app.beatmaps:
-            beatmap_button = BeatMapButton(0, 0, width=self.button_width, height=self.button_height, beatmap=beatmap,
-                                           font=self.app.font24)
-            beatmap_button.unpress_action = lambda diff_button=beatmap_button: self.select_beatmap(diff_button)
-            self.beatmap_buttons.append(beatmap_button)
-            self.beatmap_buttons_in_search.append(beatmap_button)
-
-    def select_beatmap(self, beatmap_button):
-        self._center_on_button(beatmap_button, self.app.DISPLAY_HEIGHT / 2)
-
-        if self.beatmap_button_selected == beatmap_button:
-            self.beatmap_clic_action(beatmap_button.beatmap)
-        elif self.beatmap_button_selected:
-            self.beatmap_button_selected.unselect()
-
-        beatmap_button.select()
+    def _ensure_pool_size(self, size):
+        while size > len(self.button_pool):
+            beatmap_button = BeatMapButton(0, 0, width=self.button_width, height=self.button_height,
+                                           beatmap=None, font=self.app.font24)
+            beatmap_button.unpress_action = lambda diff_button=beatmap_button: self.select_beatmap(diff_button.position)
+            self.button_pool.append(beatmap_button)
 
-        self.beatmap_button_selected = beatmap_button
-
-        if beatmap_button.beatmap.beatmap_name != self.app.beatmap_selected.beatmap_name:
-            self.app.beatmap_selected = beatmap_button.beatmap
-            self.app.music_player.load_music()
-            self.app.music_player.play()
-            self.app.music_player.set_cursor(self.app.beatmap_selected.preview_time)
-        self.app.beatmap_selected = beatmap_button.beatmap
-
-    def _center_on_button(self, beatmap_button, center_y):
-        self.target_scroll = self.scroll - (beatmap_button.y - center_y)
+    def select_beatmap(self, position):
+        """Select the beatmap at a position of the search result, or launch it if it is already selected."""
+        if position is None or not 0 <= position < len(self.search_result):
+            return
+        beatmap_index = self.search_result[position]
+        beatmap = self.beatmaps[beatmap_index]
+        self._center_on_position(position, self.app.DISPLAY_HEIGHT / 2)
+
+        if self.selected_index == beatmap_index:
+            self.beatmap_clic_action(beatmap)
+
+        self.selected_index = beatmap_index
+        self.selection_offsets.setdefault(beatmap_index, 0)
+
+        if self.app.beatmap_selected is None or beatmap.beatmap_name != self.app.beatmap_selected.beatmap_name:
+            self.app.beatmap_selected = beatmap
+            self.app.music_player.request_preview(beatmap.song_path, beatmap.preview_time)
+        self.app.beatmap_selected = beatmap
+        background_service.request(beatmap.bg_path)
+        self._prefetch_backgrounds(position)
+
+    def _prefetch_backgrounds(self, position):
+        """Decode the backgrounds of the beatmaps around the selected one, the next ones being the likeliest picked."""
+        neighbors = [position + offset for offset in (1, -1, 2, -2) if 0 <= position + offset < len(self.search_result)]
+        background_service.prefetch([self.beatmaps[self.search_result[neighbor]].bg_path for neighbor in neighbors])
+
+    def _center_on_position(self, position, center_y):
+        self.target_scroll = center_y - position * self._get_step()
+
+    def _get_step(self):
+        return self.button_height + self.button_margin
+
+    def _get_selected_position(self):
+        """Position of the selected beatmap in the search result, or None if it is filtered out."""
+        if self.selected_index is None:
+            return None
+        position = bisect_left(self.search_result, self.selected_index)
+        if position < len(self.search_result) and self.search_result[position] == self.selected_index:
+            return position
+        return None
 
     def update(self, dt):
         self._update_scroll(dt)
-        self._update_buttons(dt)
+        self.thumbnail_cache.update()
         self.update_positions()
+        self._update_buttons(dt)
+        self.search_input.update()
 
     def draw(self, display):
         self._draw_buttons(display)
         self._draw_ui(display)
 
     def _update_buttons(self, dt):
-        for beatmap_button in self.beatmap_buttons_in_search:
+        for beatmap_button in self.visible_buttons:
             beatmap_button.update()
 
     def _update_scroll(self, dt):
+        if self.scroll != self.target_scroll or self.selection_offsets:
+            frame_pacer.request(ANIMATION)
         self.scroll = self._smooth_scroll(self.scroll, self.target_scroll, dt)
-        for button in self.beatmap_buttons_in_search:
-            button.offset_x = self._smooth_scroll(button.offset_x, button.target_offset_x, dt)
+        for beatmap_index, offset in list(self.selection_offsets.items()):
+            target = self.selected_offset_x if beatmap_index == self.selected_index else 0
+            offset = self._smooth_scroll(offset, target, dt)
+            if offset == target == 0:
+                del self.selection_offsets[beatmap_index]
+            else:
+                self.selection_offsets[beatmap_index] = offset
         self._handle_edge_scroll()
 
     def _smooth_scroll(self, current, target, dt, velocity_factor=8):
@@ -79,19 +122,15 @@ class BeatMapExplorer:
         return current
 
     def _handle_edge_scroll(self):
-        if self.beatmap_buttons_in_search:
-            if self.beatmap_buttons_in_search[0].y > self.app.DISPLAY_HEIGHT / 2:
-                self._center_on_button(self.beatmap_buttons_in_search[0], self.app.DISPLAY_HEIGHT / 2)
-            elif self.beatmap_buttons_in_search[-1].y < self.app.DISPLAY_HEIGHT / 2:
-                self._center_on_button(self.beatmap_buttons_in_search[-1], self.app.DISPLAY_HEIGHT / 2)
+        if self.search_result:
+            center_y = self.app.DISPLAY_HEIGHT / 2
+            if self.scroll > center_y:
+                self._center_on_position(0, center_y)
+            elif self.scroll + (len(self.search_result) - 1) * self._get_step() < center_y:
+                self._center_on_position(len(self.search_result) - 1, center_y)
 
     def _draw_buttons(self, display):
-        button_index_in_center = self._get_button_index_in_center()
-        area_in_num_button = int(self.app.DISPLAY_HEIGHT // (self.button_height + self.button_margin))
-        start_index = max(0, button_index_in_center - 1)
-        end_index = min(len(self.beatmap_buttons_in_search), button_index_in_center + area_in_num_button + 1)
-
-        for button in self.beatmap_buttons_in_search[start_index:end_index]:
+        for button in self.visible_buttons:
             button.draw(display)
 
     def _draw_ui(self, display):
@@ -145,19 +184,11 @@ class BeatMapExplorer:
         self.update_positions()
 
     def update_search(self):
-        search_input_value = self.search_input.get_input().lower()
-        search_terms = search_input_value.split()
-
-        self.beatmap_buttons_in_search = [
-            button for button in self.beatmap_buttons
-            if all(
-                term in button.beatmap.beatmap_name.lower() or term in button.beatmap.difficulty_name.lower() for term
-                in search_terms)
-        ]
+        self.search_result = self.search_index.search(self.search_input.get_input())
 
     def select_first_beatmap(self):
-        if self.beatmap_buttons_in_search:
-            self.select_beatmap(self.beatmap_buttons_in_search[0])
+        if self.search_result:
+            self.select_beatmap(0)
 
     def next_beatmap(self):
         self._navigate_beatmap(1)
@@ -166,29 +197,46 @@ class BeatMapExplorer:
         self._navigate_beatmap(-1)
 
     def _navigate_beatmap(self, step):
-        if not self.beatmap_button_selected:
+        current_position = self._get_selected_position()
+        if current_position is None:
             self.select_first_beatmap()
             return
 
-        current_index = self.beatmap_buttons_in_search.index(self.beatmap_button_selected)
-        next_index = (current_index + step) % len(self.beatmap_buttons_in_search)
-        self.select_beatmap(self.beatmap_buttons_in_search[next_index])
+        next_position = (current_position + step) % len(self.search_result)
+        self.select_beatmap(next_position)
 
     def select_random_beatmap(self):
-        if self.beatmap_buttons_in_search:
-            random_button = random.choice(self.beatmap_buttons_in_search)
-            self.select_beatmap(random_button)
+        if self.search_result:
+            self.select_beatmap(random.randrange(len(self.search_result)))
 
     def update_positions(self):
-        menu_x, menu_y = self.app.DISPLAY_WIDTH * 0.9, 0
-        y_offset = self.scroll + menu_y
+        """Bind the pooled cards to the visible positions of the search result and place them."""
+        menu_x = self.app.DISPLAY_WIDTH * 0.9
         amplitude = -int(self.app.DISPLAY_WIDTH / 24)
-
-        for beatmap_button in self.beatmap_buttons_in_search:
-            angle = (y_offset / self.app.DISPLAY_HEIGHT) * math.pi
+        step = self._get_step()
+
+        # Cards are centered on their y, keep the ones overlapping the window
+        first_position = max(0, math.ceil((-self.button_height / 2 - self.scroll) / step))
+        last_position = min(len(self.search_result) - 1,
+                            math.floor((self.app.DISPLAY_HEIGHT + self.button_height / 2 - self.scroll) / step))
+
+        # A card keeps the same slot while its position stays visible, so scrolling only rebinds the entering cards
+        self._ensure_pool_size(int(self.app.DISPLAY_HEIGHT // step) + 2)
+        self.visible_buttons = []
+        for position in range(first_position, last_position + 1):
+            beatmap_index = self.search_result[position]
+            beatmap_button = self.button_pool[position % len(self.button_pool)]
+            beatmap_button.bind(self.beatmaps[beatmap_index], position)
+            if beatmap_index == self.selected_index:
+                beatmap_button.select()
+            else:
+                beatmap_button.unselect()
+            beatmap_button.offset_x = self.selection_offsets.get(beatmap_index, 0)
+
+            y = self.scroll + position * step
+            angle = (y / self.app.DISPLAY_HEIGHT) * math.pi
             beatmap_button.x = menu_x + (math.sin(angle) * amplitude) - beatmap_button.offset_x
-            beatmap_button.y = y_offset
-            y_offset += beatmap_button.height + self.button_margin
-
-    def _get_button_index_in_center(self) -> int:
-        return int(0 - self.scroll // (self.button_height + self.button_margin))
\ No newline at end of file
+            beatmap_button.y = y
+            beatmap_button.thumbnail = self.thumbnail_cache.get(beatmap_button.beatmap.bg_path)
+            self.visible_buttons.append(beatmap_button)
+        self.thumbnail_cache.cancel_except(button.beatmap.bg_path for button in self.visible_buttons)
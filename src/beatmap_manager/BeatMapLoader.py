@@ -1,70 +1,184 @@
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from src.beatmap_manager.BeatMap import BeatMap
+from src.beatmap_manager.BeatMapCatalog import BeatmapCatalog
+from src.beatmap_manager.ChartCache import ChartCache
 
 
 class BeatmapLoader:
-    def __init__(self, database_path="database.json"):
-        self.database_path = database_path
-        self.database = self.load_database()
+    # Below this many files the pool costs more than it saves
+    PARALLEL_PARSE_THRESHOLD = 16
+    PARALLEL_PARSE_CHUNK = 64
 
-    def load_database(self):
-        """Load the beatmap database from a JSON file."""
-        with open(self.database_path, 'r') as db_file:
-            return json.load(db_file)
+    def __init__(self, database_path="database.db", legacy_database_path="database.json"):
+        self.catalog = BeatmapCatalog(database_path, legacy_database_path)
+        self.parent_folder = ""
+        self.chart_cache = ChartCache()
 
     def check_and_add_missing_beatmaps(self, parent_folder):
         """
-        Check for each folder and .txt file in the parent_folder if it exists in the database.
-        If not, read the metadata from the .txt files and add the missing beatmap or difficulty
-        to the database.
-        """
-        folders = sorted([item for item in os.listdir(parent_folder) if os.path.isdir(os.path.join(parent_folder, item))])
-
-        for folder in folders:
-            # Extract the beatmap ID and name
-            beatmap_id, beatmap_name = folder.split(' - ', 1)
-            beatmap_id = beatmap_id.strip()  # Clean ID
-
-            # Check if the beatmap already exists in the database
-            if beatmap_id not in self.database:
-                print(f"Adding new beatmap '{beatmap_id} - {beatmap_name}' to database.")
-                self.database[beatmap_id] = {
-                    "beatmap_name": beatmap_name,
-                    "difficulties": {}
-                }
-
-            # Check for .txt files corresponding to difficulties
-            difficulty_files = [f for f in os.listdir(os.path.join(parent_folder, folder)) if f.endswith('.txt')]
-            for difficulty_file in difficulty_files:
-                difficulty_name = difficulty_file[:-4]  # Remove '.txt' extension
-
-                # Check if the difficulty exists in the database
-                if difficulty_name not in self.database[beatmap_id]["difficulties"]:
-                    # Read metadata from the .txt file
-                    metadata = self.read_metadata_from_txt(os.path.join(parent_folder, folder, difficulty_file))
-
-                    # Add missing difficulty with the extracted metadata
-                    print(f"Adding missing difficulty '{difficulty_name}' for beatmap '{beatmap_id}' to database.")
-                    self.database[beatmap_id]["difficulties"][difficulty_name] = {
-                        "bg_name": metadata.get("BG_NAME", "background"),
-                        "bg_ext": metadata.get("BG_EXTENSION", "jpg"),
-                        "preview_time": metadata.get("PREVIEW_TIME", "0.000"),
-                        "creator": metadata.get("CREATOR", "Unknown Creator")
-                    }
-
-                    # Also update song info if it hasn't been set yet
-                    if "song_name" not in self.database[beatmap_id]:
-                        self.database[beatmap_id]["song_name"] = metadata.get("SONG_NAME", "unknown")
-                        self.database[beatmap_id]["song_ext"] = metadata.get("SONG_EXTENSION", "mp3")
-                        self.database[beatmap_id]["preview_time"] = metadata.get("PREVIEW_TIME", "0.000")
-                        self.database[beatmap_id]["artist"] = metadata.get("ARTIST", "Unknown Artist")
-
-        # Save the updated database back to the JSON file
-        self.save_database()
-
-    def read_metadata_from_txt(self, txt_file_path):
+        Check every folder and .txt file in the parent_folder against the catalog, ignoring the recorded
+        fingerprints, so every difficulty file is read again.
+        """
+        return self.scan_beatmaps(parent_folder, use_fingerprints=False)
+
+    def scan_beatmaps(self, parent_folder, progress_callback=None, max_workers=None, use_fingerprints=True):
+        """
+        Incrementally synchronise the catalog with the parent_folder.
+        Set folders whose stat fingerprint did not change since the last scan are not listed again, only their
+        known difficulty files are stat'ed. New or edited difficulties are parsed in a batch, deleted ones are
+        removed, and all the changes are written in a single transaction.
+        progress_callback(done, total) is called while the batch is parsed.
+        Returns True if the catalog was modified.
+        """
+        known_sets = self.catalog.get_sets()
+        known_files = self.catalog.get_difficulty_fingerprints()
+        changes_before = self.catalog.connection.total_changes
+        seen_ids = set()
+        pending = []
+
+        with os.scandir(parent_folder) as entries:
+            folders = sorted((entry for entry in entries if entry.is_dir() and ' - ' in entry.name),
+                             key=lambda entry: entry.name)
+
+        with self.catalog.transaction():
+            for folder in folders:
+                beatmap_id, beatmap_name = folder.name.split(' - ', 1)
+                beatmap_id = beatmap_id.strip()
+                seen_ids.add(beatmap_id)
+
+                folder_fingerprint = self._fingerprint(folder.stat())
+                known_set = known_sets.get(beatmap_id)
+                cached_files = {f"{name}.txt": fingerprint
+                                for name, fingerprint in known_files.get(beatmap_id, {}).items()}
+                if not use_fingerprints:
+                    cached_files = {}
+
+                if use_fingerprints and known_set and known_set[1] == folder.name and known_set[2] == folder_fingerprint:
+                    # The folder listing is unchanged, but a difficulty can still be edited in place
+                    difficulty_files = self._stat_known_files(folder.path, cached_files)
+                else:
+                    if known_set is None:
+                        print(f"Adding new beatmap '{beatmap_id} - {beatmap_name}' to database.")
+                    self.catalog.upsert_set(beatmap_id, beatmap_name, folder.name, *folder_fingerprint)
+                    difficulty_files = self._scan_difficulty_files(folder.path)
+
+                self._sync_beatmap_set(folder.path, beatmap_id, difficulty_files, cached_files,
+                                       known_files.get(beatmap_id, {}), pending)
+
+            for beatmap_id in [key for key in known_sets if key not in seen_ids]:
+                print(f"Removing deleted beatmap '{beatmap_id}' from database.")
+                self.catalog.delete_set(beatmap_id)
+
+            sets_with_song = {beatmap_id for beatmap_id, known_set in known_sets.items() if known_set[3]}
+            self.import_difficulties(pending, sets_with_song, progress_callback, max_workers)
+
+        return self.catalog.connection.total_changes != changes_before
+
+    def _sync_beatmap_set(self, folder_path, beatmap_id, difficulty_files, cached_files, known_difficulties,
+                          pending):
+        """
+        Bring the catalog entry of one set in line with its difficulty files.
+        New or edited difficulties are not parsed here but appended to pending as
+        (beatmap_id, difficulty_name, txt_file_path, fingerprint, is_new) tuples.
+        """
+        for difficulty_name in [name for name in known_difficulties if f"{name}.txt" not in difficulty_files]:
+            print(f"Removing deleted difficulty '{difficulty_name}' for beatmap '{beatmap_id}' from database.")
+            self.catalog.delete_difficulty(beatmap_id, difficulty_name)
+
+        for difficulty_file, fingerprint in sorted(difficulty_files.items()):
+            difficulty_name = difficulty_file[:-4]
+            if cached_files.get(difficulty_file) == fingerprint:
+                continue
+            pending.append((beatmap_id, difficulty_name, os.path.join(folder_path, difficulty_file), fingerprint,
+                            difficulty_name not in known_difficulties))
+
+    def import_difficulties(self, pending, sets_with_song, progress_callback=None, max_workers=None):
+        """
+        Parse a batch of difficulty files and merge their metadata into the catalog.
+        Files are read on a thread pool, results are merged in the order of pending so the catalog
+        does not depend on which worker finishes first.
+        """
+        metadata_list = self.read_metadata_batch([path for _, _, path, _, _ in pending], progress_callback,
+                                                 max_workers)
+
+        for (beatmap_id, difficulty_name, _, fingerprint, is_new), metadata in zip(pending, metadata_list):
+            if is_new:
+                print(f"Adding missing difficulty '{difficulty_name}' for beatmap '{beatmap_id}' to database.")
+            refresh_set = not is_new or beatmap_id not in sets_with_song
+            self.apply_difficulty_metadata(beatmap_id, difficulty_name, metadata, fingerprint, refresh_set)
+            sets_with_song.add(beatmap_id)
+
+    def read_metadata_batch(self, txt_file_paths, progress_callback=None, max_workers=None):
+        """
+        Read the metadata of many .txt files.
+        Returns the metadata dictionaries in the same order as txt_file_paths.
+        """
+        total = len(txt_file_paths)
+        if total < self.PARALLEL_PARSE_THRESHOLD:
+            metadata_list = []
+            for txt_file_path in txt_file_paths:
+                metadata_list.append(self.read_metadata_from_txt(txt_file_path))
+                if progress_callback:
+                    progress_callback(len(metadata_list), total)
+            return metadata_list
+
+        # Files are handed out in chunks so the pool overhead stays small next to the file reads
+        chunks = [txt_file_paths[i:i + self.PARALLEL_PARSE_CHUNK] for i in range(0, total, self.PARALLEL_PARSE_CHUNK)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._read_metadata_chunk, chunk) for chunk in chunks]
+            metadata_list = []
+            for future in futures:
+                metadata_list.extend(future.result())
+                if progress_callback:
+                    progress_callback(len(metadata_list), total)
+        return metadata_list
+
+    def _read_metadata_chunk(self, txt_file_paths):
+        return [self.read_metadata_from_txt(txt_file_path) for txt_file_path in txt_file_paths]
+
+    def apply_difficulty_metadata(self, beatmap_id, difficulty_name, metadata, fingerprint=(None, None),
+                                  refresh_set=False):
+        """
+        Store the metadata read from a difficulty file in the catalog.
+        The song info of the set is only written when refresh_set is True.
+        """
+        self.catalog.upsert_difficulty(beatmap_id, difficulty_name,
+                                       metadata.get("BG_NAME", "background"),
+                                       metadata.get("BG_EXTENSION", "jpg"),
+                                       metadata.get("PREVIEW_TIME", "0.000"),
+                                       metadata.get("CREATOR", "Unknown Creator"),
+                                       *fingerprint)
+        if refresh_set:
+            self.catalog.update_set_song(beatmap_id,
+                                         metadata.get("SONG_NAME", "unknown"),
+                                         metadata.get("SONG_EXTENSION", "mp3"),
+                                         metadata.get("PREVIEW_TIME", "0.000"),
+                                         metadata.get("ARTIST", "Unknown Artist"))
+
+    def _scan_difficulty_files(self, folder_path):
+        """List the difficulty files of a set folder with their fingerprints."""
+        with os.scandir(folder_path) as entries:
+            return {entry.name: self._fingerprint(entry.stat())
+                    for entry in entries if entry.name.endswith('.txt') and entry.is_file()}
+
+    def _stat_known_files(self, folder_path, known_files):
+        """Re-stat the difficulty files recorded by the last scan, without listing the folder."""
+        difficulty_files = {}
+        for difficulty_file in known_files:
+            try:
+                difficulty_files[difficulty_file] = self._fingerprint(os.stat(os.path.join(folder_path, difficulty_file)))
+            except FileNotFoundError:
+                pass
+        return difficulty_files
+
+    @staticmethod
+    def _fingerprint(stat_result):
+        return [stat_result.st_mtime_ns, stat_result.st_size]
+
+    @staticmethod
+    def read_metadata_from_txt(txt_file_path):
         """
         Read metadata from the .txt file under the [METADATA] section.
         Returns a dictionary containing the relevant metadata.
@@ -92,49 +206,63 @@ class BeatmapLoader:
 
         return metadata
 
-    def load_beatmaps(self, parent_folder):
+    def load_beatmaps(self, parent_folder, incremental=True, progress_callback=None):
         """
-        Load beatmaps from the database for each difficulty.
-        Returns a list of BeatMap instances.
+        Load beatmaps from the catalog for each difficulty.
+        Returns a list of lazy BeatMap instances, their details are only read from the catalog when accessed.
         """
-        # First, ensure all missing beatmaps and difficulties are added to the database
-        self.check_and_add_missing_beatmaps(parent_folder)
+        # First, ensure the database is in sync with the beatmaps folder
+        if incremental:
+            self.scan_beatmaps(parent_folder, progress_callback)
+        else:
+            self.check_and_add_missing_beatmaps(parent_folder)
 
-        all_beatmaps = []
-        for beatmap_key, beatmap_info in self.database.items():
-            beatmaps = self.create_beatmap_instances(parent_folder, beatmap_key, beatmap_info)
-            all_beatmaps.extend(beatmaps)
+        return self.create_beatmap_instances(parent_folder)
 
-        return all_beatmaps
+    def create_beatmap_instances(self, parent_folder):
+        """
+        Create a BeatMap instance for every difficulty of the catalog.
+        """
+        self.parent_folder = parent_folder
+        return [BeatMap(self, beatmap_id, difficulty_name)
+                for beatmap_id, difficulty_name in self.catalog.iter_keys()]
 
-    def create_beatmap_instances(self, parent_folder, beatmap_key, beatmap_info):
+    def get_search_fields(self):
         """
-        Create BeatMap instances from the database info for a specific beatmap key.
+        Return the searchable fields of every difficulty, in the order of create_beatmap_instances.
         """
-        beatmaps = []
-        song_name = beatmap_info.get("song_name", "unknown")
-        song_ext = beatmap_info.get("song_ext", "mp3")
-        beatmap_name = beatmap_info.get("beatmap_name", "unknown")
+        return self.catalog.iter_search_fields()
 
-        for difficulty, details in beatmap_info.get("difficulties", {}).items():
-            song_path = os.path.join(parent_folder, beatmap_key + " - " + beatmap_name, f"{song_name}.{song_ext}")
-            bg_name = details.get("bg_name", "background")
-            bg_ext = details.get("bg_ext", "jpg")
-            bg_path = os.path.join(parent_folder, beatmap_key, f"{bg_name}.{bg_ext}")
-            creator = details.get("creator", "Unknown Creator")
-            artist = beatmap_info.get("artist", "Unknown Artist")
-            beatmap_name = beatmap_info.get("beatmap_name", "Unknown Beatmap")
-            preview_time = float(beatmap_info.get("preview_time", "0.000"))
+    def resolve_beatmap(self, beatmap_id, difficulty_name):
+        """
+        Read the details of a difficulty from the catalog.
+        Returns (beatmap_name, song_path, bg_path, preview_time, creator, artist, txt_path).
+        """
+        row = self.catalog.get_difficulty(beatmap_id, difficulty_name)
+        if row is None:
+            raise KeyError(f"Beatmap '{beatmap_id}' has no difficulty '{difficulty_name}' in the catalog.")
 
-            # Create a BeatMap instance for each difficulty
-            beatmap = BeatMap(beatmap_name, difficulty, song_path, bg_path, preview_time, creator, artist)
-            print(f"Loaded beatmap '{beatmap_name} - {difficulty}' from database.")
+        (beatmap_key, beatmap_name, folder_name, song_name, song_ext, preview_time, artist,
+         difficulty, bg_name, bg_ext, creator) = row
+        beatmap_name = beatmap_name or "Unknown Beatmap"
+        folder_path = os.path.join(self.parent_folder, folder_name or f"{beatmap_key} - {beatmap_name}")
 
-            beatmaps.append(beatmap)
+        song_path = os.path.join(folder_path, f"{song_name or 'unknown'}.{song_ext or 'mp3'}")
+        bg_path = os.path.join(folder_path, f"{bg_name or 'background'}.{bg_ext or 'jpg'}")
+        txt_path = os.path.join(folder_path, f"{difficulty}.txt")
+        return (beatmap_name, song_path, bg_path, float(preview_time or "0.000"), creator or "Unknown Creator",
+                artist or "Unknown Artist", txt_path)
 
-        return beatmaps
+    def load_hit_objects(self, beatmap):
+        """
+        Read the hit objects of a difficulty into a columnar HitObjects store, sorted by time.
+        They are mapped from the compiled chart cache, which is rebuilt first when the .txt changed.
+        """
+        return self.chart_cache.load(beatmap.txt_path)
 
-    def save_database(self):
-        """Save the updated database back to the JSON file."""
-        with open(self.database_path, 'w') as db_file:
-            json.dump(self.database, db_file, indent=4)
+    def invalidate_beatmap(self, beatmap):
+        """
+        Mark a difficulty whose file could not be read as stale, the next scan removes it if it was deleted, or
+        imports it again.
+        """
+        self.catalog.invalidate_difficulty(beatmap.beatmap_id, beatmap.difficulty_name)
@@ -0,0 +1,192 @@
+from array import array
+from collections import OrderedDict
+from itertools import compress
+from operator import itemgetter
+
+# Searchable fields, in the order of the tuples given to the index
+FIELDS = ("name", "difficulty", "artist", "creator")
+FIELD_ALIASES = {
+    "name": "name", "title": "name",
+    "difficulty": "difficulty", "diff": "difficulty",
+    "artist": "artist",
+    "creator": "creator", "mapper": "creator"
+}
+
+# Conversions between one byte per entry (0 or 1) and the ASCII digits of a packed bit mask
+_BYTES_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_DIGITS_TO_BYTES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+class BeatMapSearchIndex:
+    """
+    N-gram inverted index over the searchable fields of the beatmaps.
+
+    Each field keeps its distinct lowercase values and the 1 to 3 character grams of those values, so a term is
+    matched against a few thousand distinct strings instead of every beatmap. Terms are substrings, all of them must
+    match, and "field=value" restricts a term to one field.
+    When a query only narrows the previous one (a character was typed), the previous result is filtered instead of
+    the whole library.
+
+    Term results are kept as bit masks over the entries (bit i set when entry i matches), so combining terms is a
+    single integer operation, and going from matching values to matching entries is done by a C-level itemgetter.
+    """
+    GRAM_SIZE = 3
+    # Below this size, the previous result is filtered entry by entry instead of with masks
+    FILTER_THRESHOLD = 4096
+    CACHE_SIZE = 64
+
+    def __init__(self, entries):
+        self.values = [[] for _ in FIELDS]  # Distinct lowercase values per field
+        self.entry_values = [array('I') for _ in FIELDS]  # Value index of every entry, per field
+        self.value_entries = [[] for _ in FIELDS]  # Entry indices of every value, per field
+        self.grams = [{} for _ in FIELDS]  # Gram -> indices of the values containing it, per field
+
+        value_ids = [{} for _ in FIELDS]
+        self.count = 0
+        for entry in entries:
+            for field, value in enumerate(entry):
+                value = (value or "").lower()
+                value_id = value_ids[field].get(value)
+                if value_id is None:
+                    value_id = value_ids[field][value] = len(self.values[field])
+                    self.values[field].append(value)
+                    self.value_entries[field].append(array('I'))
+                    self._index_grams(field, value, value_id)
+                self.entry_values[field].append(value_id)
+                self.value_entries[field][value_id].append(self.count)
+            self.count += 1
+
+        # Project a value-level byte table onto every entry in one C call
+        self.entry_getters = [self._make_getter(entry_values) for entry_values in self.entry_values]
+        self.all_mask = (1 << self.count) - 1
+        # Single characters are what the first keystroke looks up, so their masks are computed once
+        self.char_masks = [{gram: self._values_mask(field, value_ids)
+                            for gram, value_ids in self.grams[field].items() if len(gram) == 1}
+                           for field in range(len(FIELDS))]
+        self.mask_cache = OrderedDict()
+
+        self.last_terms = []
+        self.last_result = range(self.count)
+
+    @staticmethod
+    def _make_getter(entry_values):
+        if len(entry_values) == 1:
+            value_id = entry_values[0]
+            return lambda table: (table[value_id],)
+        if not entry_values:
+            return lambda table: ()
+        return itemgetter(*entry_values)
+
+    def _index_grams(self, field, value, value_id):
+        grams = self.grams[field]
+        for gram in {value[i:i + size] for size in range(1, self.GRAM_SIZE + 1) for i in range(len(value) - size + 1)}:
+            grams.setdefault(gram, []).append(value_id)
+
+    @staticmethod
+    def parse_query(query):
+        """
+        Split a query into (field, text) terms, field being None for terms matching every field.
+        Unknown "key=value" prefixes are searched as plain text.
+        """
+        terms = []
+        for token in query.lower().split():
+            field = None
+            key, separator, text = token.partition("=")
+            if separator and key in FIELD_ALIASES:
+                field, token = FIELDS.index(FIELD_ALIASES[key]), text
+            if token:
+                terms.append((field, token))
+        return terms
+
+    def search(self, query):
+        """Return the sorted indices of the entries matching every term of the query, as a sequence."""
+        terms = self.parse_query(query)
+
+        if not terms:
+            result = range(self.count)
+        elif len(self.last_result) <= self.FILTER_THRESHOLD and self._refines(terms, self.last_terms):
+            # Every previous term is still required (or a longer version of it), so only the previous result can match
+            result = self.last_result
+            for field, text in terms:
+                result = self._filter(result, field, text)
+        else:
+            mask = self.all_mask
+            for field, text in terms:
+                mask &= self._term_mask(field, text)
+                if not mask:
+                    break
+            result = self._mask_to_entries(mask)
+
+        self.last_terms, self.last_result = terms, result
+        return result
+
+    @staticmethod
+    def _refines(terms, previous_terms):
+        return all(any(field == previous_field and previous_text in text for field, text in terms)
+                   for previous_field, previous_text in previous_terms)
+
+    def _fields(self, field):
+        return range(len(FIELDS)) if field is None else (field,)
+
+    def _matching_values(self, field, text):
+        """Return the set of value indices of a field containing text."""
+        grams = self.grams[field]
+        if len(text) <= self.GRAM_SIZE:
+            return set(grams.get(text, ()))
+
+        postings = [grams.get(text[i:i + self.GRAM_SIZE]) for i in range(len(text) - self.GRAM_SIZE + 1)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        values = self.values[field]
+        return {value_id for value_id in candidates if text in values[value_id]}
+
+    def _term_mask(self, field, text):
+        """Return the bit mask of the entries matching one term, caching the last ones for backspace."""
+        key = (field, text)
+        mask = self.mask_cache.get(key)
+        if mask is not None:
+            self.mask_cache.move_to_end(key)
+            return mask
+
+        mask = 0
+        for field_index in self._fields(field):
+            if len(text) == 1:
+                mask |= self.char_masks[field_index].get(text, 0)
+            else:
+                mask |= self._values_mask(field_index, self._matching_values(field_index, text))
+
+        self.mask_cache[key] = mask
+        if len(self.mask_cache) > self.CACHE_SIZE:
+            self.mask_cache.popitem(last=False)
+        return mask
+
+    def _values_mask(self, field, value_ids):
+        """Return the bit mask of the entries whose value of field is one of value_ids."""
+        if not value_ids:
+            return 0
+        table = bytearray(len(self.values[field]))
+        for value_id in value_ids:
+            table[value_id] = 1
+        digits = bytes(self.entry_getters[field](table)).translate(_BYTES_TO_DIGITS)
+        return int(digits[::-1], 2)
+
+    def _mask_to_entries(self, mask):
+        if not mask:
+            return []
+        flags = format(mask, f"0{self.count}b")[::-1].encode().translate(_DIGITS_TO_BYTES)
+        return list(compress(range(self.count), flags))
+
+    def _filter(self, result, field, text):
+        """Keep the entries of result matching one term, preserving their order."""
+        checks = [(self.entry_values[field_index], self._matching_values(field_index, text))
+                  for field_index in self._fields(field)]
+        checks = [(entry_values, matching) for entry_values, matching in checks if matching]
+        if not checks:
+            return []
+        if len(checks) == 1:
+            entry_values, matching = checks[0]
+            return [entry for entry in result if entry_values[entry] in matching]
+        return [entry for entry in result
+                if any(entry_values[entry] in matching for entry_values, matching in checks)]
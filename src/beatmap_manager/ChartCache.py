@@ -0,0 +1,174 @@
+"""
+Compiled chart cache: the hit objects of every difficulty are stored in a binary sidecar, so playing a chart
+maps a file instead of parsing text.
+
+Precompile a whole beatmaps tree from the repository root:
+    python -m src.beatmap_manager.ChartCache [beatmaps_folder] [--force]
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+
+from src.beatmap_manager.HitObjects import HitObjects
+
+# magic, version, byte order of the columns, reserved, object count, source mtime (ns), source size, source hash
+HEADER = struct.Struct("<4sHBBIqq16s4x")
+MAGIC = b"RSCH"
+VERSION = 1
+BYTE_ORDERS = {"little": 0, "big": 1}
+# Column order in the file, the widest first so every column starts aligned on its item size
+COLUMNS = (("times", 'd'), ("durations", 'f'), ("lanes", 'h'), ("types", 'B'))
+
+
+class ChartCache:
+    """
+    Binary sidecars of the difficulty files, one per .txt, in the cache_folder.
+
+    A sidecar is a HEADER followed by the packed columns of a HitObjects store. It is valid while the source file has
+    the recorded mtime and size, or, when only those changed, the recorded content hash. Otherwise it is compiled
+    again from the text. Loading maps the file and hands out memoryviews over it, the columns are never copied.
+    """
+
+    def __init__(self, cache_folder=".cache/charts"):
+        self.cache_folder = cache_folder
+
+    def get_chart_path(self, txt_path):
+        key = hashlib.sha1(os.path.abspath(txt_path).encode()).hexdigest()
+        return os.path.join(self.cache_folder, f"{key}.chart")
+
+    @staticmethod
+    def hash_file(path):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as source_file:
+            for block in iter(lambda: source_file.read(1 << 16), b""):
+                digest.update(block)
+        return digest.digest()
+
+    def load(self, txt_path):
+        """Return the hit objects of a difficulty, from its sidecar when it is up to date, else compiling it."""
+        hit_objects = self.open(txt_path)
+        if hit_objects is None:
+            hit_objects = self.compile(txt_path)
+        return hit_objects
+
+    def open(self, txt_path):
+        """Map the sidecar of a difficulty, or return None if it is missing or stale."""
+        chart_path = self.get_chart_path(txt_path)
+        try:
+            source_stat = os.stat(txt_path)
+            with open(chart_path, 'rb') as chart_file:
+                header = self._read_header(chart_file)
+                if header is None:
+                    return None
+                count, source_mtime, source_size, source_hash = header
+
+                if (source_mtime, source_size) != (source_stat.st_mtime_ns, source_stat.st_size):
+                    # Touched but maybe not edited, only a different content makes the sidecar stale
+                    if source_size != source_stat.st_size or source_hash != self.hash_file(txt_path):
+                        return None
+                    self._write_stamp(chart_path, count, source_stat, source_hash)
+
+                buffer = mmap.mmap(chart_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        return self._map_columns(buffer, count)
+
+    @staticmethod
+    def _read_header(chart_file):
+        data = chart_file.read(HEADER.size)
+        if len(data) != HEADER.size:
+            return None
+        magic, version, byte_order, _, count, source_mtime, source_size, source_hash = HEADER.unpack(data)
+        if magic != MAGIC or version != VERSION or byte_order != BYTE_ORDERS[sys.byteorder]:
+            return None
+        expected_size = HEADER.size + count * sum(struct.calcsize(typecode) for _, typecode in COLUMNS)
+        if os.fstat(chart_file.fileno()).st_size != expected_size:
+            return None  # Truncated write
+        return count, source_mtime, source_size, source_hash
+
+    @staticmethod
+    def _map_columns(buffer, count):
+        view = memoryview(buffer)
+        columns = {}
+        offset = HEADER.size
+        for name, typecode in COLUMNS:
+            size = count * struct.calcsize(typecode)
+            columns[name] = view[offset:offset + size].cast(typecode)
+            offset += size
+        return HitObjects(buffer=buffer, **columns)
+
+    def compile(self, txt_path):
+        """Parse a difficulty file, write its sidecar and return the parsed hit objects."""
+        source_stat = os.stat(txt_path)
+        source_hash = self.hash_file(txt_path)
+        hit_objects = HitObjects.from_txt(txt_path)
+        if not hit_objects.is_sorted():
+            print(f"Hit objects of '{txt_path}' are not sorted by time, sorting them.")
+            hit_objects.sort()
+
+        chart_path = self.get_chart_path(txt_path)
+        temp_path = f"{chart_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            with open(temp_path, 'wb') as chart_file:
+                chart_file.write(self._pack_header(len(hit_objects), source_stat, source_hash))
+                for name, _ in COLUMNS:
+                    getattr(hit_objects, name).tofile(chart_file)
+            os.replace(temp_path, chart_path)  # Readers never see a partial sidecar
+        except OSError as e:
+            print(f"Could not write the compiled chart of '{txt_path}': {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return hit_objects
+
+    @staticmethod
+    def _pack_header(count, source_stat, source_hash):
+        return HEADER.pack(MAGIC, VERSION, BYTE_ORDERS[sys.byteorder], 0, count, source_stat.st_mtime_ns,
+                           source_stat.st_size, source_hash)
+
+    def _write_stamp(self, chart_path, count, source_stat, source_hash):
+        """Record the new mtime of an unchanged source, so the next load does not hash it again."""
+        try:
+            with open(chart_path, 'r+b') as chart_file:
+                chart_file.write(self._pack_header(count, source_stat, source_hash))
+        except OSError:
+            pass
+
+    def precompile(self, parent_folder, force=False):
+        """
+        Compile the sidecar of every difficulty file under parent_folder.
+        Returns (compiled, up_to_date) counts.
+        """
+        compiled = up_to_date = 0
+        for folder_path, _, file_names in os.walk(parent_folder):
+            for file_name in sorted(file_names):
+                if not file_name.endswith('.txt'):
+                    continue
+                txt_path = os.path.join(folder_path, file_name)
+                if not force and self.open(txt_path) is not None:
+                    up_to_date += 1
+                    continue
+                self.compile(txt_path)
+                compiled += 1
+        return compiled, up_to_date
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompile the charts of a beatmaps folder.")
+    parser.add_argument("parent_folder", nargs="?", default="beatmaps/")
+    parser.add_argument("--cache-folder", default=".cache/charts")
+    parser.add_argument("--force", action="store_true", help="compile again the up to date charts")
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    compiled, up_to_date = ChartCache(arguments.cache_folder).precompile(arguments.parent_folder, arguments.force)
+    print(f"{compiled} charts compiled, {up_to_date} up to date, in {time.perf_counter() - start:.2f} s.")
+
+
+if __name__ == "__main__":
+    main()
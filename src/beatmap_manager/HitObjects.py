@@ -0,0 +1,120 @@
+from array import array
+from itertools import islice, repeat
+from operator import le
+
+
+class HitObjects:
+    """
+    Hit objects of a difficulty, stored column by column.
+    Object i is (times[i], lanes[i], types[i], durations[i]), times in seconds and durations 0 for simple notes.
+    Columns are arrays (or memoryviews over a compiled chart), there is no Python object per hit object.
+    """
+    # Characters read per block, each block is converted column by column
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, times=None, lanes=None, types=None, durations=None, buffer=None):
+        self.times = times if times is not None else array('d')
+        self.lanes = lanes if lanes is not None else array('h')
+        self.types = types if types is not None else array('B')
+        self.durations = durations if durations is not None else array('f')
+        self.buffer = buffer  # Mapping the columns are views of, kept alive with them
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):
+        return f"HitObjects({len(self)} objects)"
+
+    @classmethod
+    def from_txt(cls, txt_file_path):
+        """
+        Stream the [OBJECTS] section of a difficulty file into a new store.
+        Each line is "time,lane,type" or "time,lane,type,duration", malformed lines are skipped.
+        """
+        hit_objects = cls()
+        with open(txt_file_path, 'r') as txt_file:
+            for line in txt_file:
+                if line.strip() == "[OBJECTS]":
+                    break
+            else:
+                return hit_objects  # No objects in this difficulty
+
+            rest = ""
+            while True:
+                chunk = txt_file.read(cls.BLOCK_SIZE)
+                text = rest + chunk
+                if chunk:
+                    # Keep the last partial line for the next block
+                    cut = text.rfind("\n") + 1
+                    text, rest = text[:cut], text[cut:]
+                section = text.find("[")
+                if section != -1:
+                    text = text[:section]  # Start of another section
+                # Spaces are not significant, and splitting on the remaining whitespace drops the empty lines
+                lines = text.replace(" ", "").replace("\t", "").split()
+                if lines:
+                    hit_objects.extend_lines(lines, txt_file_path)
+                if section != -1 or not chunk:
+                    break
+        return hit_objects
+
+    def extend_lines(self, lines, source="<lines>"):
+        """Append the objects of a list of stripped, non-empty lines."""
+        length = len(self)
+        # The columns are sliced from the fields of all the lines, which only lines up if every line has the right
+        # number of fields, a malformed line would otherwise take fields of its neighbours
+        commas = set(map(str.count, lines, repeat(",")))
+        try:
+            if commas == {2}:
+                # Every line is "time,lane,type": convert each column with a single C-level call
+                fields = ",".join(lines).split(",")
+                self.times.extend(map(float, fields[0::3]))
+                self.lanes.extend(map(int, fields[1::3]))
+                self.types.extend(map(int, fields[2::3]))
+                self.durations.frombytes(bytes(self.durations.itemsize * len(lines)))
+                return
+            if commas <= {2, 3}:
+                # Some lines have a duration, give the others a zero one so every line has 4 fields
+                suffixes = (",0" if line.count(",") == 2 else "" for line in lines)
+                fields = ",".join(map(str.__add__, lines, suffixes)).split(",")
+                self.times.extend(map(float, fields[0::4]))
+                self.lanes.extend(map(int, fields[1::4]))
+                self.types.extend(map(int, fields[2::4]))
+                self.durations.extend(map(float, fields[3::4]))
+                return
+        except (ValueError, OverflowError):
+            self._truncate(length)  # Some line is malformed, find it below
+
+        for line in lines:
+            self.append_line(line, source)
+
+    def append_line(self, line, source="<lines>"):
+        length = len(self)
+        values = line.split(",")
+        try:
+            if len(values) not in (3, 4):
+                raise ValueError(f"expected 3 or 4 values, got {len(values)}")
+            self.times.append(float(values[0]))
+            self.lanes.append(int(values[1]))
+            self.types.append(int(values[2]))
+            self.durations.append(float(values[3]) if len(values) == 4 else 0.0)
+        except (ValueError, OverflowError) as e:
+            self._truncate(length)
+            print(f"Skipping hit object '{line}' in '{source}': {e}")
+
+    def _truncate(self, length):
+        for column in (self.times, self.lanes, self.types, self.durations):
+            del column[length:]
+
+    def is_sorted(self):
+        return all(map(le, self.times, islice(self.times, 1, None)))
+
+    def sort(self):
+        """Order the objects by time, charts are expected to be sorted already so this is rarely needed."""
+        order = sorted(range(len(self)), key=self.times.__getitem__)
+        self.times, self.lanes, self.types, self.durations = (
+            array(column.typecode, map(column.__getitem__, order))
+            for column in (self.times, self.lanes, self.types, self.durations))
+
+    def nbytes(self):
+        return sum(len(column) * column.itemsize for column in (self.times, self.lanes, self.types, self.durations))
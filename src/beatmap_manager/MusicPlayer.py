@@ -1,7 +1,18 @@
+import io
+import math
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pygame
 
+from src.ui.pacing import BACKGROUND, frame_pacer
+
 class MusicPlayer:
+    # Song clock: time constant of the correction towards the mixer position, and error above which it jumps to it
+    CLOCK_SMOOTHING = 0.1
+    CLOCK_SNAP = 0.1
+
     def __init__(self, app):
         self.app = app
         self.is_playing = False
@@ -13,6 +24,23 @@ class MusicPlayer:
         self.fading_factor = 0.0
         self.fade_start_time = None
 
+        # Asynchronous previews: requests are debounced, then loaded one at a time on a worker thread
+        self.preview_debounce = 150  # Milliseconds without a new request before loading
+        self.pending_preview = None  # (generation, path, start_time, request_ticks)
+        self.preview_generation = 0  # Incremented by every request, older loads give up when they see it changed
+        self.ready_preview = None  # (generation, path) of the last preview the worker started
+        self.preview_future = None
+        self.preview_lock = threading.Lock()  # Guards the generation and ready_preview, only held for a moment
+        self.mixer_lock = threading.Lock()  # Held while music is loaded, so a preview and a song never load together
+        self.preview_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="music-preview")
+
+        # Song clock for gameplay, in seconds of song
+        self.audio_offset = 0.0  # Delay between the mixer position and the sound being heard (and tapped on)
+        self.song_time = 0.0
+        self.song_start = 0.0  # Song position the playback started from, get_pos does not count it
+        self.song_pending = False  # True during the lead in, the playback starts when the clock reaches 0
+        self.song_clock_ticks = 0  # pygame ticks of the last clock update
+
         # Initialize Pygame mixer
         pygame.mixer.init()
         pygame.mixer.music.set_volume(0)  # Start with volume at 0
@@ -35,6 +63,120 @@ class MusicPlayer:
         else:
             print("No music loaded. Please load a music file first.")
 
+    def request_preview(self, path, start_time=0.0):
+        """
+        Play a song from start_time without blocking the caller.
+        The file is only opened once no other request came for preview_debounce ms, a newer request cancels the
+        ones that did not start playing yet, and the fade-in starts when the audio is actually playing.
+        """
+        with self.preview_lock:
+            self.preview_generation += 1
+            self.pending_preview = (self.preview_generation, path, start_time, pygame.time.get_ticks())
+
+    def _load_preview(self, generation, path, start_time):
+        """Worker side of request_preview: read, decode and seek, unless a newer request came meanwhile."""
+        if generation != self.preview_generation:
+            return
+        if not os.path.exists(path):
+            print("Music file not found.")
+            return
+        with open(path, 'rb') as music_file:
+            data = io.BytesIO(music_file.read())
+
+        with self.mixer_lock:
+            if generation != self.preview_generation:
+                return
+            pygame.mixer.music.set_volume(0)
+            pygame.mixer.music.load(data, os.path.basename(path))
+            try:
+                pygame.mixer.music.play(start=start_time)
+            except pygame.error:
+                pygame.mixer.music.play()  # The format does not support seeking
+            with self.preview_lock:
+                if generation == self.preview_generation:
+                    self.ready_preview = (generation, path)
+                    return
+            pygame.mixer.music.stop()  # Cancelled while it was loading
+
+    def _update_preview(self):
+        if self.pending_preview:
+            generation, path, start_time, request_ticks = self.pending_preview
+            if pygame.time.get_ticks() - request_ticks >= self.preview_debounce:
+                self.pending_preview = None
+                self.preview_future = self.preview_executor.submit(self._load_preview, generation, path, start_time)
+
+        with self.preview_lock:
+            ready_preview, self.ready_preview = self.ready_preview, None
+        if ready_preview and ready_preview[0] == self.preview_generation:
+            _, self.current_music = ready_preview
+            self.is_playing = True
+            self.fade_start_time = pygame.time.get_ticks()  # The fade starts now that the audio is ready
+            self.fading_factor = 0.0
+
+    def start_song(self, path, lead_in=0.0):
+        """
+        Load a song for gameplay and start the song clock at -lead_in.
+        The playback starts when the clock reaches 0, at full volume.
+        """
+        self.stop()
+        if not os.path.exists(path):
+            print("Music file not found.")
+            return
+        with self.mixer_lock:  # Waits for a preview the worker is still loading, it stops itself once loaded
+            pygame.mixer.music.load(path)
+        self.current_music = path
+        self.song_time = -lead_in
+        self.song_start = 0.0
+        self.song_pending = True
+        self.song_clock_ticks = pygame.time.get_ticks()
+        self.update_song_clock(0.0)
+
+    def get_audio_time(self):
+        """Position of the song being heard according to the mixer, or None when nothing plays."""
+        position = pygame.mixer.music.get_pos()
+        if position < 0:
+            return None
+        return self.song_start + position / 1000 - self.audio_offset
+
+    def update_song_clock(self, dt):
+        """
+        Advance the song clock by the frame time dt and pull it towards the mixer position.
+        The mixer position only moves once per audio buffer, so it is followed smoothly rather than copied: the clock
+        never goes backwards, and only jumps when it is off by more than CLOCK_SNAP (stall, dropped frames).
+        The correction depends on dt, so the clock converges the same way at any frame rate.
+        Returns the song time, in seconds.
+        """
+        self.song_clock_ticks = pygame.time.get_ticks()
+        self.song_time += dt
+
+        if self.song_pending:
+            if self.song_time >= 0:
+                self.song_pending = False
+                self.song_start = self.song_time
+                try:
+                    pygame.mixer.music.play(start=self.song_start)
+                except pygame.error:
+                    pygame.mixer.music.play()  # The format does not support seeking
+                    self.song_start = 0.0
+                self.is_playing = True
+                self.fade_start_time = None
+                self.fading_factor = 1.0
+                self.update_volume()
+            return self.song_time
+
+        audio_time = self.get_audio_time()
+        if audio_time is not None:
+            error = audio_time - self.song_time
+            if abs(error) > self.CLOCK_SNAP:
+                self.song_time = audio_time
+            else:
+                self.song_time += max(error * (1 - math.exp(-dt / self.CLOCK_SMOOTHING)), -dt)
+        return self.song_time
+
+    def song_time_at(self, ticks):
+        """Song time at a pygame ticks timestamp close to the last clock update, such as an input event."""
+        return self.song_time + (ticks - self.song_clock_ticks) / 1000
+
     def set_cursor(self, time):
         if self.current_music:
             pygame.mixer.music.set_pos(time)  # Requires a supported audio format
@@ -42,6 +184,15 @@ class MusicPlayer:
             print("No music loaded. Please load a music file first.")
 
     def stop(self):
+        # Cancel the previews that did not start yet, and the one the worker may have just started. A preview still
+        # loading sees the new generation and stops itself, so this never waits for the worker
+        with self.preview_lock:
+            self.preview_generation += 1
+            ready_preview, self.ready_preview = self.ready_preview, None
+        self.pending_preview = None
+        self.song_pending = False
+        if ready_preview:
+            pygame.mixer.music.stop()
         if self.is_playing:
             pygame.mixer.music.stop()
             self.is_playing = False
@@ -66,7 +217,12 @@ class MusicPlayer:
         pygame.mixer.music.set_volume(effective_volume)
 
     def update(self, dt):
-        """Update the player, fading in the volume over time."""
+        """Update the player, starting the requested previews and fading in the volume over time."""
+        self._update_preview()
+        # Nothing else wakes the loop up while a preview loads or fades in
+        if (self.pending_preview or self.fade_start_time is not None
+                or (self.preview_future is not None and not self.preview_future.done())):
+            frame_pacer.request(BACKGROUND)
         if self.is_playing and self.fade_start_time is not None:
             elapsed_time = pygame.time.get_ticks() - self.fade_start_time
             if elapsed_time < self.fade_duration:
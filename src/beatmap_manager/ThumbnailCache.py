@@ -0,0 +1,218 @@
+"""
+Thumbnail cache of the beatmap backgrounds shown on the carousel cards: every background is decoded once, scaled
+down and stored as a small JPEG, so scrolling the carousel never decodes a full size image.
+
+Generate the thumbnails of a whole beatmaps tree from the repository root:
+    python -m src.beatmap_manager.ThumbnailCache [beatmaps_folder] [--force] [--workers 4]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from src.beatmap_manager.BeatMapLoader import BeatmapLoader
+from src.beatmap_manager.ChartCache import ChartCache
+from src.ui.pacing import BACKGROUND, frame_pacer
+
+THUMBNAIL_SIZE = (120, 68)
+
+
+def crop_to_ratio(image, size):
+    """Center crop an image to the ratio of size, and scale it down smoothly to size."""
+    width, height = image.get_size()
+    if width * size[1] > height * size[0]:
+        crop_width, crop_height = height * size[0] // size[1], height
+    else:
+        crop_width, crop_height = width, width * size[1] // size[0]
+    cropped = image.subsurface(((width - crop_width) // 2, (height - crop_height) // 2, crop_width, crop_height))
+    if cropped.get_bitsize() not in (24, 32):
+        # smoothscale only takes 24 or 32 bits surfaces, and convert needs a display
+        converted = pygame.Surface(cropped.get_size(), 0, 32)
+        converted.blit(cropped, (0, 0))
+        cropped = converted
+    return pygame.transform.smoothscale(cropped, size)
+
+
+class ThumbnailCache:
+    """
+    Thumbnails stored in the cache_folder under the hash of their source image, so the sets sharing an image share
+    its thumbnail.
+
+    index.json maps every source path to the mtime, size and hash it had when it was last read. A source whose mtime
+    or size changed is hashed again, and a new thumbnail is generated if its content changed. Thumbnails are read
+    or generated on worker threads, get returns None until update, called every frame, picked them up.
+    """
+    MAX_SURFACES = 256  # Thumbnails kept in memory, a few screens of cards
+
+    def __init__(self, cache_folder=".cache/thumbnails", size=THUMBNAIL_SIZE, max_workers=2):
+        self.cache_folder = cache_folder
+        self.size = tuple(size)
+        self.index_path = os.path.join(cache_folder, "index.json")
+        self.index = self._read_index()  # Absolute source path -> [mtime_ns, size, content hash]
+        self.index_dirty = False
+        self.lock = threading.Lock()  # Guards the index, written by the workers
+        self.surfaces = OrderedDict()  # Source path -> surface, or None when the source cannot be read
+        self.futures = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+
+    # [DISK]
+    def _read_index(self):
+        try:
+            with open(self.index_path, 'r') as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        """Write the index if it changed, through a temporary file so a crash never leaves half of it."""
+        with self.lock:
+            if not self.index_dirty:
+                return
+            data = json.dumps(self.index)
+            self.index_dirty = False
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            with open(temp_path, 'w') as index_file:
+                index_file.write(data)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not write the thumbnail index: {e}")
+
+    def get_thumbnail_path(self, source_path):
+        """Path of the thumbnail of a source image, hashing the source when it changed since the last time."""
+        source_stat = os.stat(source_path)
+        key = os.path.abspath(source_path)
+        with self.lock:
+            entry = self.index.get(key)
+        if entry is None or entry[0] != source_stat.st_mtime_ns or entry[1] != source_stat.st_size:
+            digest = ChartCache.hash_file(source_path).hex()
+            with self.lock:
+                self.index[key] = [source_stat.st_mtime_ns, source_stat.st_size, digest]
+                self.index_dirty = True
+        else:
+            digest = entry[2]
+        return os.path.join(self.cache_folder, f"{digest}-{self.size[0]}x{self.size[1]}.jpg")
+
+    def load(self, source_path, force=False):
+        """Read the thumbnail of a source image, generating it first if needed. Returns None if it cannot be read."""
+        try:
+            thumbnail_path = self.get_thumbnail_path(source_path)
+        except FileNotFoundError:
+            return None  # Sets without a background are common, the cards just stay plain
+        except OSError as e:
+            print(f"Could not read the background '{source_path}': {e}")
+            return None
+        if not force and os.path.exists(thumbnail_path):
+            try:
+                return pygame.image.load(thumbnail_path)
+            except pygame.error:
+                pass  # Damaged thumbnail, generated again
+        try:
+            return self.generate(source_path, thumbnail_path)
+        except (pygame.error, OSError) as e:
+            print(f"Could not create the thumbnail of '{source_path}': {e}")
+            return None
+
+    def generate(self, source_path, thumbnail_path):
+        thumbnail = crop_to_ratio(pygame.image.load(source_path), self.size)
+        temp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(self.cache_folder, exist_ok=True)
+        try:
+            with open(temp_path, 'wb') as thumbnail_file:
+                pygame.image.save(thumbnail, thumbnail_file, "jpg")
+            os.replace(temp_path, thumbnail_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return thumbnail
+
+    def warm(self, source_paths, force=False):
+        """
+        Generate the missing thumbnails of source_paths in parallel, or all of them with force.
+        Returns the number of thumbnails that could be read or generated.
+        """
+        results = list(self.executor.map(lambda path: self.load(path, force), sorted(set(source_paths))))
+        self.save_index()
+        return sum(thumbnail is not None for thumbnail in results)
+
+    # [CARDS]
+    def get(self, source_path):
+        """Return the thumbnail of a source image, or None while it is being loaded."""
+        if source_path in self.surfaces:
+            self.surfaces.move_to_end(source_path)
+            return self.surfaces[source_path]
+        if source_path not in self.futures:
+            self.futures[source_path] = self.executor.submit(self.load, source_path)
+        return None
+
+    def cancel_except(self, source_paths):
+        """Drop the queued loads of the cards that scrolled out of view before they were picked up."""
+        wanted = set(source_paths)
+        for source_path in [path for path in self.futures if path not in wanted]:
+            if self.futures[source_path].cancel():
+                del self.futures[source_path]
+
+    def update(self):
+        """Store the thumbnails loaded since the last frame, converted to the display format."""
+        if self.futures:
+            frame_pacer.request(BACKGROUND)
+        for source_path in [path for path, future in self.futures.items() if future.done()]:
+            future = self.futures.pop(source_path)
+            if future.cancelled():
+                continue
+            thumbnail = future.result()
+            if thumbnail is not None and pygame.display.get_surface() is not None:
+                thumbnail = thumbnail.convert()
+            self.surfaces[source_path] = thumbnail
+            while len(self.surfaces) > self.MAX_SURFACES:
+                self.surfaces.popitem(last=False)
+        if self.index_dirty and not self.futures:
+            self.save_index()
+
+    def close(self):
+        """Drop the queued loads and stop the workers, at exit."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.futures.clear()
+        self.save_index()
+
+
+def list_backgrounds(parent_folder):
+    """
+    Paths of the backgrounds named by the difficulty files under parent_folder, as the catalog would resolve them.
+    The files are read directly, so warming the thumbnails of any folder leaves the catalog of the game untouched.
+    """
+    source_paths = set()
+    for folder_path, _, file_names in os.walk(parent_folder):
+        for file_name in file_names:
+            if file_name.endswith('.txt'):
+                metadata = BeatmapLoader.read_metadata_from_txt(os.path.join(folder_path, file_name))
+                bg_name = metadata.get("BG_NAME") or "background"
+                bg_extension = metadata.get("BG_EXTENSION") or "jpg"
+                source_paths.add(os.path.join(folder_path, f"{bg_name}.{bg_extension}"))
+    return source_paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the card thumbnails of a beatmaps folder.")
+    parser.add_argument("parent_folder", nargs="?", default="beatmaps/")
+    parser.add_argument("--cache-folder", default=".cache/thumbnails")
+    parser.add_argument("--force", action="store_true", help="generate again the existing thumbnails")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    source_paths = list_backgrounds(arguments.parent_folder)
+    thumbnail_cache = ThumbnailCache(arguments.cache_folder, max_workers=arguments.workers)
+    ready = thumbnail_cache.warm(source_paths, arguments.force)
+    thumbnail_cache.close()
+    print(f"{ready} thumbnails ready for {len(source_paths)} backgrounds, in {time.perf_counter() - start:.2f} s.")
+
+
+if __name__ == "__main__":
+    main()
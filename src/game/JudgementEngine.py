@@ -0,0 +1,130 @@
+from array import array
+from bisect import bisect_left
+
+# Judgements, 0 being a note not judged yet
+PENDING, PERFECT, GREAT, GOOD, MISS = range(5)
+JUDGEMENT_NAMES = ("", "perfect", "great", "good", "miss")
+# Share of a perfect hit each judgement is worth in the accuracy
+JUDGEMENT_WEIGHTS = (0.0, 1.0, 2 / 3, 1 / 3, 0.0)
+
+
+class JudgementEngine:
+    """
+    Match timestamped inputs against the notes of a chart.
+
+    Inputs are queued as they arrive, with their song time, and the whole queue is matched once per frame. The notes
+    of every lane are indexed by time, with a pointer to the first note of the lane not judged yet: an input bisects
+    from that pointer to find the first note it can still hit, and every note it skipped is a miss. Notes leaving the
+    miss window are missed the same way, by bisecting from the pointers. An input costs O(log n) and a frame
+    O(inputs + judgements), without walking the notes.
+
+    Only the start of a hold is judged.
+    """
+
+    def __init__(self, hit_objects, perfect_window=0.040, great_window=0.080, good_window=0.130, miss_window=0.200):
+        self.windows = (perfect_window, great_window, good_window)
+        self.miss_window = miss_window
+
+        times, lanes = hit_objects.times, hit_objects.lanes
+        lane_count = max(lanes, default=-1) + 1
+        self.lane_indices = [array('I') for _ in range(lane_count)]  # Object indices of every lane, by time
+        for index, lane in enumerate(lanes):
+            self.lane_indices[lane].append(index)
+        self.lane_times = [array('d', map(times.__getitem__, indices)) for indices in self.lane_indices]
+        self.next_notes = [0] * lane_count  # Position of the first pending note of every lane
+
+        self.results = array('B', bytes(len(hit_objects)))  # Judgement of every object
+        self.offsets = array('f', bytes(4 * len(hit_objects)))  # Input time - note time of the hit objects
+
+        self.input_times = array('d')
+        self.input_lanes = array('h')
+
+        self.counts = [0] * len(JUDGEMENT_NAMES)
+        self.combo = 0
+        self.max_combo = 0
+        self.score_weight = 0.0
+        self.judged_count = 0
+
+    def press(self, song_time, lane):
+        """Queue an input, it is matched at the next update."""
+        self.input_times.append(song_time)
+        self.input_lanes.append(lane)
+
+    def update(self, now):
+        """
+        Match the queued inputs, then miss the notes that left the miss window at the song time now.
+        Returns the new judgements as (object_index, judgement, offset) tuples, in the order they happened.
+        """
+        judgements = []
+        input_times, input_lanes = self.input_times, self.input_lanes
+        # Inputs arrive in time order per source, sorting keeps mixed sources (keys, mouse) in order too
+        order = sorted(range(len(input_times)), key=input_times.__getitem__)
+        for position in order:
+            self._match(input_times[position], input_lanes[position], judgements)
+        del input_times[:], input_lanes[:]
+
+        for lane in range(len(self.lane_times)):
+            self._miss_until(lane, bisect_left(self.lane_times[lane], now - self.miss_window, self.next_notes[lane]),
+                             judgements)
+        return judgements
+
+    def _match(self, input_time, lane, judgements):
+        if not 0 <= lane < len(self.lane_times):
+            return
+        lane_times = self.lane_times[lane]
+        # Notes too old for this input are missed, the first remaining one is the candidate
+        candidate = bisect_left(lane_times, input_time - self.miss_window, self.next_notes[lane])
+        self._miss_until(lane, candidate, judgements)
+        if candidate >= len(lane_times) or lane_times[candidate] > input_time + self.miss_window:
+            return  # Nothing to hit in this lane
+
+        offset = input_time - lane_times[candidate]
+        distance = abs(offset)
+        judgement = MISS
+        for window_judgement, window in zip((PERFECT, GREAT, GOOD), self.windows):
+            if distance <= window:
+                judgement = window_judgement
+                break
+
+        index = self.lane_indices[lane][candidate]
+        self.next_notes[lane] = candidate + 1
+        self.offsets[index] = offset
+        self._judge(index, judgement, offset, judgements)
+
+    def _miss_until(self, lane, end, judgements):
+        """Miss the pending notes of a lane before the position end."""
+        indices = self.lane_indices[lane]
+        for position in range(self.next_notes[lane], end):
+            self._judge(indices[position], MISS, 0.0, judgements)
+        self.next_notes[lane] = max(self.next_notes[lane], end)
+
+    def _judge(self, index, judgement, offset, judgements):
+        self.results[index] = judgement
+        self.counts[judgement] += 1
+        self.judged_count += 1
+        self.score_weight += JUDGEMENT_WEIGHTS[judgement]
+        if judgement == MISS:
+            self.combo = 0
+        else:
+            self.combo += 1
+            self.max_combo = max(self.max_combo, self.combo)
+        judgements.append((index, judgement, offset))
+
+    def get_accuracy(self):
+        """Accuracy of the judged notes, from 0.0 to 1.0, 1.0 before the first judgement."""
+        return self.score_weight / self.judged_count if self.judged_count else 1.0
+
+    def get_mean_offset(self):
+        """Mean input - note time of the hits, in seconds, negative when tapping early."""
+        hits = [self.offsets[index] for index in range(len(self.results)) if self.results[index] not in (PENDING, MISS)]
+        return sum(hits) / len(hits) if hits else 0.0
+
+    def get_summary(self):
+        return {
+            "accuracy": self.get_accuracy(),
+            "max_combo": self.max_combo,
+            **{JUDGEMENT_NAMES[judgement]: self.counts[judgement] for judgement in (PERFECT, GREAT, GOOD, MISS)}
+        }
+
+    def is_finished(self):
+        return all(next_note == len(lane_times) for next_note, lane_times in zip(self.next_notes, self.lane_times))
@@ -0,0 +1,80 @@
+"""
+Estimate the audio offset from taps recorded while listening to a steady beat.
+
+Taps are song times in seconds, one per line, as measured by the song clock with an offset of 0. From the repository
+root:
+    python -m src.game.LatencyCalibration taps.txt --bpm 120 [--first-beat 0.0] [--apply]
+"""
+import argparse
+from array import array
+from statistics import median
+
+
+class LatencyCalibration:
+    """
+    Offline estimation of the input-to-audio latency.
+
+    Every tap is compared with the nearest beat of the metronome, the median of those deviations is the delay between
+    the mixer position and the player hearing and tapping the beat, which is what MusicPlayer.audio_offset corrects.
+    Taps further than OUTLIER_FACTOR median absolute deviations from the median (missed or double taps) are ignored.
+    """
+    OUTLIER_FACTOR = 3.0
+    MIN_TAPS = 8
+
+    def __init__(self, beat_interval, first_beat=0.0):
+        self.beat_interval = beat_interval
+        self.first_beat = first_beat
+        self.taps = array('d')
+
+    def add_tap(self, song_time):
+        self.taps.append(song_time)
+
+    def get_deviations(self):
+        """Signed distance from every tap to its nearest beat, in seconds, positive when tapped late."""
+        deviations = []
+        for tap in self.taps:
+            beat = round((tap - self.first_beat) / self.beat_interval)
+            deviations.append(tap - (self.first_beat + beat * self.beat_interval))
+        return deviations
+
+    def estimate(self):
+        """
+        Return (offset_ms, spread_ms, used_taps), spread being the median absolute deviation of the kept taps.
+        Raises ValueError when there are not enough taps to trust the result.
+        """
+        deviations = self.get_deviations()
+        if len(deviations) < self.MIN_TAPS:
+            raise ValueError(f"At least {self.MIN_TAPS} taps are needed, got {len(deviations)}.")
+
+        center = median(deviations)
+        spread = median(abs(deviation - center) for deviation in deviations)
+        kept = [deviation for deviation in deviations
+                if abs(deviation - center) <= self.OUTLIER_FACTOR * spread] or deviations
+        offset = median(kept)
+        return offset * 1000, median(abs(deviation - offset) for deviation in kept) * 1000, len(kept)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate the audio offset from recorded tap times.")
+    parser.add_argument("taps_file", help="file with one tap time in seconds per line")
+    parser.add_argument("--bpm", type=float, required=True)
+    parser.add_argument("--first-beat", type=float, default=0.0, help="song time of a beat, in seconds")
+    parser.add_argument("--apply", action="store_true", help="write the offset to config.yml")
+    arguments = parser.parse_args()
+
+    calibration = LatencyCalibration(60 / arguments.bpm, arguments.first_beat)
+    with open(arguments.taps_file, 'r') as taps_file:
+        for line in taps_file:
+            if line.strip():
+                calibration.add_tap(float(line))
+
+    offset_ms, spread_ms, used_taps = calibration.estimate()
+    print(f"Audio offset: {offset_ms:.1f} ms (spread {spread_ms:.1f} ms, {used_taps}/{len(calibration.taps)} taps).")
+    if arguments.apply:
+        from GameConfig import GameConfig
+        GameConfig('config.yml').set_parameter('game.audio_offset_ms', round(offset_ms))
+        print("Saved to config.yml as game.audio_offset_ms.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+
+class NoteScheduler:
+    """
+    Moving window over the hit objects of a chart, so a frame only touches the notes that matter at that time.
+
+    The window holds the objects starting in [now - miss_window, now + approach_time]: the notes approaching and the
+    ones that can still be hit. Both ends are found by bisecting the sorted time column from the previous bounds, so
+    an update costs O(log n) and iterating the window costs O(visible notes), whatever the size of the chart.
+    Holds that started before the window but did not end yet are kept in a separate list, updated as objects leave
+    the window, so a long hold does not widen the window for every other note.
+    """
+
+    def __init__(self, hit_objects, approach_time=1.0, miss_window=0.2):
+        self.hit_objects = hit_objects
+        self.times = hit_objects.times
+        self.durations = hit_objects.durations
+        self.approach_time = approach_time
+        self.miss_window = miss_window
+        # Object indices of every hold, in time order, to find the running ones after a seek
+        self.hold_indices = [index for index, duration in enumerate(self.durations) if duration > 0]
+
+        self.now = None
+        self.first = self.last = 0  # Window of object indices [first, last)
+        self.holds = []  # Indices of the holds started before first that are still running, in time order
+        self.entered = self.expired = range(0)  # Indices that entered and left the window at the last update
+
+    def update(self, now):
+        """Move the window to the song time now, in seconds."""
+        times, durations = self.times, self.durations
+        start = now - self.miss_window
+        end = now + self.approach_time
+        first, last = self.first, self.last
+
+        if self.now is None or now < self.now:
+            # First update or seek backwards: search the whole chart again
+            self.first = bisect_left(times, start)
+            self.last = max(self.first, bisect_right(times, end))
+            self.holds = [index for index in self.hold_indices
+                          if index < self.first and times[index] + durations[index] >= start]
+            self.entered = range(self.first, self.last)
+            self.expired = range(0)
+        else:
+            # Both bounds only move forward
+            self.last = bisect_right(times, end, last)
+            self.first = bisect_left(times, start, first, self.last)
+            self.entered = range(last, self.last)
+            expired = []
+            if self.holds:
+                holds = self.holds
+                self.holds = [index for index in holds if times[index] + durations[index] >= start]
+                if len(self.holds) != len(holds):
+                    expired = [index for index in holds if times[index] + durations[index] < start]
+            for index in range(first, self.first):
+                if times[index] + durations[index] >= start:
+                    self.holds.append(index)  # Started before the window, still running
+                else:
+                    expired.append(index)
+            self.expired = expired
+        self.now = now
+
+    def visible(self):
+        """Indices of the running holds and of the objects inside the window, in time order."""
+        if self.holds:
+            return chain(self.holds, range(self.first, self.last))
+        return range(self.first, self.last)
+
+    def is_over(self, index, now=None):
+        """True when an object ended more than miss_window ago."""
+        now = self.now if now is None else now
+        return self.times[index] + self.durations[index] < now - self.miss_window
+
+    def seek(self, now):
+        """Jump to any song time, forward or backward."""
+        self.now = None
+        self.update(now)
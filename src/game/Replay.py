@@ -0,0 +1,81 @@
+import os
+import struct
+import sys
+import time
+from array import array
+
+# magic, version, reserved, hash of the chart source, input count, recording time (unix seconds)
+HEADER = struct.Struct("<4sHH16sIq")
+MAGIC = b"RSRP"
+VERSION = 1
+NAME_LENGTH = struct.Struct("<H")
+
+
+class Replay:
+    """
+    Timestamped inputs of one play of a chart.
+
+    The file is a HEADER, the beatmap ID and difficulty name (length prefixed UTF-8), then the input song times
+    (float64) and lanes (int16), little endian. Times are stored as the song clock gave them, the audio offset already
+    applied, so judging them again gives the same result on any machine.
+    """
+
+    def __init__(self, chart_hash, beatmap_id="", difficulty_name="", recorded_at=None):
+        self.chart_hash = chart_hash  # ChartCache.hash_file of the difficulty file
+        self.beatmap_id = beatmap_id
+        self.difficulty_name = difficulty_name
+        self.recorded_at = int(time.time()) if recorded_at is None else recorded_at
+        self.input_times = array('d')
+        self.input_lanes = array('h')
+
+    def __len__(self):
+        return len(self.input_times)
+
+    def add_input(self, song_time, lane):
+        self.input_times.append(song_time)
+        self.input_lanes.append(lane)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        times, lanes = self.input_times, self.input_lanes
+        if sys.byteorder != "little":
+            times, lanes = array('d', times), array('h', lanes)
+            times.byteswap()
+            lanes.byteswap()
+        with open(path, 'wb') as replay_file:
+            replay_file.write(HEADER.pack(MAGIC, VERSION, 0, self.chart_hash, len(self), self.recorded_at))
+            for name in (self.beatmap_id, self.difficulty_name):
+                encoded = name.encode()
+                replay_file.write(NAME_LENGTH.pack(len(encoded)) + encoded)
+            times.tofile(replay_file)
+            lanes.tofile(replay_file)
+
+    @classmethod
+    def load(cls, path):
+        """Read a replay file, raising ValueError when it is not a supported replay."""
+        with open(path, 'rb') as replay_file:
+            data = replay_file.read()
+
+        if len(data) < HEADER.size:
+            raise ValueError(f"'{path}' is too short to be a replay.")
+        magic, version, _, chart_hash, input_count, recorded_at = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{path}' is not a version {VERSION} replay.")
+
+        offset = HEADER.size
+        names = []
+        for _ in range(2):
+            (length,) = NAME_LENGTH.unpack_from(data, offset)
+            offset += NAME_LENGTH.size
+            names.append(data[offset:offset + length].decode())
+            offset += length
+
+        replay = cls(chart_hash, *names, recorded_at=recorded_at)
+        if len(data) != offset + input_count * 10:
+            raise ValueError(f"'{path}' is truncated.")
+        replay.input_times.frombytes(data[offset:offset + input_count * 8])
+        replay.input_lanes.frombytes(data[offset + input_count * 8:])
+        if sys.byteorder != "little":
+            replay.input_times.byteswap()
+            replay.input_lanes.byteswap()
+        return replay
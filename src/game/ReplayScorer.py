@@ -0,0 +1,109 @@
+"""
+Judge recorded replays again without a display or audio, for instance after the timing windows changed, or to use
+replays as repeatable workloads.
+
+From the repository root:
+    python -m src.game.ReplayScorer replays/ [--beatmaps beatmaps/] [--perfect 40] [--great 80] [--good 130]
+                                              [--miss 200] [--repeat 1] [--json results.json]
+"""
+import argparse
+import json
+import os
+import time
+
+from src.beatmap_manager.ChartCache import ChartCache
+from src.game.JudgementEngine import JudgementEngine
+from src.game.Replay import Replay
+
+
+class ReplayScorer:
+    """
+    Run the judgement engine over replays, as fast as the inputs can be matched.
+    Charts are found by the hash stored in the replay, and loaded from the compiled chart cache.
+    """
+
+    def __init__(self, parent_folder="beatmaps/", chart_cache=None, **windows):
+        self.parent_folder = parent_folder
+        self.chart_cache = chart_cache or ChartCache()
+        self.windows = windows  # JudgementEngine timing windows, in seconds
+        self.charts = None  # {chart_hash: txt_path}, built on the first replay
+        self.hit_objects = {}  # Loaded charts, by hash
+
+    def index_charts(self):
+        self.charts = {}
+        for folder_path, _, file_names in os.walk(self.parent_folder):
+            for file_name in file_names:
+                if file_name.endswith('.txt'):
+                    txt_path = os.path.join(folder_path, file_name)
+                    self.charts[ChartCache.hash_file(txt_path)] = txt_path
+
+    def get_hit_objects(self, chart_hash):
+        if chart_hash not in self.hit_objects:
+            if self.charts is None:
+                self.index_charts()
+            if chart_hash not in self.charts:
+                raise KeyError(f"No chart under '{self.parent_folder}' has the hash {chart_hash.hex()}.")
+            self.hit_objects[chart_hash] = self.chart_cache.load(self.charts[chart_hash])
+        return self.hit_objects[chart_hash]
+
+    def score(self, replay):
+        """Return the JudgementEngine after judging every input of the replay."""
+        engine = JudgementEngine(self.get_hit_objects(replay.chart_hash), **self.windows)
+        for song_time, lane in zip(replay.input_times, replay.input_lanes):
+            engine.press(song_time, lane)
+        # Inputs are stamped with the song time of their frame or later, so one batch judges them like the game did
+        engine.update(float("inf"))
+        return engine
+
+
+def find_replays(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for folder_path, _, file_names in os.walk(path):
+                for file_name in sorted(file_names):
+                    if file_name.endswith('.rsr'):
+                        yield os.path.join(folder_path, file_name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Judge replays again with the given timing windows.")
+    parser.add_argument("paths", nargs="+", help="replay files or folders")
+    parser.add_argument("--beatmaps", default="beatmaps/")
+    parser.add_argument("--perfect", type=float, default=40, help="window in ms")
+    parser.add_argument("--great", type=float, default=80, help="window in ms")
+    parser.add_argument("--good", type=float, default=130, help="window in ms")
+    parser.add_argument("--miss", type=float, default=200, help="window in ms")
+    parser.add_argument("--repeat", type=int, default=1, help="score every replay this many times, for timing")
+    parser.add_argument("--json", help="write the results to this file")
+    arguments = parser.parse_args()
+
+    scorer = ReplayScorer(arguments.beatmaps, perfect_window=arguments.perfect / 1000,
+                          great_window=arguments.great / 1000, good_window=arguments.good / 1000,
+                          miss_window=arguments.miss / 1000)
+    results = {}
+    input_count = 0
+    start = time.perf_counter()
+    for path in find_replays(arguments.paths):
+        try:
+            replay = Replay.load(path)
+            for _ in range(arguments.repeat):
+                engine = scorer.score(replay)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Skipping '{path}': {e}")
+            continue
+        input_count += len(replay) * arguments.repeat
+        results[path] = engine.get_summary()
+        print(f"{path}: {results[path]['accuracy'] * 100:.2f} %, max combo {results[path]['max_combo']}")
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(results)} replays, {input_count} inputs judged in {elapsed:.2f} s "
+          f"({input_count / elapsed if elapsed else 0:.0f} inputs/s).")
+    if arguments.json:
+        with open(arguments.json, 'w') as json_file:
+            json.dump(results, json_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
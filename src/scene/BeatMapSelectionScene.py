@@ -2,7 +2,9 @@ import pygame
 
 from src.beatmap_manager.BeatMapExplorer import BeatMapExplorer
 from src.scene.Scene import Scene
+from src.ui.background import background_service
 from src.ui.button import GraphicButton
+from src.ui.dirty import dirty_rects
 from src.ui.label import Label
 
 
@@ -10,6 +12,7 @@ class BeatMapSelectionScreen(Scene):
     def __init__(self, app):
         super().__init__(app)
         self.name = "selection"
+        self.supports_dirty_rects = True
         self.beatmap_explorer = BeatMapExplorer(self.app, self.launch_beatmap)
         self.return_button = GraphicButton(40, self.app.DISPLAY_HEIGHT - 40, 64, 64)
         self.return_button.press_action = lambda e="main": self.app.switch_scene(e)
@@ -24,29 +27,42 @@ class BeatMapSelectionScreen(Scene):
             "creator": Label("", self.app.font32, info_color),
             "preview_time": Label("", self.app.font32, info_color)
         }
+        self.background = None
 
     def launch_beatmap(self, beatmap):
         self.app.music_player.stop()
         self.app.switch_scene("game")
 
     def update(self, dt):
+        # The background covers the whole screen, so a new one redraws everything
+        beatmap = self.app.beatmap_selected  # None when the library is empty
+        self.background = background_service.get(beatmap.bg_path) if beatmap is not None else None
+        dirty_rects.track(self, self.app.display.get_rect(), id(self.background))
         self.beatmap_explorer.update(dt)
         for button in self.buttons:
             button.update()
 
-        self.labels["beatmap_name"].update(f"name: {self.app.beatmap_selected.beatmap_name}")
-        self.labels["difficulty_name"].update(f"difficulty: {self.app.beatmap_selected.difficulty_name}")
-        self.labels["artist"].update(f"artist: {self.app.beatmap_selected.artist}")
-        self.labels["creator"].update(f"creator: {self.app.beatmap_selected.creator}")
-        self.labels["preview_time"].update(f"preview time: {self.app.beatmap_selected.preview_time:.2f} s")
-
+        # Place the labels before updating them, so the position they report to the dirty rects is the drawn one
         self.labels["beatmap_name"].rect.topleft = 60, self.app.DISPLAY_HEIGHT / 2 - 60
         self.labels["difficulty_name"].rect.topleft = 60, self.app.DISPLAY_HEIGHT / 2 - 30
         self.labels["artist"].rect.topleft = 60, self.app.DISPLAY_HEIGHT / 2
         self.labels["creator"].rect.topleft = 60, self.app.DISPLAY_HEIGHT / 2 + 30
         self.labels["preview_time"].rect.topleft = 60, self.app.DISPLAY_HEIGHT / 2 + 60
 
+        if beatmap is None:
+            self.labels["beatmap_name"].update("No beatmap found")
+            for key in ("difficulty_name", "artist", "creator", "preview_time"):
+                self.labels[key].update("")
+            return
+        self.labels["beatmap_name"].update(f"name: {beatmap.beatmap_name}")
+        self.labels["difficulty_name"].update(f"difficulty: {beatmap.difficulty_name}")
+        self.labels["artist"].update(f"artist: {beatmap.artist}")
+        self.labels["creator"].update(f"creator: {beatmap.creator}")
+        self.labels["preview_time"].update(f"preview time: {beatmap.preview_time:.2f} s")
+
     def draw(self, display):
+        if self.background is not None:
+            display.blit(self.background, (0, 0))
         self.beatmap_explorer.draw(display)
         for button in self.buttons:
             button.draw(display)
@@ -63,4 +79,7 @@ class BeatMapSelectionScreen(Scene):
                 self.app.switch_scene("main")
 
     def reset(self):
-        pass
\ No newline at end of file
+        pass
+
+    def close(self):
+        self.beatmap_explorer.thumbnail_cache.close()
\ No newline at end of file
@@ -1,19 +1,124 @@
-from src.scene.Scene import Scene
+import os
+
+import pygame
+
+from src.beatmap_manager.ChartCache import ChartCache
+from src.game.JudgementEngine import JUDGEMENT_NAMES, MISS, PENDING, JudgementEngine
+from src.game.NoteScheduler import NoteScheduler
+from src.game.Replay import Replay
+from src.scene.Scene import Scene, SceneUnavailable
+from src.ui.label import Label
+from src.ui.pacing import REALTIME, frame_pacer
 
 
 class GameScene(Scene):
+    LEAD_IN = 1.0  # Seconds before the song time 0
+    APPROACH_TIME = 1.0  # Seconds a note takes to fall to the hit line
+    MISS_WINDOW = 0.2
+    LANE_WIDTH = 96
+    NOTE_HEIGHT = 24
+    LANE_KEYS = {pygame.K_d: 0, pygame.K_f: 1, pygame.K_j: 2, pygame.K_k: 3}
+    REPLAY_FOLDER = "replays"
+
     def __init__(self, app):
         super().__init__(app)
         self.name = "game"
+        self.hit_objects = None
+        self.scheduler = None
+        self.judgement_engine = None
+        self.replay = None
+        self.song_time = 0.0
+        self.lane_count = 4
+        self.hit_line_y = self.app.DISPLAY_HEIGHT - 100
+        self.scroll_speed = self.hit_line_y / self.APPROACH_TIME  # Pixels per second
+
+        # Labels
+        info_color = (80, 120, 160)
+        self.combo_label = Label("", self.app.font32, info_color, 20, self.app.DISPLAY_HEIGHT / 2 - 40)
+        self.accuracy_label = Label("", self.app.font32, info_color, 20, self.app.DISPLAY_HEIGHT / 2)
+        self.judgement_label = Label("", self.app.font32, info_color, 20, self.app.DISPLAY_HEIGHT / 2 + 40)
+        self.labels = [self.combo_label, self.accuracy_label, self.judgement_label]
 
     def reset(self):
-        pass
+        beatmap = self.app.beatmap_selected
+        try:
+            self.hit_objects = self.app.beatmap_loader.load_hit_objects(beatmap)
+            chart_hash = ChartCache.hash_file(beatmap.txt_path)
+        except (OSError, ValueError) as e:
+            # The catalog is older than the file, which was deleted or broken since the last scan
+            self.app.beatmap_loader.invalidate_beatmap(beatmap)
+            self.hit_objects = self.replay = None
+            self.app.music_player.request_preview(beatmap.song_path, beatmap.preview_time)
+            raise SceneUnavailable(f"Could not load the difficulty '{beatmap.txt_path}': {e}") from e
+        self.scheduler = NoteScheduler(self.hit_objects, self.APPROACH_TIME, self.MISS_WINDOW)
+        self.judgement_engine = JudgementEngine(self.hit_objects, miss_window=self.MISS_WINDOW)
+        self.replay = Replay(chart_hash, beatmap.beatmap_id, beatmap.difficulty_name)
+        self.judgement_label.update("")
+        self.lane_count = max(4, max(self.hit_objects.lanes, default=0) + 1)
+        self.hit_line_y = self.app.DISPLAY_HEIGHT - 100
+        self.scroll_speed = self.hit_line_y / self.APPROACH_TIME
+        self.app.music_player.start_song(beatmap.song_path, self.LEAD_IN)
+        self.song_time = -self.LEAD_IN
+        self.scheduler.seek(self.song_time)
 
     def update(self, dt):
-        pass
+        frame_pacer.request(REALTIME)
+        # The notes follow the song being heard, not the frame count
+        self.song_time = self.app.music_player.update_song_clock(dt)
+        self.scheduler.update(self.song_time)
+
+        # The inputs of the frame are judged together
+        judgements = self.judgement_engine.update(self.song_time)
+        if judgements:
+            _, judgement, offset = judgements[-1]
+            self.judgement_label.update(JUDGEMENT_NAMES[judgement] if judgement == MISS
+                                        else f"{JUDGEMENT_NAMES[judgement]} {offset * 1000:+.0f} ms")
+        self.combo_label.update(f"combo: {self.judgement_engine.combo}")
+        self.accuracy_label.update(f"accuracy: {self.judgement_engine.get_accuracy() * 100:.2f} %")
+
+        if self.replay is not None and len(self.hit_objects) and self.judgement_engine.is_finished():
+            self.save_replay()
+
+    def save_replay(self):
+        """Save the inputs of the finished play, once."""
+        replay, self.replay = self.replay, None
+        path = os.path.join(self.REPLAY_FOLDER,
+                            f"{replay.beatmap_id} - {replay.difficulty_name} - {replay.recorded_at}.rsr")
+        try:
+            replay.save(path)
+        except OSError as e:
+            print(f"Could not save the replay '{path}': {e}")
 
     def draw(self, display):
-        pass
+        lanes_x = (self.app.DISPLAY_WIDTH - self.lane_count * self.LANE_WIDTH) / 2
+        pygame.draw.rect(display, (20, 16, 32), (lanes_x, 0, self.lane_count * self.LANE_WIDTH, self.app.DISPLAY_HEIGHT))
+        pygame.draw.line(display, (127, 64, 160), (lanes_x, self.hit_line_y),
+                         (lanes_x + self.lane_count * self.LANE_WIDTH, self.hit_line_y), 4)
+
+        # Only the notes of the scheduler window are drawn
+        times, lanes, durations = self.hit_objects.times, self.hit_objects.lanes, self.hit_objects.durations
+        results = self.judgement_engine.results
+        for index in self.scheduler.visible():
+            if self.scheduler.is_over(index) or results[index] not in (PENDING, MISS):
+                continue
+            y = self.hit_line_y - (times[index] - self.song_time) * self.scroll_speed
+            height = self.NOTE_HEIGHT + durations[index] * self.scroll_speed  # Holds stretch up to their end
+            pygame.draw.rect(display, (80, 54, 140),
+                             (lanes_x + lanes[index] * self.LANE_WIDTH + 4, y - height + self.NOTE_HEIGHT / 2,
+                              self.LANE_WIDTH - 8, height), border_radius=8)
+
+        for label in self.labels:
+            label.draw(display)
 
     def handle_event(self, event):
-        pass
+        # Inputs are timestamped on arrival and only queued, they are matched in update
+        if event.type == pygame.KEYDOWN and event.key in self.LANE_KEYS:
+            lane = self.LANE_KEYS[event.key]
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            lane = int((event.pos[0] - (self.app.DISPLAY_WIDTH - self.lane_count * self.LANE_WIDTH) / 2) // self.LANE_WIDTH)
+        else:
+            return
+        song_time = self.app.music_player.song_time_at(pygame.time.get_ticks())
+        self.judgement_engine.press(song_time, lane)
+        if self.replay is not None:
+            self.replay.add_input(song_time, lane)
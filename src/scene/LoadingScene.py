@@ -0,0 +1,52 @@
+import math
+
+from src.scene.Scene import Scene
+from src.ui.overlay import overlay_cache
+from src.ui.pacing import ANIMATION, frame_pacer
+from src.ui.text_cache import render_text
+
+
+class LoadingScreen(Scene):
+    """Shown from the first frame while the library is scanned in the background, App leaves it once it is ready."""
+    DOT_COUNT = 8
+    DOT_RADIUS = 6
+    SPINNER_RADIUS = 28
+    SPINNER_SPEED = 1.5  # Turns per second
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.name = "loading"
+        self.angle = 0.0
+
+    def reset(self):
+        self.angle = 0.0
+
+    def update(self, dt):
+        if self.app.loading_error is not None:
+            return  # The spinner stops, nothing moves anymore
+        frame_pacer.request(ANIMATION)
+        self.angle = (self.angle + dt * self.SPINNER_SPEED * 2 * math.pi) % (2 * math.pi)
+
+    def draw(self, display):
+        center_x, center_y = self.app.DISPLAY_WIDTH / 2, self.app.DISPLAY_HEIGHT / 2
+        if self.app.loading_error is not None:
+            for line, (text, color) in enumerate((("Could not load the beatmaps", (200, 80, 80)),
+                                                  (str(self.app.loading_error), (127, 127, 127)))):
+                text_surface = render_text(self.app.font24, text, True, color)
+                display.blit(text_surface, text_surface.get_rect(center=(center_x, center_y + line * 30)))
+            return
+        # The dots fade behind the leading one
+        for index in range(self.DOT_COUNT):
+            angle = self.angle - index * 2 * math.pi / self.DOT_COUNT
+            brightness = 255 - index * 200 // self.DOT_COUNT
+            dot = overlay_cache.dot(self.DOT_RADIUS, (brightness, brightness, brightness, 255))
+            display.blit(dot, (center_x + math.cos(angle) * self.SPINNER_RADIUS - self.DOT_RADIUS,
+                               center_y - 40 + math.sin(angle) * self.SPINNER_RADIUS - self.DOT_RADIUS))
+
+        done, total = self.app.import_progress
+        text = f"Importing beatmaps: {done}/{total}" if total else "Loading beatmaps"
+        text_surface = render_text(self.app.font24, text, True, (127, 127, 127))
+        display.blit(text_surface, text_surface.get_rect(center=(center_x, center_y + 30)))
+
+    def handle_event(self, event):
+        pass
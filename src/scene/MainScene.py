@@ -1,16 +1,17 @@
 import math
 from src.scene.Scene import Scene
+from src.ui.assets import assets
 from src.ui.button import GraphicButton
+from src.ui.pacing import ANIMATION, frame_pacer
+from src.ui.text_cache import render_text
 
 import pygame
 
 
 class DynamicButton(GraphicButton):
     def __init__(self, x, y, font, text="", icon_path=None):
-        self.icon = pygame.image.load(icon_path).convert_alpha() if icon_path else None
-        if self.icon:
-            self.icon = pygame.transform.scale(self.icon, (self.icon.get_width(), self.icon.get_height()))
-        self.base_size = self.icon.get_height() * 1.5
+        self.icon_asset = assets.image(icon_path)
+        self.base_size = self.icon_asset.value.get_height() * 1.5
         super().__init__(x, y, self.base_size, self.base_size)
         self.original_width = self.base_size
         self.base_height = self.base_size
@@ -19,17 +20,22 @@ class DynamicButton(GraphicButton):
         self.target_width = self.base_size
         self.velocity = 1000
 
-        original_text_surface = self.font.render(self.text, True, pygame.Color('white'))
+        original_text_surface = render_text(self.font, self.text, True, pygame.Color('white'))
         text_rect = original_text_surface.get_rect()
         self.hover_added_width = text_rect.width + 8
 
+    def get_draw_rect(self):
+        # Leave room for the corners of the rotating icon
+        return self.get_bounds().inflate(8, 8)
+
     def draw(self, display):
         super().draw(display)
 
+        icon = self.icon_asset.value
         content_y = self.y
-        icon_rect = self.icon.get_rect(center=(self.x, content_y))
-        icon_left_position_x = self.x - (self.icon.get_width() + self.width - self.original_width) / 2
-        icon_rect.topleft = (icon_left_position_x, content_y - self.icon.get_height() / 2)  # Center the icon vertically
+        icon_rect = icon.get_rect(center=(self.x, content_y))
+        icon_left_position_x = self.x - (icon.get_width() + self.width - self.original_width) / 2
+        icon_rect.topleft = (icon_left_position_x, content_y - icon.get_height() / 2)  # Center the icon vertically
 
         # Calculate the rotation factor based on current width
         percentage = (self.width - self.original_width) / self.hover_added_width
@@ -38,26 +44,25 @@ class DynamicButton(GraphicButton):
         rotation_angle = percentage * max_rotation_angle  # Calculate rotation angle
 
         # Rotate the icon
-        rotated_icon = pygame.transform.rotate(self.icon, -rotation_angle)  # Negative for clockwise rotation
+        rotated_icon = pygame.transform.rotate(icon, -rotation_angle)  # Negative for clockwise rotation
         rotated_icon_rect = rotated_icon.get_rect(center=icon_rect.center)
 
         # Draw the rotated icon
         display.blit(rotated_icon, rotated_icon_rect)
 
-        text_surf = self.font.render(self.text, True, pygame.Color('white'))
+        text_surf = render_text(self.font, self.text, True, pygame.Color('white'))
 
         if text_surf:
             cropped_width = self.width - self.base_size
-            cropped_surf = pygame.Surface((cropped_width, text_surf.get_height()), pygame.SRCALPHA)
 
-            # Blit the text to the cropped surface
-            cropped_surf.blit(text_surf, (0, 0))
+            # Only blit the part of the text uncovered by the button width, no intermediate surface needed
+            text_area = pygame.Rect(0, 0, cropped_width, text_surf.get_height())
 
-            text_rect = cropped_surf.get_rect()
-            text_rect.x = icon_left_position_x + self.icon.get_width()  # Position text next to the icon
+            text_rect = text_area.copy()
+            text_rect.x = icon_left_position_x + icon.get_width()  # Position text next to the icon
             text_rect.centery = content_y
 
-            display.blit(cropped_surf, text_rect)
+            display.blit(text_surf, text_rect, text_area)
 
 
 class InteractiveButtonMenu:
@@ -90,6 +95,7 @@ class InteractiveButtonMenu:
             current_x += button.width
 
             if button.width != button.target_width:
+                frame_pacer.request(ANIMATION)
                 width_diff = button.target_width - button.width
                 step = button.velocity * dt
                 if abs(width_diff) < step:  # Close enough to the target
@@ -112,6 +118,7 @@ class MainScreen(Scene):
         super().__init__(app)
         self.app = app
         self.name = "main"
+        self.supports_dirty_rects = True
 
         # Create the button menu
         self.button_menu = InteractiveButtonMenu(app)
@@ -1,7 +1,13 @@
+class SceneUnavailable(Exception):
+    """Raised by reset when the scene cannot be shown, the app then goes back to the selection."""
+
+
 class Scene:
     def __init__(self, app):
         self.app = app
         self.name = "Scene is a Parent Class !"
+        # True when everything the scene draws is tracked by the dirty rects, else every frame is fully redrawn
+        self.supports_dirty_rects = False
 
     def reset(self):
         raise NotImplementedError("Must be implement in children classes.")
@@ -14,3 +20,7 @@ class Scene:
 
     def handle_event(self, event):
         raise NotImplementedError("Must be implement in children classes.")
+
+    def close(self):
+        """Release what the scene holds outside of Python objects (workers, files), when the app exits."""
+        pass
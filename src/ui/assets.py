@@ -0,0 +1,121 @@
+import io
+import os
+from collections import OrderedDict
+
+import pygame
+
+from src.ui.atlas import ATLASES
+
+
+class Asset:
+    """Shared image, font or sound handed out by the asset manager. value is replaced when images are reloaded."""
+    __slots__ = ("key", "value", "references")
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.references = 0
+
+
+class AssetManager:
+    """
+    Single owner of the images, fonts and sounds loaded from files.
+
+    Assets are deduplicated by (kind, path, size or scale): asking twice for the same one returns the same Asset and
+    increments its reference count. Images are converted to the display format once, when loaded, and come from the
+    texture atlases when their folder is packed in one. Released assets with no reference left are kept in an LRU of
+    MAX_UNUSED entries, so a widget created again finds them, and the oldest ones are evicted.
+    """
+    MAX_UNUSED = 32
+
+    def __init__(self):
+        self.assets = {}  # Key -> Asset, referenced or not
+        self.unused = OrderedDict()  # Keys of the assets without references, the oldest released first
+        self.font_data = {}  # Font path -> file content, so every size of a font reads the file once
+        self.loads = 0
+
+    # [ACQUIRE]
+    def image(self, path, scale=1.0):
+        return self._acquire(("image", path, scale), lambda: self._load_image(path, scale))
+
+    def font(self, path, size):
+        """Font at a size, path None being pygame's default font."""
+        return self._acquire(("font", path, size), lambda: self._load_font(path, size))
+
+    def sound(self, path):
+        return self._acquire(("sound", path), lambda: pygame.mixer.Sound(path))
+
+    def _acquire(self, key, load):
+        asset = self.assets.get(key)
+        if asset is None:
+            asset = self.assets[key] = Asset(key, load())
+            self.loads += 1
+        self.unused.pop(key, None)
+        asset.references += 1
+        return asset
+
+    def release(self, asset):
+        """Drop a reference to an asset, it stays cached until MAX_UNUSED other assets were released after it."""
+        asset.references -= 1
+        if asset.references <= 0:
+            asset.references = 0
+            self.unused[asset.key] = None
+            while len(self.unused) > self.MAX_UNUSED:
+                key, _ = self.unused.popitem(last=False)
+                del self.assets[key]
+
+    def collect(self):
+        """Evict every asset without references."""
+        for key in self.unused:
+            del self.assets[key]
+        self.unused.clear()
+
+    # [LOADING]
+    def _load_image(self, path, scale):
+        image = self._load_from_atlas(path)
+        if image is None:
+            image = pygame.image.load(path)
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+        if scale != 1.0:
+            image = pygame.transform.scale(image, (int(image.get_width() * scale), int(image.get_height() * scale)))
+        return image
+
+    @staticmethod
+    def _load_from_atlas(path):
+        """The image from the atlas packing its folder, or None if no atlas does."""
+        name, extension = os.path.splitext(path)
+        if extension.lower() != '.png':
+            return None
+        for atlas in ATLASES:
+            relative_name = os.path.relpath(name, atlas.folder)
+            if not relative_name.startswith(os.pardir):
+                try:
+                    return atlas.get(relative_name.replace(os.sep, "/"))
+                except KeyError:
+                    return None
+        return None
+
+    def _load_font(self, path, size):
+        if path is None:
+            return pygame.font.Font(None, size)
+        if path not in self.font_data:
+            with open(path, 'rb') as font_file:
+                self.font_data[path] = font_file.read()
+        return pygame.font.Font(io.BytesIO(self.font_data[path]), size)
+
+    def reload(self):
+        """
+        Load the images again in the format of a new display, after it was recreated. The Assets are kept, so their
+        holders see the new surfaces. Fonts and sounds do not depend on the display and are left as they are.
+        """
+        self.collect()
+        for atlas in ATLASES:
+            atlas.unload()
+        for key, asset in self.assets.items():
+            if key[0] == "image":
+                asset.value = self._load_image(*key[1:])
+                self.loads += 1
+
+
+assets = AssetManager()
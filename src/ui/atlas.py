@@ -0,0 +1,166 @@
+"""
+Texture atlases: the images of an asset folder packed into one image and a JSON index of their regions, so a UI
+showing many small images reads a single file instead of decoding every image.
+
+Pack every atlas from the repository root (they are otherwise packed the first time they are used):
+    python -m src.ui.atlas [--force]
+"""
+import argparse
+import json
+import os
+import time
+
+import pygame
+
+
+class TextureAtlas:
+    """
+    The PNG images under folder, packed into atlas_folder/<name>.rgba with their regions in <name>.json.
+
+    The atlas is stored as raw RGBA pixels: it is several times bigger than a PNG, but reading it costs a fraction of
+    decoding one. Images are named by their path relative to folder without the extension, e.g. "FR" or
+    "details/bpm". Nothing is read before the first get, which loads the atlas once and hands out subsurfaces of it.
+    The index records the mtime and size of every source, the atlas is packed again when an image was added, removed
+    or edited.
+    """
+    VERSION = 1
+    MAX_WIDTH = 2048
+    PADDING = 1  # Transparent pixels between the images, so scaling one never samples its neighbors
+
+    def __init__(self, name, folder, atlas_folder=".cache/atlases"):
+        self.name = name
+        self.folder = folder
+        self.image_path = os.path.join(atlas_folder, f"{name}.rgba")
+        self.index_path = os.path.join(atlas_folder, f"{name}.json")
+        self.atlas = None
+        self.regions = {}  # Image name -> (x, y, width, height) in the atlas
+        self.images = {}  # Subsurfaces handed out, by name
+
+    def get(self, image_name):
+        """Return the image as a subsurface of the atlas, raising KeyError if the folder has no such image."""
+        image = self.images.get(image_name)
+        if image is None:
+            if self.atlas is None:
+                self.load()
+            image = self.images[image_name] = self.atlas.subsurface(self.regions[image_name])
+        return image
+
+    def unload(self):
+        """Forget the atlas, read again on the next get, after the display it was converted for was recreated."""
+        self.atlas = None
+        self.images = {}
+
+    def names(self):
+        if self.atlas is None:
+            self.load()
+        return sorted(self.regions)
+
+    # [SOURCES]
+    def list_sources(self):
+        """Return {image name: [mtime_ns, size]} of the PNG images under the folder."""
+        sources = {}
+        for folder_path, _, file_names in os.walk(self.folder):
+            for file_name in file_names:
+                if file_name.lower().endswith('.png'):
+                    path = os.path.join(folder_path, file_name)
+                    name = os.path.splitext(os.path.relpath(path, self.folder))[0].replace(os.sep, "/")
+                    source_stat = os.stat(path)
+                    sources[name] = [source_stat.st_mtime_ns, source_stat.st_size]
+        return sources
+
+    def read_index(self):
+        try:
+            with open(self.index_path, 'r') as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return None
+        return index if index.get("version") == self.VERSION else None
+
+    def is_up_to_date(self, index=None, sources=None):
+        index = index or self.read_index()
+        return (index is not None and os.path.exists(self.image_path)
+                and index["sources"] == (sources or self.list_sources()))
+
+    # [LOADING]
+    def load(self):
+        """Read the atlas, packing it first if it is missing or stale."""
+        index = self.read_index()
+        sources = self.list_sources()
+        atlas = None
+        if self.is_up_to_date(index, sources):
+            with open(self.image_path, 'rb') as image_file:
+                pixels = image_file.read()
+            width, height = index["size"]
+            if len(pixels) == width * height * 4:  # Else truncated, packed again
+                atlas = pygame.image.frombuffer(pixels, (width, height), "RGBA")
+        if atlas is None:
+            atlas, index = self.pack(sources)
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        self.atlas = atlas
+        self.regions = {name: tuple(region) for name, region in index["regions"].items()}
+        self.images = {}
+
+    def pack(self, sources=None):
+        """
+        Pack the images of the folder on shelves, the tallest first, and write the atlas and its index.
+        Returns (atlas surface, index).
+        """
+        sources = sources or self.list_sources()
+        images = {name: pygame.image.load(os.path.join(self.folder, f"{name}.png")) for name in sources}
+        order = sorted(images, key=lambda name: (-images[name].get_height(), -images[name].get_width(), name))
+
+        regions = {}
+        x = y = shelf_height = 0
+        for name in order:
+            width, height = images[name].get_size()
+            if x and x + width > self.MAX_WIDTH:
+                x, y, shelf_height = 0, y + shelf_height + self.PADDING, 0
+            regions[name] = (x, y, width, height)
+            x += width + self.PADDING
+            shelf_height = max(shelf_height, height)
+
+        atlas_width = max((region[0] + region[2] for region in regions.values()), default=1)
+        atlas_height = max((region[1] + region[3] for region in regions.values()), default=1)
+        atlas = pygame.Surface((atlas_width, atlas_height), pygame.SRCALPHA)
+        atlas.fill((0, 0, 0, 0))
+        for name, region in regions.items():
+            atlas.blit(images[name], region[:2])
+
+        index = {"version": self.VERSION, "size": [atlas_width, atlas_height], "sources": sources, "regions": regions}
+        try:
+            os.makedirs(os.path.dirname(self.image_path), exist_ok=True)
+            # The index goes last: if packing stops in between, the old index does not match the sources anymore
+            for path, write in ((self.image_path, lambda file: file.write(pygame.image.tobytes(atlas, "RGBA"))),
+                                (self.index_path, lambda file: file.write(json.dumps(index).encode()))):
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, 'wb') as output_file:
+                    write(output_file)
+                os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not write the '{self.name}' atlas: {e}")
+        return atlas, index
+
+
+flag_atlas = TextureAtlas("flags", "assets/textures/Flags")
+icon_atlas = TextureAtlas("icons", "assets/textures/icons")
+ATLASES = (flag_atlas, icon_atlas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the texture atlases.")
+    parser.add_argument("--force", action="store_true", help="pack again the up to date atlases")
+    arguments = parser.parse_args()
+
+    for atlas in ATLASES:
+        start = time.perf_counter()
+        if not arguments.force and atlas.is_up_to_date():
+            print(f"'{atlas.name}' is up to date.")
+            continue
+        surface, index = atlas.pack()
+        print(f"'{atlas.name}': {len(index['regions'])} images in {surface.get_width()}x{surface.get_height()}, "
+              f"packed in {time.perf_counter() - start:.2f} s.")
+
+
+if __name__ == "__main__":
+    main()
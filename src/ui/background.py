@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from src.ui.pacing import BACKGROUND, frame_pacer
+
+
+def resize_and_crop_image(image, target_size):
+    """Scale an image to cover target_size, keeping its ratio, and crop the overflow evenly on both sides."""
+    image_ratio = image.get_width() / image.get_height()
+    target_ratio = target_size[0] / target_size[1]
+    if image_ratio > target_ratio:
+        new_height = target_size[1]
+        new_width = int(new_height * image_ratio)
+    else:
+        new_width = target_size[0]
+        new_height = int(new_width / image_ratio)
+    resized_image = pygame.transform.scale(image, (new_width, new_height))
+    x_offset = (new_width - target_size[0]) // 2
+    y_offset = (new_height - target_size[1]) // 2
+    return resized_image.subsurface((x_offset, y_offset, target_size[0], target_size[1]))
+
+
+class BackgroundService:
+    """
+    Beatmap backgrounds decoded and scaled to the display size off the UI thread.
+
+    Images are loaded, cropped to the display ratio and dimmed on worker threads. update, called every frame, converts
+    the finished ones to the display format and stores them in an LRU bounded by memory. Prefetched paths are queued
+    behind the requested ones, and prefetches that are no longer wanted are cancelled before they start. Changing the
+    target size drops the cache and ignores the decodes still running for the old size.
+    """
+    DIM = (110, 110, 110)  # Multiplier applied to the backgrounds so the texts drawn over them stay readable
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_workers=2):
+        self.max_bytes = max_bytes
+        self.target_size = (1280, 720)
+        self.surfaces = OrderedDict()  # path -> display-ready surface, or None when the image cannot be loaded
+        self.size_bytes = 0
+        self.futures = {}  # path -> future of the decode
+        self.prefetched = set()  # Paths queued by prefetch only
+        self.generation = 0  # Incremented when the target size changes
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background")
+
+    def get(self, path):
+        """Return the background surface of path, or None while it is being decoded."""
+        if path in self.surfaces:
+            self.surfaces.move_to_end(path)
+            return self.surfaces[path]
+        self.request(path)
+        return None
+
+    def request(self, path):
+        self.prefetched.discard(path)
+        if path not in self.surfaces and path not in self.futures:
+            self.futures[path] = self.executor.submit(self._decode, path, self.target_size, self.generation)
+
+    def prefetch(self, paths):
+        """Decode paths in the background, cancelling the previous prefetches that are not in paths anymore."""
+        wanted = set(paths)
+        for path in self.prefetched - wanted:
+            future = self.futures.get(path)
+            if future is not None and future.cancel():
+                del self.futures[path]
+        self.prefetched &= wanted
+        for path in paths:
+            if path not in self.surfaces and path not in self.futures:
+                self.futures[path] = self.executor.submit(self._decode, path, self.target_size, self.generation)
+                self.prefetched.add(path)
+
+    @classmethod
+    def _decode(cls, path, target_size, generation):
+        """Worker side: load, crop and dim an image, the display conversion is left to the main thread."""
+        try:
+            image = pygame.image.load(path)
+            surface = resize_and_crop_image(image, target_size).copy()  # Own pixels, not a view of the scaled image
+        except (pygame.error, OSError, ValueError) as e:
+            # Unreadable file, or an image too thin to be scaled to the display
+            print(f"Could not load the background '{path}': {e}")
+            return generation, None
+        surface.fill(cls.DIM, special_flags=pygame.BLEND_RGB_MULT)
+        return generation, surface
+
+    def update(self):
+        """Store the decodes that finished since the last frame."""
+        if self.futures:
+            frame_pacer.request(BACKGROUND)
+        for path in [path for path, future in self.futures.items() if future.done()]:
+            future = self.futures.pop(path)
+            self.prefetched.discard(path)
+            if future.cancelled():
+                continue
+            generation, surface = future.result()
+            if generation != self.generation:
+                continue  # Decoded for another display size
+            if surface is not None and pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            self.surfaces[path] = surface
+            self.size_bytes += self._surface_bytes(surface)
+            self._evict()
+
+    def set_target_size(self, size):
+        """Decode the backgrounds for another display size, after the resolution changed."""
+        size = tuple(size)
+        if size == self.target_size:
+            return
+        self.target_size = size
+        self.generation += 1
+        self.clear()
+
+    def clear(self):
+        for future in self.futures.values():
+            future.cancel()
+        self.futures.clear()
+        self.prefetched.clear()
+        self.surfaces.clear()
+        self.size_bytes = 0
+
+    def _evict(self):
+        while self.size_bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.size_bytes -= self._surface_bytes(surface)
+
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_bytesize() * surface.get_width() * surface.get_height() if surface is not None else 0
+
+
+background_service = BackgroundService()
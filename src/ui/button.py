@@ -1,5 +1,7 @@
 import pygame
 
+from src.ui.dirty import dirty_rects
+
 
 class Button:
     def __init__(self, x, y, width, height, press_action=None, unpress_action=None, offset_x=0, offset_y=0):
@@ -36,6 +38,18 @@ class GraphicButton(Button):
         self.hover_color = hover_color
         self.border_radius = border_radius
 
+    def update(self):
+        super().update()
+        dirty_rects.track(self, self.get_draw_rect(), self.get_draw_state())
+
+    def get_draw_rect(self):
+        """Region covered by draw, reported to the dirty rects."""
+        return self.get_bounds()
+
+    def get_draw_state(self):
+        """Everything besides the position that changes what draw shows."""
+        return self.is_hovered(), self.color, self.hover_color
+
     def draw(self, display):
         current_color = self.hover_color if self.is_hovered() else self.color
         pygame.draw.rect(display, current_color, self.get_bounds(), border_radius=self.border_radius)
\ No newline at end of file
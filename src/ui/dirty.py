@@ -0,0 +1,86 @@
+import pygame
+
+
+class DirtyRects:
+    """
+    Screen regions to redraw for the next frame.
+
+    Widgets declare every frame, from their update, the rect they are going to draw and the state that decides what
+    it looks like. The declarations are compared with the ones of the previous frame: a widget that moved, changed
+    state, appeared or stopped being drawn makes its old and new rects dirty. Anything drawn without being tracked
+    must never change, or the scene has to ask for full redraws.
+    """
+    # Past this part of the screen, redrawing everything is cheaper than clipping many regions
+    FULL_REDRAW_RATIO = 0.5
+    MAX_RECTS = 16
+    # Up to this much area around the rects, one draw clipped to their union is cheaper than one draw per rect
+    UNION_RATIO = 1.5
+
+    def __init__(self):
+        self.enabled = False
+        self.full_redraw = True
+        self.rects = []
+        self.previous = {}  # Widget -> (rect, state) drawn in the last frame
+        self.current = {}
+
+    def track(self, widget, rect, state=None):
+        """Declare that widget will be drawn inside rect this frame, looking as described by state."""
+        if self.enabled:
+            self.current[widget] = (pygame.Rect(rect), state)
+
+    def mark(self, rect):
+        """Mark a region dirty, for changes that are not tracked."""
+        if self.enabled:
+            self.rects.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        """Ask for a full redraw, after a scene switch or when the display was recreated."""
+        self.full_redraw = True
+
+    def collect(self, screen_rect):
+        """
+        Compare the declarations of this frame with the previous one.
+        Returns the merged dirty rects clipped to the screen, or None when the whole screen must be redrawn.
+        """
+        rects = self.rects
+        for widget, drawn in self.current.items():
+            previous = self.previous.pop(widget, None)
+            if previous != drawn:
+                rects.append(drawn[0])
+                if previous is not None:
+                    rects.append(previous[0])
+        for rect, _ in self.previous.values():
+            rects.append(rect)
+
+        self.previous, self.current, self.rects = self.current, {}, []
+        full_redraw, self.full_redraw = self.full_redraw, False
+        if full_redraw:
+            return None
+
+        rects = self._merge([rect.clip(screen_rect) for rect in rects if rect.colliderect(screen_rect)])
+        if len(rects) > self.MAX_RECTS or (sum(rect.width * rect.height for rect in rects)
+                                           > screen_rect.width * screen_rect.height * self.FULL_REDRAW_RATIO):
+            return None
+        return rects
+
+    def passes(self, rects):
+        """Clip regions to draw the dirty rects in: their union when it is compact, else each rect on its own."""
+        union = rects[0].unionall(rects[1:])
+        if union.width * union.height <= sum(rect.width * rect.height for rect in rects) * self.UNION_RATIO:
+            return [union]
+        return rects
+
+    @staticmethod
+    def _merge(rects):
+        """Union the overlapping rects, so no region is drawn twice."""
+        merged = []
+        for rect in rects:
+            overlapping = rect.collidelist(merged)
+            while overlapping != -1:
+                rect = rect.union(merged.pop(overlapping))
+                overlapping = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+
+dirty_rects = DirtyRects()
@@ -1,4 +1,6 @@
-import pygame
+from src.ui.assets import assets
+from src.ui.dirty import dirty_rects
+from src.ui.text_cache import render_text
 
 
 class Input:
@@ -22,12 +24,16 @@ class SearchInput(Input):
     def __init__(self, font, image_path, x, y):
         super().__init__()
         self.font = font
-        self.image = pygame.image.load(image_path)
-        self.image = pygame.transform.scale(self.image, (self.image.get_width()*0.4, self.image.get_height()*0.4))
+        self.image = assets.image(image_path, 0.4)
         self.x = x
         self.y = y
 
+    def update(self):
+        text_surface = render_text(self.font, self.text, True, (255, 255, 255))
+        icon_rect = self.image.value.get_rect(topleft=(self.x - self.image.value.get_width(), self.y - 6))
+        dirty_rects.track(self, icon_rect.union(text_surface.get_rect(topleft=(self.x, self.y))), self.text)
+
     def draw(self, display):
-        display.blit(self.image, (self.x-self.image.get_width(), self.y - 6))
-        text_surface = self.font.render(self.text, True, (255, 255, 255))
+        display.blit(self.image.value, (self.x-self.image.value.get_width(), self.y - 6))
+        text_surface = render_text(self.font, self.text, True, (255, 255, 255))
         display.blit(text_surface, (self.x, self.y))
\ No newline at end of file
@@ -0,0 +1,44 @@
+import pygame
+
+
+class OverlayCache:
+    """
+    Pre-baked transparent surfaces (panel backgrounds, button plates, indicator dots).
+    Each surface is built once per size and color and reused by every frame, the cache is cleared when the display
+    is recreated.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+        self.builds = 0
+
+    def panel(self, width, height, color):
+        """Return a width x height surface filled with an RGBA color."""
+        key = ("panel", int(width), int(height), tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((int(width), int(height)), pygame.SRCALPHA)
+            surface.fill(color)
+            surface = self._store(key, surface)
+        return surface
+
+    def dot(self, radius, color):
+        """Return a transparent surface holding a filled circle, to blit centered on the dot position."""
+        key = ("dot", int(radius), tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((int(radius) * 2 + 1, int(radius) * 2 + 1), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (int(radius), int(radius)), radius)
+            surface = self._store(key, surface)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def _store(self, key, surface):
+        self.builds += 1
+        self.surfaces[key] = surface
+        return surface
+
+
+overlay_cache = OverlayCache()
@@ -0,0 +1,113 @@
+import math
+import time
+from array import array
+
+import pygame
+
+# What the next frame needs, the highest level requested during a frame wins
+IDLE, BACKGROUND, ANIMATION, REALTIME = range(4)
+LEVEL_NAMES = ("idle", "background", "animation", "realtime")
+
+
+class FramePacer:
+    """
+    Frame scheduler of the main loop, replacing a fixed clock.tick(MAX_FPS).
+
+    Widgets call request every frame they need the next one soon: REALTIME for gameplay, ANIMATION while something
+    moves on its own, BACKGROUND while waiting on a worker (decodes, previews). A frame nobody asked for is IDLE.
+    tick then waits accordingly before the next frame:
+    - REALTIME: MAX_FPS, sleeping until SPIN_MARGIN before the deadline and spinning the rest, for a low jitter,
+    - ANIMATION: MAX_FPS, sleeping,
+    - BACKGROUND: BACKGROUND_FPS, waking early on any event,
+    - IDLE: blocked on pygame.event.wait, IDLE_TIMEOUT at most so the labels and the config still refresh.
+    An unfocused window never goes above BACKGROUND outside gameplay. The events the waits woke on are handed back by
+    take_events, in order, before the ones still queued.
+    """
+    BACKGROUND_FPS = 30
+    IDLE_TIMEOUT = 0.5
+    SPIN_MARGIN = 0.002  # Seconds the sleep ends early by, more than its usual overshoot
+    CAPACITY = 240  # Frames kept for the frame-time statistics
+    STATS_INTERVAL = 0.5
+
+    def __init__(self):
+        self.level = ANIMATION  # Requested for the next frame, the first frames draw at full rate
+        self.frame_level = ANIMATION  # Level the current frame was paced at
+        self.frame_start = time.perf_counter()
+        self.events = []
+        self.frame_times = array('d', bytes(8 * self.CAPACITY))
+        self.frame_levels = array('B', bytes(self.CAPACITY))
+        self.frame_count = 0
+        self.stats = (0.0, 0.0)  # Mean and standard deviation of the frame time at the current level, in seconds
+        self.stats_time = 0.0
+
+    def request(self, level):
+        if level > self.level:
+            self.level = level
+
+    def tick(self, clock, max_fps):
+        """Wait for the next frame as the requested level allows, and return the frame time in seconds."""
+        level = self.level
+        if level < REALTIME and not pygame.key.get_focused():
+            level = min(level, BACKGROUND)
+        self.level = IDLE
+        self.frame_level = level
+
+        if level >= ANIMATION:
+            self._sleep_until(self.frame_start + 1 / max_fps, spin=level == REALTIME)
+        else:
+            period = 1 / self.BACKGROUND_FPS if level == BACKGROUND else self.IDLE_TIMEOUT
+            self._wait_event(self.frame_start + period)
+
+        now = time.perf_counter()
+        frame_time = now - self.frame_start
+        self.frame_start = now
+        clock.tick()  # Keeps get_fps meaningful
+        self._record(frame_time, level, now)
+        return frame_time
+
+    def take_events(self):
+        events, self.events = self.events, []
+        return events
+
+    @classmethod
+    def _sleep_until(cls, deadline, spin):
+        remaining = deadline - time.perf_counter()
+        if spin:
+            if remaining > cls.SPIN_MARGIN:
+                time.sleep(remaining - cls.SPIN_MARGIN)
+            while time.perf_counter() < deadline:
+                pass
+        elif remaining > 0:
+            time.sleep(remaining)
+
+    def _wait_event(self, deadline):
+        timeout = int((deadline - time.perf_counter()) * 1000)
+        # A timeout of 0 waits forever
+        event = pygame.event.wait(timeout) if timeout > 0 else pygame.event.poll()
+        if event.type != pygame.NOEVENT:
+            self.events.append(event)
+
+    # [STATISTICS]
+    def _record(self, frame_time, level, now):
+        slot = self.frame_count % self.CAPACITY
+        self.frame_times[slot] = frame_time
+        self.frame_levels[slot] = level
+        self.frame_count += 1
+        if now - self.stats_time >= self.STATS_INTERVAL:
+            self.stats_time = now
+            self._refresh_stats(level)
+
+    def _refresh_stats(self, level):
+        count = min(self.frame_count, self.CAPACITY)
+        samples = [self.frame_times[slot] for slot in range(count) if self.frame_levels[slot] == level]
+        if not samples:
+            return
+        mean = sum(samples) / len(samples)
+        self.stats = (mean, math.sqrt(sum((sample - mean) ** 2 for sample in samples) / len(samples)))
+
+    def describe(self):
+        mean, deviation = self.stats
+        return f"{LEVEL_NAMES[self.frame_level]}, {mean * 1000:.2f} ms, jitter {deviation * 1000:.2f} ms"
+
+
+frame_pacer = FramePacer()
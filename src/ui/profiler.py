@@ -0,0 +1,187 @@
+import json
+import os
+import time
+from array import array
+
+import pygame
+
+from src.ui.dirty import dirty_rects
+from src.ui.overlay import overlay_cache
+from src.ui.pacing import ANIMATION, frame_pacer
+from src.ui.text_cache import render_text, text_cache
+
+# Timed sections of a frame, scene_update and scene_draw being nested in update and draw
+SECTIONS = ("events", "music", "scene_update", "update", "scene_draw", "draw", "display")
+EVENTS, MUSIC, SCENE_UPDATE, UPDATE, SCENE_DRAW, DRAW, DISPLAY = range(len(SECTIONS))
+
+
+class FrameProfiler:
+    """
+    Per-frame timings of the main loop sections, kept in fixed-size ring buffers.
+
+    Every frame writes its start, duration and section timings in preallocated arrays, so recording allocates nothing
+    and can stay on. The overlay shows a scrolling frame-time graph, updated one column per frame, with p50/p99/max,
+    the mean time of every section and the text cache counters, refreshed a few times per second. The buffers can be
+    dumped as a Chrome trace (chrome://tracing, Perfetto) for offline analysis.
+    """
+    CAPACITY = 1024
+    STATS_FRAMES = 240  # Frames the percentiles are computed over
+    STATS_INTERVAL = 0.25  # Seconds between two refreshes of the percentiles
+    GRAPH_WIDTH, GRAPH_HEIGHT = 240, 80
+    PANEL_WIDTH = 420  # Wider than the graph, for the text lines
+    GRAPH_SCALE = 1 / 30  # Seconds shown by the full graph height
+    TRACE_FOLDER = "profiles"
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.visible = False
+        section_count = len(SECTIONS)
+        self.frame_starts = array('d', bytes(8 * capacity))
+        self.frame_times = array('d', bytes(8 * capacity))
+        self.section_starts = array('d', bytes(8 * capacity * section_count))
+        self.section_times = array('d', bytes(8 * capacity * section_count))
+        self.frame_scenes = [""] * capacity
+        self.open_sections = array('d', bytes(8 * section_count))  # Start of the running sections
+        self.frame_count = 0
+        self.slot = 0
+        self.frame_start = 0.0
+
+        self.stats = (0.0, 0.0, 0.0)  # p50, p99, max frame time
+        self.section_means = [0.0] * section_count
+        self.lines = []  # Text of the overlay, formatted when the stats are refreshed
+        self._format_lines()
+        self.stats_time = 0.0
+        self.graph = None
+        self.rect = pygame.Rect(8, 0, self.PANEL_WIDTH, self.GRAPH_HEIGHT + 24 + 18 * (section_count + 2))
+
+    # [RECORDING]
+    def begin_frame(self, scene_name=""):
+        self.slot = self.frame_count % self.capacity
+        base = self.slot * len(SECTIONS)
+        for index in range(base, base + len(SECTIONS)):
+            self.section_times[index] = 0.0
+        self.frame_scenes[self.slot] = scene_name
+        self.frame_start = time.perf_counter()
+
+    def begin(self, section):
+        self.open_sections[section] = time.perf_counter()
+
+    def end(self, section):
+        index = self.slot * len(SECTIONS) + section
+        start = self.open_sections[section]
+        self.section_starts[index] = start
+        self.section_times[index] += time.perf_counter() - start
+
+    def end_frame(self):
+        now = time.perf_counter()
+        self.frame_starts[self.slot] = self.frame_start
+        self.frame_times[self.slot] = now - self.frame_start
+        self.frame_count += 1
+        if self.visible:
+            self._scroll_graph(self.frame_times[self.slot])
+            if now - self.stats_time >= self.STATS_INTERVAL:
+                self.stats_time = now
+                self._refresh_stats()
+
+    def _recent_slots(self, count):
+        """Ring buffer slots of the last count frames, oldest first."""
+        count = min(count, self.frame_count, self.capacity)
+        return [(self.frame_count - count + offset) % self.capacity for offset in range(count)]
+
+    def _refresh_stats(self):
+        slots = self._recent_slots(self.STATS_FRAMES)
+        if not slots:
+            return
+        frame_times = sorted(self.frame_times[slot] for slot in slots)
+        self.stats = (frame_times[len(frame_times) // 2], frame_times[min(len(frame_times) - 1,
+                                                                          int(len(frame_times) * 0.99))],
+                      frame_times[-1])
+        for section in range(len(SECTIONS)):
+            self.section_means[section] = sum(self.section_times[slot * len(SECTIONS) + section]
+                                              for slot in slots) / len(slots)
+        self._format_lines()
+
+    def _format_lines(self):
+        """
+        Format the stats for the overlay, once per refresh. The values are rounded so the lines often repeat, and the
+        shared text cache does not fill up with strings shown for a quarter of a second.
+        """
+        p50, p99, maximum = self.stats
+        lines = [f"frame p50 {p50 * 1000:.1f}  p99 {p99 * 1000:.1f}  max {maximum * 1000:.1f} ms"]
+        lines += [f"{name} {mean * 1000:.1f} ms" for name, mean in zip(SECTIONS, self.section_means)]
+        text_stats = text_cache.stats()
+        lines.append(f"text cache {text_stats['hit_rate']:.0%} hits  {text_stats['entries']} entries  "
+                     f"{text_stats['evictions']} evictions")
+        self.lines = lines
+
+    # [OVERLAY]
+    def toggle(self):
+        self.visible = not self.visible
+        self.graph = None  # Rebuilt from the buffers when shown again
+        dirty_rects.invalidate()
+
+    def track(self):
+        """Declare the overlay to the dirty rects, from the update, since it changes every frame."""
+        if self.visible:
+            dirty_rects.mark(self.rect)
+            frame_pacer.request(ANIMATION)  # The graph scrolls every frame
+
+    def _build_graph(self):
+        self.graph = pygame.Surface((self.GRAPH_WIDTH, self.GRAPH_HEIGHT), pygame.SRCALPHA)
+        self.graph.fill((0, 0, 0, 0))
+        for slot in self._recent_slots(self.GRAPH_WIDTH):
+            self._scroll_graph(self.frame_times[slot])
+
+    def _scroll_graph(self, frame_time):
+        """Shift the graph by one column and draw the newest frame in the last one."""
+        if self.graph is None:
+            return
+        self.graph.scroll(-1, 0)
+        x = self.GRAPH_WIDTH - 1
+        self.graph.fill((0, 0, 0, 0), (x, 0, 1, self.GRAPH_HEIGHT))
+        height = min(self.GRAPH_HEIGHT, int(frame_time / self.GRAPH_SCALE * self.GRAPH_HEIGHT))
+        color = (80, 200, 120) if frame_time < 1 / 60 else (230, 180, 60) if frame_time < 1 / 30 else (230, 70, 70)
+        self.graph.fill(color, (x, self.GRAPH_HEIGHT - height, 1, height))
+
+    def draw(self, display, font):
+        if not self.visible:
+            return
+        if self.graph is None:
+            self._build_graph()
+        self.rect.bottomleft = 8, display.get_height() - 88  # Above the return button, clear of the scene labels
+
+        display.blit(overlay_cache.panel(self.rect.width, self.rect.height, (0, 0, 0, 180)), self.rect)
+        graph_rect = pygame.Rect(self.rect.x + 8, self.rect.y + 8, self.GRAPH_WIDTH, self.GRAPH_HEIGHT)
+        # 60 and 30 FPS marks
+        for frame_time in (1 / 60, 1 / 30):
+            y = graph_rect.bottom - int(frame_time / self.GRAPH_SCALE * self.GRAPH_HEIGHT)
+            pygame.draw.line(display, (90, 90, 90), (graph_rect.left, y), (graph_rect.right, y))
+        display.blit(self.graph, graph_rect)
+
+        y = graph_rect.bottom + 8
+        for line in self.lines:
+            display.blit(render_text(font, line, True, (200, 200, 200)), (self.rect.x + 8, y))
+            y += 18
+
+    # [TRACE]
+    def dump_trace(self, path=None):
+        """Write the frames held by the buffers as a Chrome trace JSON file, returns its path."""
+        if path is None:
+            os.makedirs(self.TRACE_FOLDER, exist_ok=True)
+            path = os.path.join(self.TRACE_FOLDER, f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+        events = []
+        for slot in self._recent_slots(self.capacity):
+            events.append({"name": "frame", "ph": "X", "pid": 0, "tid": 0, "ts": self.frame_starts[slot] * 1e6,
+                           "dur": self.frame_times[slot] * 1e6, "args": {"scene": self.frame_scenes[slot]}})
+            for section, name in enumerate(SECTIONS):
+                index = slot * len(SECTIONS) + section
+                if self.section_times[index]:
+                    events.append({"name": name, "ph": "X", "pid": 0, "tid": 0,
+                                   "ts": self.section_starts[index] * 1e6, "dur": self.section_times[index] * 1e6})
+        with open(path, 'w') as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        return path
+
+
+profiler = FrameProfiler()
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces shared by every widget.
+    Entries are keyed by font, text, antialias and color, and the least recently used ones are evicted once the
+    surfaces exceed the memory budget. The returned surfaces are shared, callers must not draw on them.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, antialias, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        self.size_bytes += self._surface_bytes(surface)
+        self._evict()
+        return surface
+
+    def set_budget(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        self.surfaces.clear()
+        self.size_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.surfaces),
+            "size_bytes": self.size_bytes
+        }
+
+    def _evict(self):
+        # Always keep the surface that was just rendered, even if it is bigger than the budget
+        while self.size_bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.size_bytes -= self._surface_bytes(surface)
+            self.evictions += 1
+
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+
+text_cache = TextCache()
+
+
+def render_text(font, text, antialias, color):
+    """Drop-in replacement of font.render going through the shared text cache."""
+    return text_cache.render(font, text, antialias, color)
@@ -0,0 +1,56 @@
+import pygame
+
+from src.ui.dirty import DirtyRects
+
+SCREEN = pygame.Rect(0, 0, 1280, 720)
+
+
+def make_dirty_rects():
+    dirty_rects = DirtyRects()
+    dirty_rects.enabled = True
+    dirty_rects.collect(SCREEN)  # Consume the first full redraw
+    return dirty_rects
+
+
+def test_first_frame_is_a_full_redraw():
+    dirty_rects = DirtyRects()
+    dirty_rects.enabled = True
+    assert dirty_rects.collect(SCREEN) is None
+    assert dirty_rects.collect(SCREEN) == []
+
+
+def test_moved_widget_dirties_its_old_and_new_rects():
+    dirty_rects = make_dirty_rects()
+    dirty_rects.track("label", (10, 10, 50, 20), "a")
+    dirty_rects.collect(SCREEN)
+    dirty_rects.track("label", (10, 10, 50, 20), "a")
+    assert dirty_rects.collect(SCREEN) == []
+    dirty_rects.track("label", (500, 10, 50, 20), "a")
+    assert sorted(map(tuple, dirty_rects.collect(SCREEN))) == [(10, 10, 50, 20), (500, 10, 50, 20)]
+
+
+def test_overlapping_rects_are_merged_and_clipped():
+    dirty_rects = make_dirty_rects()
+    dirty_rects.mark((0, 0, 20, 20))
+    dirty_rects.mark((10, 10, 20, 20))
+    dirty_rects.mark((1270, 710, 50, 50))
+    assert sorted(map(tuple, dirty_rects.collect(SCREEN))) == [(0, 0, 30, 30), (1270, 710, 10, 10)]
+
+
+def test_large_dirty_area_is_a_full_redraw():
+    dirty_rects = make_dirty_rects()
+    dirty_rects.mark((0, 0, 1280, 400))
+    assert dirty_rects.collect(SCREEN) is None
+
+
+def test_compact_rects_are_drawn_in_one_pass():
+    dirty_rects = DirtyRects()
+    rects = [pygame.Rect(0, 0, 100, 20), pygame.Rect(0, 25, 100, 20)]
+    assert dirty_rects.passes(rects) == [pygame.Rect(0, 0, 100, 45)]
+
+
+def test_distant_rects_are_drawn_one_by_one():
+    dirty_rects = DirtyRects()
+    # A label in each corner: their union would be most of the screen
+    rects = [pygame.Rect(0, 0, 100, 20), pygame.Rect(1180, 700, 100, 20)]
+    assert dirty_rects.passes(rects) == rects
@@ -0,0 +1,229 @@
+import os
+import time
+
+import pytest
+import yaml
+
+from GameConfig import GameConfig
+
+CONFIG = {
+    "game": {
+        "name": "RythmoSphere",
+        "max_fps": 240,
+        "display": {"width": 1280, "height": 720, "dirty_rects": False},
+    },
+    "options": {"max_fps_options": [60, 120, 240]},
+}
+
+
+def write_config(path, parameters):
+    """Replace the file at once, so the watcher never reads it half written."""
+    with open(f"{path}.test", 'w') as file:
+        yaml.dump(parameters, file, default_flow_style=False)
+    os.replace(f"{path}.test", path)
+
+
+def read_config(path):
+    with open(path) as file:
+        return yaml.safe_load(file)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = str(tmp_path / "config.yml")
+    write_config(path, CONFIG)
+    return path
+
+
+def make_config(path):
+    config = GameConfig(path)
+    config.WRITE_DELAY = 0.05
+    config.WATCH_INTERVAL = 0.05
+    return config
+
+
+def test_values_are_coerced_to_their_type(config_path):
+    write_config(config_path, {"game": {"max_fps": "120", "display": {"width": 800.0}}})
+    config = make_config(config_path)
+    assert config.get_parameter("game.max_fps") == 120
+    assert config.get_parameter("game.display.width") == 800
+    assert config.get_parameter("game.display") == {"width": 800.0}  # Sections are returned as read
+
+
+def test_malformed_value_is_ignored(config_path, capsys):
+    write_config(config_path, {"game": {"max_fps": "fast", "display": {"dirty_rects": "yes", "width": 640}}})
+    config = make_config(config_path)
+    assert config.get_parameter("game.max_fps") is None
+    assert config.get_parameter("game.display.dirty_rects") is None
+    assert config.get_parameter("game.display.width") == 640
+    output = capsys.readouterr().out
+    assert "'game.max_fps' must be of type int" in output
+    assert "'game.display.dirty_rects' must be of type bool" in output
+
+
+def test_empty_value_is_ignored(config_path, capsys):
+    write_config(config_path, {"game": {"max_fps": None, "audio_offset_ms": None, "name": None,
+                                        "display": {"width": None, "height": 720}}})
+    config = make_config(config_path)
+    assert config.get_parameter("game.max_fps") is None
+    assert "game.max_fps" not in config.values and "game.display.width" not in config.values
+    assert config.get_parameter("game.display.height") == 720
+    assert "'game.audio_offset_ms' must be of type int, got None" in capsys.readouterr().out
+    with pytest.raises(ValueError, match="must be of type int"):
+        config.set_parameter("game.max_fps", None)
+
+
+def test_empty_value_in_an_external_edit_is_not_notified(config_path):
+    config = make_config(config_path)
+    calls = []
+    config.subscribe(("game.max_fps", "game.audio_offset_ms", "game.display.width"), calls.append)
+    config.watch()
+
+    edited = yaml.safe_load(yaml.dump(CONFIG))
+    edited["game"]["max_fps"] = None
+    edited["game"]["audio_offset_ms"] = None
+    edited["game"]["display"]["width"] = 800
+    write_config(config_path, edited)
+    wait_for(lambda: config.external_parameters is not None)
+    config.update()
+    assert calls == [{"game.display.width": 800}]
+    assert config.get_parameter("game.max_fps") == 240
+
+
+def test_document_that_is_not_a_mapping_is_rejected(config_path, capsys):
+    with open(config_path, 'w') as file:
+        file.write("- 1\n- 2\n")
+    with pytest.raises(ValueError, match="mapping"):
+        GameConfig(config_path)
+
+    write_config(config_path, CONFIG)
+    config = make_config(config_path)
+    config.watch()
+    for document in ("- 1\n- 2\n", "just text\n"):
+        with open(f"{config_path}.test", 'w') as file:
+            file.write(document)
+        os.replace(f"{config_path}.test", config_path)
+        wait_for(lambda: "expected a mapping" in capsys.readouterr().out)
+        assert config.external_parameters is None
+        config.update()
+    assert config.get_parameter("game.max_fps") == 240
+
+
+def test_malformed_value_is_rejected_by_set_parameter(config_path):
+    config = make_config(config_path)
+    with pytest.raises(ValueError, match="must be of type int"):
+        config.set_parameter("game.max_fps", "fast")
+    assert config.get_parameter("game.max_fps") == 240
+    assert config.write_time is None
+
+
+def test_save_then_reload(config_path):
+    config = make_config(config_path)
+    config.set_parameter("game.max_fps", 120)
+    config.set_parameter("game.display.width", "1920")
+    config.set_parameter("game.audio_offset_ms", -15)
+    # Written by the background thread, without a flush
+    wait_for(lambda: read_config(config_path)["game"]["max_fps"] == 120)
+    saved = read_config(config_path)
+    assert saved["game"]["max_fps"] == 120 and saved["game"]["display"]["width"] == 1920
+    assert not [name for name in os.listdir(os.path.dirname(config_path)) if name.endswith(".tmp")]
+
+    reloaded = make_config(config_path)
+    assert reloaded.values == config.values
+    assert reloaded.get_parameter("game.audio_offset_ms") == -15
+    assert reloaded.get_options("max_fps_options") == [60, 120, 240]
+
+
+def test_burst_of_changes_is_written_once(config_path, monkeypatch):
+    config = make_config(config_path)
+    config.WRITE_DELAY = 0.2
+    writes = []
+    save_config = config.save_config
+    monkeypatch.setattr(config, "save_config", lambda: (writes.append(1), save_config()))
+    for fps in (60, 120, 240, 60):
+        config.set_parameter("game.max_fps", fps)
+    wait_for(lambda: read_config(config_path)["game"]["max_fps"] == 60)
+    time.sleep(0.3)
+    assert len(writes) == 1
+
+
+def test_flush_writes_pending_changes(config_path):
+    config = make_config(config_path)
+    config.WRITE_DELAY = 60
+    config.set_parameter("game.max_fps", 60)
+    assert read_config(config_path)["game"]["max_fps"] == 240
+    config.flush()
+    assert read_config(config_path)["game"]["max_fps"] == 60
+
+
+def test_subscriber_fires_once_per_changed_key(config_path):
+    config = make_config(config_path)
+    calls = []
+    config.subscribe(("game.display.width", "game.display.height"), calls.append)
+    config.subscribe("game.max_fps", lambda changes: calls.append(("fps", changes)))
+
+    config.set_parameter("game.display.width", 1280)  # Unchanged
+    config.set_parameter("game.name", "Other")  # Not subscribed
+    assert calls == []
+    config.set_parameter("game.display.width", 1920)
+    config.set_parameter("game.display.width", "1920")  # Same value once coerced
+    assert calls == [{"game.display.width": 1920}]
+
+
+def test_external_edit_notifies_subscribers_once(config_path):
+    config = make_config(config_path)
+    calls = []
+    config.subscribe(("game.display.width", "game.display.height"), calls.append)
+    config.subscribe("game.max_fps", lambda changes: calls.append(("fps", changes)))
+    config.watch()
+
+    edited = yaml.safe_load(yaml.dump(CONFIG))
+    edited["game"]["display"]["width"] = 800
+    edited["game"]["display"]["height"] = 600
+    write_config(config_path, edited)
+    wait_for(lambda: config.external_parameters is not None)
+    config.update()
+    config.update()
+    assert calls == [{"game.display.width": 800, "game.display.height": 600}]
+    assert config.get_parameter("game.display.width") == 800
+
+
+def test_local_changes_win_over_external_edits(config_path):
+    config = make_config(config_path)
+    config.WRITE_DELAY = 60
+    config.set_parameter("game.max_fps", 60)
+    config.watch()
+
+    edited = yaml.safe_load(yaml.dump(CONFIG))
+    edited["game"]["max_fps"] = 30
+    edited["game"]["display"]["width"] = 640
+    write_config(config_path, edited)
+    wait_for(lambda: config.external_parameters is not None)
+    config.update()
+    assert config.get_parameter("game.max_fps") == 60
+    assert config.get_parameter("game.display.width") == 640
+
+
+def test_truncated_file_is_not_applied(config_path):
+    config = make_config(config_path)
+    config.watch()
+    # An editor saving in place empties the file before writing it
+    open(config_path, 'w').close()
+    time.sleep(5 * config.WATCH_INTERVAL)
+    assert config.external_parameters is None
+
+    edited = yaml.safe_load(yaml.dump(CONFIG))
+    edited["game"]["max_fps"] = 30
+    with open(config_path, 'w') as file:
+        yaml.dump(edited, file)
+    wait_for(lambda: config.external_parameters is not None)
+    config.update()
+    assert config.get_parameter("game.max_fps") == 30
+    assert config.get_parameter("game.display.width") == 1280
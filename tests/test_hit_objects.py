@@ -0,0 +1,62 @@
+from src.beatmap_manager.HitObjects import HitObjects
+
+
+def columns(hit_objects):
+    return (list(hit_objects.times), list(hit_objects.lanes), list(hit_objects.types),
+            list(hit_objects.durations))
+
+
+def per_line(lines):
+    hit_objects = HitObjects()
+    for line in lines:
+        hit_objects.append_line(line)
+    return hit_objects
+
+
+def test_simple_lines():
+    hit_objects = HitObjects()
+    hit_objects.extend_lines(["1.0,0,0", "1.5,1,0", "2.0,2,0"])
+    assert columns(hit_objects) == ([1.0, 1.5, 2.0], [0, 1, 2], [0, 0, 0], [0.0, 0.0, 0.0])
+
+
+def test_mixed_simple_and_hold_lines():
+    hit_objects = HitObjects()
+    hit_objects.extend_lines(["1.0,0,0", "1.5,1,1,0.5", "2.0,2,0"])
+    assert columns(hit_objects) == ([1.0, 1.5, 2.0], [0, 1, 2], [0, 1, 0], [0.0, 0.5, 0.0])
+
+
+def test_short_line_is_not_merged_with_its_neighbour(capsys):
+    hit_objects = HitObjects()
+    hit_objects.extend_lines(["1.0,2", "3,1,1,0"])
+    assert columns(hit_objects) == ([3.0], [1], [1], [0.0])
+    assert "Skipping hit object '1.0,2'" in capsys.readouterr().out
+
+
+def test_short_line_next_to_a_long_line_is_skipped(capsys):
+    lines = ["1.0,0", "2.0,1,0,0.5,1,0", "3.0,2,0"]
+    hit_objects = HitObjects()
+    hit_objects.extend_lines(lines)
+    assert columns(hit_objects) == ([3.0], [2], [0], [0.0])
+    output = capsys.readouterr().out
+    assert "'1.0,0'" in output and "'2.0,1,0,0.5,1,0'" in output
+
+
+def test_malformed_lines_match_the_per_line_path(capsys):
+    lines = ["1.0,0,0", "x,1,0", "2.0,1", "2.5,1,1,0.25", "3.0,2,0,", "3.5,3,0", "4.0,0,1,1.0,2", "4.5,1,0"]
+    hit_objects = HitObjects()
+    hit_objects.extend_lines(lines)
+    assert columns(hit_objects) == columns(per_line(lines))
+    assert list(hit_objects.times) == [1.0, 2.5, 3.5, 4.5]
+
+
+def test_extend_appends_after_existing_objects():
+    hit_objects = HitObjects()
+    hit_objects.extend_lines(["1.0,0,0"])
+    hit_objects.extend_lines(["2.0,1", "3.0,1,0"])
+    assert columns(hit_objects) == ([1.0, 3.0], [0, 1], [0, 0], [0.0, 0.0])
+
+
+def test_from_txt_skips_malformed_lines(tmp_path):
+    txt_path = tmp_path / "chart.txt"
+    txt_path.write_text("[GENERAL]\nname=test\n[OBJECTS]\n1.0,0,0\n1.5,1\n\n2.0, 1, 1, 0.5\n[EVENTS]\n9.0,0,0\n")
+    assert columns(HitObjects.from_txt(str(txt_path))) == ([1.0, 2.0], [0, 1], [0, 1], [0.0, 0.5])
@@ -0,0 +1,100 @@
+from src.beatmap_manager.HitObjects import HitObjects
+from src.game.JudgementEngine import GOOD, GREAT, MISS, PENDING, PERFECT, JudgementEngine
+
+# Windows exact in binary, so the tests can hit their edges
+PERFECT_WINDOW, GREAT_WINDOW, GOOD_WINDOW, MISS_WINDOW = 0.125, 0.25, 0.375, 0.5
+EPSILON = 1 / 1024
+
+
+def make_engine(*lines):
+    hit_objects = HitObjects()
+    hit_objects.extend_lines(list(lines))
+    return JudgementEngine(hit_objects, PERFECT_WINDOW, GREAT_WINDOW, GOOD_WINDOW, MISS_WINDOW)
+
+
+def judge_one(input_time):
+    """Judgement of a single input on a note at 1.0 s."""
+    engine = make_engine("1.0,0,0")
+    engine.press(input_time, 0)
+    engine.update(input_time)
+    return engine.results[0]
+
+
+def test_windows_are_inclusive_at_their_edges():
+    for sign in (1, -1):
+        assert judge_one(1.0 + sign * PERFECT_WINDOW) == PERFECT
+        assert judge_one(1.0 + sign * (PERFECT_WINDOW + EPSILON)) == GREAT
+        assert judge_one(1.0 + sign * GREAT_WINDOW) == GREAT
+        assert judge_one(1.0 + sign * (GREAT_WINDOW + EPSILON)) == GOOD
+        assert judge_one(1.0 + sign * GOOD_WINDOW) == GOOD
+        assert judge_one(1.0 + sign * (GOOD_WINDOW + EPSILON)) == MISS
+        assert judge_one(1.0 + sign * MISS_WINDOW) == MISS
+
+
+def test_input_before_the_miss_window_is_ignored():
+    engine = make_engine("1.0,0,0")
+    engine.press(1.0 - MISS_WINDOW - EPSILON, 0)
+    assert engine.update(1.0 - MISS_WINDOW - EPSILON) == []
+    assert engine.results[0] == PENDING
+    # The note can still be hit afterwards
+    engine.press(1.0, 0)
+    assert engine.update(1.0) == [(0, PERFECT, 0.0)]
+
+
+def test_input_after_the_miss_window_misses_the_note_without_hitting():
+    engine = make_engine("1.0,0,0", "3.0,0,0")
+    engine.press(1.0 + MISS_WINDOW + EPSILON, 0)
+    assert engine.update(1.0 + MISS_WINDOW + EPSILON) == [(0, MISS, 0.0)]
+    assert engine.results[1] == PENDING
+
+
+def test_notes_are_missed_once_they_leave_the_window():
+    engine = make_engine("1.0,0,0")
+    assert engine.update(1.0 + MISS_WINDOW) == []
+    assert engine.update(1.0 + MISS_WINDOW + EPSILON) == [(0, MISS, 0.0)]
+    assert engine.is_finished()
+    assert engine.update(5.0) == []  # Judged once
+
+
+def test_lanes_are_matched_independently():
+    engine = make_engine("1.0,0,0", "1.0,1,0", "1.75,0,0")
+    engine.press(1.75, 0)
+    engine.press(1.0, 1)
+    judgements = engine.update(1.75)
+    # The lane 0 input skipped the note at 1.0, the lane 1 note is hit
+    assert sorted(judgements) == [(0, MISS, 0.0), (1, PERFECT, 0.0), (2, PERFECT, 0.0)]
+    assert engine.counts[PERFECT] == 2 and engine.counts[MISS] == 1
+
+
+def test_inputs_are_matched_in_time_order():
+    engine = make_engine("1.0,0,0", "1.5,0,0")
+    engine.press(1.5, 0)
+    engine.press(1.0, 0)
+    assert engine.update(1.5) == [(0, PERFECT, 0.0), (1, PERFECT, 0.0)]
+    assert engine.combo == engine.max_combo == 2
+
+
+def test_hold_is_judged_on_its_start_only():
+    engine = make_engine("1.0,0,1,2.0")
+    engine.press(1.0 + GREAT_WINDOW, 0)
+    assert engine.update(1.0 + GREAT_WINDOW) == [(0, GREAT, GREAT_WINDOW)]
+    assert engine.is_finished()
+    assert engine.update(3.0 + MISS_WINDOW + EPSILON) == []
+
+
+def test_input_on_an_unknown_lane_is_ignored():
+    engine = make_engine("1.0,0,0")
+    engine.press(1.0, 5)
+    engine.press(1.0, -1)
+    assert engine.update(1.0) == []
+
+
+def test_accuracy_and_combo():
+    engine = make_engine("1.0,0,0", "2.0,0,0", "3.0,0,0")
+    assert engine.get_accuracy() == 1.0
+    engine.press(1.0, 0)
+    engine.press(2.0 + GOOD_WINDOW, 0)
+    engine.update(4.0)
+    assert engine.get_summary() == {"accuracy": (1.0 + 1 / 3) / 3, "max_combo": 2, "perfect": 1, "great": 0,
+                                    "good": 1, "miss": 1}
+    assert engine.combo == 0
@@ -0,0 +1,117 @@
+from src.beatmap_manager.HitObjects import HitObjects
+from src.game.NoteScheduler import NoteScheduler
+
+APPROACH_TIME, MISS_WINDOW = 1.0, 0.5
+EPSILON = 1 / 1024
+
+
+def make_scheduler(*lines):
+    hit_objects = HitObjects()
+    hit_objects.extend_lines(list(lines))
+    return NoteScheduler(hit_objects, APPROACH_TIME, MISS_WINDOW)
+
+
+def test_note_enters_exactly_at_approach_time():
+    scheduler = make_scheduler("1.0,0,0", "2.0,0,0")
+    scheduler.update(-EPSILON)
+    assert list(scheduler.visible()) == []
+    scheduler.update(0.0)
+    assert list(scheduler.entered) == [0]
+    assert list(scheduler.visible()) == [0]
+    scheduler.update(1.0)
+    assert list(scheduler.entered) == [1]
+    assert list(scheduler.visible()) == [0, 1]
+
+
+def test_note_leaves_after_the_miss_window():
+    scheduler = make_scheduler("1.0,0,0", "2.0,0,0")
+    scheduler.seek(1.0)
+    scheduler.update(1.0 + MISS_WINDOW)
+    assert list(scheduler.expired) == []
+    assert list(scheduler.visible()) == [0, 1]
+    scheduler.update(1.0 + MISS_WINDOW + EPSILON)
+    assert list(scheduler.expired) == [0]
+    assert list(scheduler.visible()) == [1]
+
+
+def test_entered_and_expired_cover_every_note_once():
+    times = [index * 0.25 for index in range(40)]
+    scheduler = make_scheduler(*(f"{time},{index % 4},0" for index, time in enumerate(times)))
+    entered, expired = [], []
+    now = -APPROACH_TIME
+    while now <= times[-1] + MISS_WINDOW + 1.0:
+        scheduler.update(now)
+        entered.extend(scheduler.entered)
+        expired.extend(scheduler.expired)
+        for index in scheduler.visible():
+            assert now - MISS_WINDOW <= times[index] <= now + APPROACH_TIME
+        now += 0.125
+    assert entered == list(range(len(times)))
+    assert expired == list(range(len(times)))
+
+
+def test_hold_stays_until_its_end_leaves_the_window():
+    scheduler = make_scheduler("1.0,0,1,2.0", "1.5,1,0", "3.0,2,0")
+    scheduler.seek(1.5 + MISS_WINDOW + EPSILON)
+    assert list(scheduler.visible()) == [0, 2]
+    assert not scheduler.is_over(0)
+    scheduler.update(3.0 + MISS_WINDOW)
+    assert 0 in scheduler.visible()
+    assert list(scheduler.expired) == []
+    scheduler.update(3.0 + MISS_WINDOW + EPSILON)
+    assert list(scheduler.expired) == [0, 2]
+    assert list(scheduler.visible()) == []
+    assert scheduler.is_over(0)
+
+
+def test_long_hold_does_not_widen_the_window():
+    # A minute long hold, then a note every 0.125 s
+    lines = ["0.0,0,1,60.0"] + [f"{index * 0.125},1,0" for index in range(1, 560)]
+    scheduler = make_scheduler(*lines)
+    for now in (10.0, 30.0, 59.0):
+        scheduler.seek(now) if now == 10.0 else scheduler.update(now)
+        visible = list(scheduler.visible())
+        assert visible[0] == 0
+        # The hold and the notes of [now - miss_window, now + approach_time], not the notes of the last minute
+        assert len(visible) == 1 + int((MISS_WINDOW + APPROACH_TIME) / 0.125) + 1
+
+
+def test_entered_and_expired_cover_every_hold_once():
+    times = [index * 0.25 for index in range(40)]
+    lines = [f"{time},{index % 4},1,{(index % 5) * 0.75}" for index, time in enumerate(times)]
+    scheduler = make_scheduler(*lines)
+    durations = [(index % 5) * 0.75 for index in range(len(times))]
+    entered, expired = [], []
+    now = -APPROACH_TIME
+    while now <= times[-1] + 4.0:
+        scheduler.update(now)
+        entered.extend(scheduler.entered)
+        expired.extend(scheduler.expired)
+        for index in scheduler.expired:
+            assert times[index] + durations[index] < now - MISS_WINDOW
+        visible = list(scheduler.visible())
+        assert visible == sorted(visible)
+        assert visible == [index for index in range(len(times)) if times[index] <= now + APPROACH_TIME
+                           and times[index] + durations[index] >= now - MISS_WINDOW]
+        now += 0.125
+    assert entered == list(range(len(times)))
+    assert sorted(expired) == list(range(len(times)))
+
+
+def test_seek_finds_the_running_holds():
+    scheduler = make_scheduler("1.0,0,1,4.0", "2.0,1,1,0.5", "3.0,2,0", "6.0,3,0")
+    scheduler.seek(5.0)
+    assert list(scheduler.visible()) == [0, 3]
+    scheduler.seek(2.25)
+    assert list(scheduler.visible()) == [0, 1, 2]
+    assert list(scheduler.expired) == []
+
+
+def test_seek_backwards_rebuilds_the_window():
+    scheduler = make_scheduler("1.0,0,0", "2.0,0,0", "3.0,0,0")
+    scheduler.seek(2.5)
+    assert list(scheduler.visible()) == [1, 2]
+    scheduler.update(0.5)
+    assert list(scheduler.visible()) == [0]
+    assert list(scheduler.entered) == [0]
+    assert list(scheduler.expired) == []
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from src.beatmap_manager.ChartCache import ChartCache
+from src.game.JudgementEngine import MISS, PERFECT, JudgementEngine
+from src.game.Replay import HEADER, Replay
+from src.game.ReplayScorer import ReplayScorer
+
+FRAME_TIME = 1 / 240
+
+
+def write_chart(folder, note_count=200, seed=1):
+    rng = random.Random(seed)
+    lines = []
+    time = 1.0
+    for _ in range(note_count):
+        time += rng.choice((0.125, 0.25, 0.5))
+        if rng.random() < 0.2:
+            lines.append(f"{time:.3f},{rng.randrange(4)},1,{rng.choice((0.25, 0.5)):.3f}")
+        else:
+            lines.append(f"{time:.3f},{rng.randrange(4)},0")
+    txt_path = folder / "0001 - Test" / "Normal.txt"
+    txt_path.parent.mkdir(parents=True)
+    txt_path.write_text("[GENERAL]\nname=Test\n[OBJECTS]\n" + "\n".join(lines) + "\n")
+    return txt_path
+
+
+def test_round_trip(tmp_path):
+    replay = Replay(bytes(range(16)), "0042", "Härd ☆", recorded_at=1700000000)
+    for song_time, lane in ((-0.5, 0), (0.0, 3), (1.0 / 3, 1), (12345.678901, 2), (2.5, -1)):
+        replay.add_input(song_time, lane)
+    path = tmp_path / "replays" / "play.rsr"
+    replay.save(str(path))
+
+    loaded = Replay.load(str(path))
+    assert (loaded.chart_hash, loaded.beatmap_id, loaded.difficulty_name, loaded.recorded_at) == (
+        replay.chart_hash, replay.beatmap_id, replay.difficulty_name, replay.recorded_at)
+    assert loaded.input_times == replay.input_times
+    assert loaded.input_lanes == replay.input_lanes
+
+
+def test_empty_round_trip(tmp_path):
+    path = tmp_path / "empty.rsr"
+    Replay(bytes(16)).save(str(path))
+    loaded = Replay.load(str(path))
+    assert len(loaded) == 0 and loaded.beatmap_id == loaded.difficulty_name == ""
+
+
+def test_load_rejects_invalid_files(tmp_path):
+    replay = Replay(bytes(16), "1", "Easy")
+    replay.add_input(1.0, 0)
+    path = tmp_path / "play.rsr"
+    replay.save(str(path))
+    data = path.read_bytes()
+
+    for name, content in (("short.rsr", data[:HEADER.size - 1]), ("truncated.rsr", data[:-1]),
+                          ("magic.rsr", b"NOPE" + data[4:])):
+        (tmp_path / name).write_bytes(content)
+        with pytest.raises(ValueError):
+            Replay.load(str(tmp_path / name))
+
+
+def test_scorer_matches_the_live_engine(tmp_path):
+    txt_path = write_chart(tmp_path / "beatmaps")
+    chart_cache = ChartCache(str(tmp_path / "charts"))
+    hit_objects = chart_cache.load(str(txt_path))
+
+    # Inputs around most notes, early and late, plus stray ones
+    rng = random.Random(2)
+    inputs = [(time + rng.uniform(-0.25, 0.25), lane)
+              for time, lane in zip(hit_objects.times, hit_objects.lanes) if rng.random() < 0.9]
+    inputs += [(rng.uniform(0.0, hit_objects.times[-1]), rng.randrange(4)) for _ in range(50)]
+    inputs.sort()
+
+    # Play it like the game: inputs are pressed between frames, and judged by the next update
+    live = JudgementEngine(hit_objects)
+    replay = Replay(ChartCache.hash_file(str(txt_path)), "0001", "Normal")
+    position = 0
+    now = 0.0
+    while not live.is_finished():
+        now += FRAME_TIME
+        while position < len(inputs) and inputs[position][0] <= now:
+            live.press(*inputs[position])
+            replay.add_input(*inputs[position])
+            position += 1
+        live.update(now)
+    path = tmp_path / "play.rsr"
+    replay.save(str(path))
+
+    scored = ReplayScorer(str(tmp_path / "beatmaps"), chart_cache).score(Replay.load(str(path)))
+    assert list(scored.results) == list(live.results)
+    assert list(scored.offsets) == list(live.offsets)
+    assert scored.get_summary() == live.get_summary()
+    assert scored.counts[PERFECT] > 0 and scored.counts[MISS] > 0  # Both hits and misses were compared
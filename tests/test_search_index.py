@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from src.beatmap_manager.BeatMapSearchIndex import FIELDS, BeatMapSearchIndex
+
+ENTRIES = [
+    ("Guinea Pig Bridge", "Hard", "Sound Souler", "mapper1"),
+    ("Guinea Pig Bridge", "Easy", "Sound Souler", "mapper2"),
+    ("Night of Knights", "Lunatic", "beatMARIO", "Ab"),
+    ("Café Über Straße", "Normal", "Ørjan", "Émile"),
+    ("東方 夜雀", "Hard", "ZUN", "ぴょん"),
+    ("Блюз", "Insane", "Иван", "a"),
+    ("", None, "x", "xyz"),
+]
+QUERIES = ["", "a", "b", "ab", "é", "ü", "ß", "東", "夜雀", "ан", "guinea", "pig bri", "hard", "title=g", "diff=h",
+           "artist=sound", "mapper=a", "creator=ém", "unknown=ha", "night knights", "café über", "x", "z", "zz",
+           "ORJAN", "ørj", "straße", "abc", "mapper=", "title=ngs"]
+
+
+def reference(entries, query):
+    """Plain substring filter: every term is a substring of the field it names, or of any field."""
+    terms = BeatMapSearchIndex.parse_query(query)
+    return [index for index, entry in enumerate(entries)
+            if all(any(text in (entry[field_index] or "").lower()
+                       for field_index in (range(len(FIELDS)) if field is None else (field,)))
+                   for field, text in terms)]
+
+
+def random_entries(count, seed):
+    rng = random.Random(seed)
+    alphabet = "abcdeé東ß "
+    return [tuple("".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8))) for _ in FIELDS)
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_matches_substring_filter(query):
+    assert list(BeatMapSearchIndex(ENTRIES).search(query)) == reference(ENTRIES, query)
+
+
+def test_queries_shorter_than_the_gram_size():
+    entries = random_entries(300, seed=1)
+    index = BeatMapSearchIndex(entries)
+    for query in ("a", "é", "東", "ß", "ab", "é東", "a b", "creator=e", "abc", "ééé"):
+        assert list(index.search(query)) == reference(entries, query), query
+
+
+def test_typing_and_deleting_characters(monkeypatch):
+    entries = random_entries(500, seed=2)
+    # Both ways of narrowing a result: filtering the previous one, and intersecting the masks
+    for threshold in (0, BeatMapSearchIndex.FILTER_THRESHOLD):
+        monkeypatch.setattr(BeatMapSearchIndex, "FILTER_THRESHOLD", threshold)
+        index = BeatMapSearchIndex(entries)
+        text = "abé東 cd"
+        queries = [text[:length] for length in range(len(text) + 1)]
+        for query in queries + queries[::-1] + ["title=a", "title=ab", "a", "ab"]:
+            assert list(index.search(query)) == reference(entries, query), (threshold, query)
+
+
+def test_results_after_records_are_added_or_removed():
+    entries = list(ENTRIES)
+    queries = ["a", "hard", "guinea", "é", "east"]
+    for change in ("add", "remove", "add", "remove"):
+        if change == "add":
+            entries.append(("Eastern Bridge", "Hard", "A", "é"))
+        else:
+            entries.pop(0)
+        index = BeatMapSearchIndex(entries)
+        for query in queries:
+            assert list(index.search(query)) == reference(entries, query), (change, query)
+
+
+def test_empty_index():
+    index = BeatMapSearchIndex([])
+    assert list(index.search("")) == []
+    assert list(index.search("abc")) == []